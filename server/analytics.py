@@ -0,0 +1,145 @@
+"""
+Server-side aggregates for the Modexia ISP API.
+
+Collections are turned into NumPy column arrays once per dataset version and
+aggregated with vectorized group-bys, so dashboards get MRR, utilization, SLA
+and saturation figures without pulling every row over the wire.
+"""
+
+from typing import Dict, List, Sequence, Tuple
+
+import numpy as np
+
+from store import Collection
+
+
+class ColumnCache:
+    """NumPy arrays for collection columns, rebuilt when the collection version changes"""
+
+    def __init__(self):
+        self._columns: Dict[Tuple[str, str], Tuple[int, np.ndarray]] = {}
+
+    def get(self, collection: Collection, field: str, dtype=None) -> np.ndarray:
+        key = (collection.name, field)
+        entry = self._columns.get(key)
+        if entry is None or entry[0] != collection.version:
+            values = [row[field] for row in collection.rows]
+            array = np.asarray(values, dtype=dtype if dtype is not None else object)
+            entry = self._columns[key] = (collection.version, array)
+        return entry[1]
+
+
+def _group_codes(keys: Sequence[np.ndarray]) -> Tuple[np.ndarray, List[tuple]]:
+    """Map rows to dense group codes over one or more key columns"""
+    codes = np.zeros(len(keys[0]), dtype=np.int64)
+    uniques = []
+    for column in keys:
+        values, inverse = np.unique(column, return_inverse=True)
+        codes = codes * len(values) + inverse
+        uniques.append(values)
+    present, codes = np.unique(codes, return_inverse=True)
+    labels = []
+    for code in present.tolist():
+        label = []
+        for values in reversed(uniques):
+            code, position = divmod(code, len(values))
+            label.append(values[position])
+        labels.append(tuple(reversed(label)))
+    return codes, labels
+
+
+def mrr_breakdown(columns: ColumnCache, customers: Collection, group_by: Sequence[str], mask=None) -> List[dict]:
+    """Customer count and MRR summed per combination of group_by columns"""
+    if not len(customers):
+        return []
+    mrr = columns.get(customers, "monthly_recurring_revenue", np.float64)
+    keys = [columns.get(customers, field) for field in group_by]
+    if mask is not None:
+        mrr = mrr[mask]
+        keys = [key[mask] for key in keys]
+        if not len(mrr):
+            return []
+    codes, labels = _group_codes(keys)
+    totals = np.bincount(codes, weights=mrr, minlength=len(labels))
+    counts = np.bincount(codes, minlength=len(labels))
+    return [
+        dict(zip(group_by, label), customers=int(count), monthly_recurring_revenue=float(total))
+        for label, count, total in zip(labels, counts.tolist(), totals.tolist())
+    ]
+
+
+def distribution(values: np.ndarray, percentiles: Sequence[float]) -> dict:
+    """Count, mean, min/max and the requested percentiles of a numeric column"""
+    if not len(values):
+        return {"count": 0, "mean": None, "min": None, "max": None, "percentiles": {}}
+    points = np.percentile(values, percentiles)
+    return {
+        "count": int(len(values)),
+        "mean": float(values.mean()),
+        "min": float(values.min()),
+        "max": float(values.max()),
+        "percentiles": {f"p{p:g}": float(v) for p, v in zip(percentiles, points.tolist())},
+    }
+
+
+def sla_by_period(columns: ColumnCache, sla_metrics: Collection) -> List[dict]:
+    """SLA breach rate, credits and latency per reporting period"""
+    if not len(sla_metrics):
+        return []
+    periods = columns.get(sla_metrics, "reporting_period")
+    breached = ~columns.get(sla_metrics, "sla_met", bool)
+    credits = columns.get(sla_metrics, "credits_issued_usd", np.float64)
+    downtime = columns.get(sla_metrics, "total_downtime_minutes", np.float64)
+    latency = columns.get(sla_metrics, "avg_latency_ms", np.float64)
+
+    codes, labels = _group_codes([periods])
+    size = len(labels)
+    counts = np.bincount(codes, minlength=size)
+    breaches = np.bincount(codes, weights=breached, minlength=size)
+    credit_totals = np.bincount(codes, weights=credits, minlength=size)
+    downtime_totals = np.bincount(codes, weights=downtime, minlength=size)
+    latency_totals = np.bincount(codes, weights=latency, minlength=size)
+    return [
+        {
+            "reporting_period": label[0],
+            "customers": int(count),
+            "sla_breaches": int(breach),
+            "breach_rate": float(breach / count),
+            "credits_issued_usd": float(credit),
+            "total_downtime_minutes": float(down),
+            "avg_latency_ms": float(lat / count),
+        }
+        for label, count, breach, credit, down, lat in zip(
+            labels, counts.tolist(), breaches.tolist(), credit_totals.tolist(),
+            downtime_totals.tolist(), latency_totals.tolist(),
+        )
+    ]
+
+
+def node_saturation(columns: ColumnCache, nodes: Collection, threshold: float) -> List[dict]:
+    """Used capacity, headroom and saturation flag per network node, most utilized first"""
+    if not len(nodes):
+        return []
+    node_ids = columns.get(nodes, "node_id")
+    node_types = columns.get(nodes, "node_type")
+    statuses = columns.get(nodes, "status")
+    capacity = columns.get(nodes, "capacity_gbps", np.float64)
+    utilization = columns.get(nodes, "current_utilization_percent", np.float64)
+
+    used = capacity * utilization / 100
+    headroom = capacity - used
+    saturated = utilization >= threshold
+    order = np.argsort(-utilization, kind="stable")
+    return [
+        {
+            "node_id": node_ids[i],
+            "node_type": node_types[i],
+            "status": statuses[i],
+            "capacity_gbps": float(capacity[i]),
+            "current_utilization_percent": float(utilization[i]),
+            "used_gbps": float(used[i]),
+            "headroom_gbps": float(headroom[i]),
+            "saturated": bool(saturated[i]),
+        }
+        for i in order.tolist()
+    ]
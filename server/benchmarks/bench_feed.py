@@ -0,0 +1,82 @@
+"""
+Benchmark: change-feed fan-out latency with many concurrent subscribers.
+
+Starts --subscribers streams on one ChangeFeed (a quarter unfiltered, the rest
+filtered on priority or status) and publishes --rounds batches of --batch
+ticket updates. For each batch it measures how long it takes until every
+subscriber has received its frames.
+
+Usage (from the server directory):
+    python benchmarks/bench_feed.py [--subscribers 5000] [--batch 100] [--rounds 20]
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from feed import UPDATE, ChangeFeed  # noqa: E402
+
+PRIORITIES = ["Critical", "High", "Medium", "Low"]
+FILTERS = [{}, {"priority": "Critical"}, {"status": "Open"}, {"priority": "High", "status": "Open"}]
+
+
+def ticket(i: int, round_: int) -> dict:
+    return {
+        "ticket_id": f"TKT-{i:08d}",
+        "priority": PRIORITIES[(i + round_) % 4],
+        "status": "Open" if (i + round_) % 3 else "Resolved",
+        "description": "intermittent packet loss during peak hours",
+    }
+
+
+async def run(args) -> None:
+    feed = ChangeFeed()
+    received = [0] * args.subscribers
+    done = asyncio.Event()
+    pending = args.subscribers
+
+    async def subscriber(n: int):
+        nonlocal pending
+        async for chunk in feed.stream(resources=["tickets"], criteria=FILTERS[n % len(FILTERS)]):
+            if chunk.startswith(b"id:") and b"event: ready" not in chunk:
+                received[n] += 1
+                pending -= 1
+                if pending == 0:
+                    done.set()
+
+    tasks = [asyncio.create_task(subscriber(n)) for n in range(args.subscribers)]
+    await asyncio.sleep(0.1)
+
+    latencies = []
+    for round_ in range(args.rounds):
+        pending = args.subscribers
+        done.clear()
+        changes = [(UPDATE, f"TKT-{i:08d}", ticket(i, round_ + 1), ticket(i, round_)) for i in range(args.batch)]
+        start = time.perf_counter()
+        feed.publish("tickets", changes)
+        await done.wait()
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    for task in tasks:
+        task.cancel()
+    latencies.sort()
+    print(f"{args.subscribers} subscribers, {args.batch} changes per publish, {args.rounds} rounds")
+    print(f"publish -> all delivered: p50 {statistics.median(latencies):.1f} ms, max {latencies[-1]:.1f} ms "
+          f"({statistics.median(latencies) * 1000 / args.subscribers:.1f} us per subscriber)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--subscribers", type=int, default=5000)
+    parser.add_argument("--batch", type=int, default=100)
+    parser.add_argument("--rounds", type=int, default=20)
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
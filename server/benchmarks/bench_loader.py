@@ -0,0 +1,127 @@
+"""
+Benchmark: cold-start time and memory for loading a large customers dump.
+
+Writes a synthetic customers dump to a temporary data directory, then measures
+DataLoader.load, Collection construction and the first (lazy) index build.
+
+Usage (from the server directory):
+    python benchmarks/bench_loader.py [--rows 1000000] [--format ndjson|json|csv]
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import resource
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pydantic import BaseModel  # noqa: E402
+
+from loader import DataLoader  # noqa: E402
+from store import Collection  # noqa: E402
+
+
+class Customer(BaseModel):
+    customer_id: str
+    account_name: str
+    customer_type: str
+    subscription_plan: str
+    monthly_recurring_revenue: float
+    contract_start_date: str
+    contract_end_date: str
+    status: str
+    billing_cycle: str
+    payment_method: str
+    primary_contact: str
+    contact_email: str
+    contact_phone: str
+    service_address: str
+    installation_date: str
+    bandwidth_usage_percent: float
+    support_tier: str
+
+
+def make_customer(rng: random.Random, i: int) -> dict:
+    return {
+        "customer_id": f"CUST-{i:08d}",
+        "account_name": f"Account {i}",
+        "customer_type": rng.choice(["Enterprise", "SME", "Residential"]),
+        "subscription_plan": rng.choice(["MDX-HOME-50", "MDX-BIZ-100", "MDX-ENT-1G", "MDX-DARK"]),
+        "monthly_recurring_revenue": rng.choice([40, 150, 1200, 5000]),
+        "contract_start_date": f"2024-{rng.randint(1, 12):02d}-01",
+        "contract_end_date": f"2026-{rng.randint(1, 12):02d}-01",
+        "status": rng.choice(["Active", "Suspended", "Churned", "Trial"]),
+        "billing_cycle": rng.choice(["Monthly", "Quarterly"]),
+        "payment_method": rng.choice(["Wire Transfer", "Credit Card", "Direct Debit"]),
+        "primary_contact": f"Contact {i}",
+        "contact_email": f"contact{i}@example.com",
+        "contact_phone": f"+1-555-{i % 10000:04d}",
+        "service_address": f"{i} Main Street",
+        "installation_date": f"2024-{rng.randint(1, 12):02d}-15",
+        "bandwidth_usage_percent": rng.randint(0, 100),
+        "support_tier": rng.choice(["Basic", "Standard", "Premium", "Platinum"]),
+    }
+
+
+def write_dump(directory: Path, rows: int, fmt: str) -> Path:
+    rng = random.Random(7)
+    path = directory / f"customers.{fmt}"
+    with open(path, "w", newline="") as fh:
+        if fmt == "csv":
+            writer = csv.DictWriter(fh, fieldnames=list(Customer.model_fields))
+            writer.writeheader()
+            for i in range(rows):
+                writer.writerow(make_customer(rng, i))
+        elif fmt == "ndjson":
+            for i in range(rows):
+                fh.write(json.dumps(make_customer(rng, i)) + "\n")
+        else:
+            fh.write("[")
+            for i in range(rows):
+                fh.write(("," if i else "") + json.dumps(make_customer(rng, i)))
+            fh.write("]")
+    return path
+
+
+def rss_mb() -> float:
+    with open("/proc/self/statm") as fh:
+        return int(fh.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--format", choices=["ndjson", "json", "csv"], default="ndjson")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = write_dump(Path(tmp), args.rows, args.format)
+        size_mb = path.stat().st_size / 1024 / 1024
+        loader = DataLoader({"customers": Customer}, data_dir=Path(tmp))
+
+        base = rss_mb()
+        start = time.perf_counter()
+        rows = loader.load("customers")
+        parsed = time.perf_counter()
+        customers = Collection("customers", rows, primary_key="customer_id", indexes=("status",), ordered=True)
+        built = time.perf_counter()
+        customers.filter(status="Active")
+        indexed = time.perf_counter()
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    print(f"{args.rows:,} customers from {args.format} ({size_mb:.0f} MB)")
+    print(f"  parse + compact     {parsed - start:8.2f} s")
+    print(f"  collection (sorted) {built - parsed:8.2f} s")
+    print(f"  first index build   {indexed - built:8.2f} s")
+    print(f"  cold start total    {indexed - start:8.2f} s")
+    print(f"  resident memory     {rss_mb() - base:8.0f} MB (peak process RSS {peak:.0f} MB)")
+
+
+if __name__ == "__main__":
+    main()
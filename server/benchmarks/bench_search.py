@@ -0,0 +1,73 @@
+"""
+Benchmark: search index build time and query latency over synthetic tickets.
+
+Usage (from the server directory):
+    python benchmarks/bench_search.py [--docs 200000] [--queries 200]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from search import build_index  # noqa: E402
+
+ISSUES = ["Service Outage", "Slow Speed", "Billing Dispute", "Installation Request", "Packet Loss", "Router Failure"]
+PHRASES = [
+    "complete fiber cut on main connection", "intermittent packet loss during peak hours",
+    "customer disputes overdue charges", "wifi router issue at customer premises",
+    "new branch office fiber installation", "ont firmware upgrade failed", "bgp session flapping on edge router",
+    "latency spikes on backbone link", "power outage at street cabinet", "voip calls dropping",
+    "dns resolution failures", "splice enclosure water damage", "speed below subscribed plan",
+]
+CITIES = ["New York", "Boston", "London", "Madrid", "Nairobi", "Lagos", "Accra", "Mumbai", "Singapore"]
+QUERIES = ["fiber cut", "packet loss", "router", "nairobi outage", "firmware", "fib", "bgp flap", "voip", "TKT-00001"]
+
+
+def make_tickets(n: int) -> list:
+    rng = random.Random(11)
+    return [
+        {
+            "ticket_id": f"TKT-{i:08d}",
+            "customer_name": f"Customer {rng.randrange(n // 10 + 1)}",
+            "issue_type": rng.choice(ISSUES),
+            "description": " - ".join(rng.sample(PHRASES, 2)) + f" near site {rng.randrange(5000)}",
+            "assigned_to": f"Technician {rng.randrange(200)}",
+            "affected_services": rng.sample(["Primary Internet", "VoIP", "IPTV", "Backup Link"], 2),
+            "location": rng.choice(CITIES),
+        }
+        for i in range(n)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--docs", type=int, default=200_000)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    rows = make_tickets(args.docs)
+    fields = ["ticket_id", "customer_name", "issue_type", "description", "assigned_to", "affected_services", "location"]
+    start = time.perf_counter()
+    index = build_index(rows, "ticket_id", fields)
+    print(f"{args.docs:,} tickets indexed in {time.perf_counter() - start:.2f} s\n")
+
+    print(f"{'query':<18}{'p50 ms':>10}{'p99 ms':>10}")
+    for query in QUERIES:
+        index.search(query)
+        samples = []
+        for _ in range(args.queries):
+            start = time.perf_counter()
+            index.search(query, limit=20)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(f"{query:<18}{statistics.median(samples):>10.2f}{p99:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Benchmark: indexed DataStore filters vs. the original list-comprehension scans.
+
+Usage (from the server directory):
+    python benchmarks/bench_store.py [--rows 200000] [--repeat 50]
+"""
+
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from store import Collection  # noqa: E402
+
+PRIORITIES = ["Critical", "High", "Medium", "Low"]
+STATUSES = ["Open", "In Progress", "Resolved", "Closed"]
+
+
+def make_tickets(n: int, customers: int) -> list:
+    rng = random.Random(42)
+    return [
+        {
+            "ticket_id": f"TKT-{i:08d}",
+            "customer_id": f"CUST-{rng.randrange(customers):07d}",
+            "priority": rng.choice(PRIORITIES),
+            "status": rng.choice(STATUSES),
+        }
+        for i in range(n)
+    ]
+
+
+def scan(rows, priority=None, status=None, customer_id=None):
+    result = rows
+    if priority:
+        result = [t for t in result if t["priority"] == priority]
+    if status:
+        result = [t for t in result if t["status"] == status]
+    if customer_id:
+        result = [t for t in result if t["customer_id"] == customer_id]
+    return result
+
+
+def timed(fn, repeat: int) -> float:
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    rows = make_tickets(args.rows, customers=max(args.rows // 10, 1))
+    start = time.perf_counter()
+    tickets = Collection("tickets", rows, primary_key="ticket_id", indexes=("priority", "status", "customer_id"))
+    load_ms = (time.perf_counter() - start) * 1000
+    # Indexes are built lazily on first use; force them so the build is what gets timed
+    start = time.perf_counter()
+    tickets.warm()
+    build_ms = (time.perf_counter() - start) * 1000
+    print(f"{args.rows:,} tickets, load {load_ms:.1f} ms, "
+          f"key map + {len(tickets.indexed_fields)} index build {build_ms:.1f} ms\n")
+
+    cases = [
+        ("priority=Critical", {"priority": "Critical"}),
+        ("priority=Critical&status=Open", {"priority": "Critical", "status": "Open"}),
+        ("customer_id=<one>", {"customer_id": rows[0]["customer_id"]}),
+    ]
+    print(f"{'filter':<32}{'scan ms':>10}{'index ms':>10}{'speedup':>10}")
+    for label, criteria in cases:
+        assert scan(rows, **criteria) == tickets.filter(**criteria)
+        scan_ms = timed(lambda: scan(rows, **criteria), args.repeat)
+        index_ms = timed(lambda: tickets.filter(**criteria), args.repeat)
+        print(f"{label:<32}{scan_ms:>10.3f}{index_ms:>10.3f}{scan_ms / max(index_ms, 1e-9):>9.0f}x")
+
+
+if __name__ == "__main__":
+    main()
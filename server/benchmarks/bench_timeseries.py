@@ -0,0 +1,108 @@
+"""
+Benchmark: time-series ingestion rate, memory under retention and range query latency.
+
+Feeds --series series (one per node) with a sample every --interval seconds
+for --days days of simulated time. Samples go in one at a time (append) or
+in per-series batches (extend). Prints samples per second, then the
+steady-state memory per series and p50/p99 of typical range queries.
+
+Usage (from the server directory):
+    python benchmarks/bench_timeseries.py [--series 200] [--days 40] [--interval 60] [--batch 1440]
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from timeseries import TimeSeriesStore  # noqa: E402
+
+DAY = 86400
+START = 1_760_000_000 - 1_760_000_000 % DAY
+
+
+def values(series: int, timestamps: np.ndarray) -> np.ndarray:
+    # A daily utilization curve with a per-series phase
+    return 50 + 40 * np.sin((timestamps + series * 977) * 2 * np.pi / DAY)
+
+
+def ingest_append(store: TimeSeriesStore, series: int, timestamps: np.ndarray) -> int:
+    count = 0
+    for s in range(series):
+        key = f"NODE-{s:06d}"
+        for t, v in zip(timestamps.tolist(), values(s, timestamps).tolist()):
+            store.append("utilization_percent", key, t, v)
+        count += len(timestamps)
+    return count
+
+
+def ingest_extend(store: TimeSeriesStore, series: int, timestamps: np.ndarray, batch: int) -> int:
+    count = 0
+    for offset in range(0, len(timestamps), batch):
+        chunk = timestamps[offset:offset + batch]
+        for s in range(series):
+            store.extend("utilization_percent", f"NODE-{s:06d}", chunk, values(s, chunk))
+            count += len(chunk)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--series", type=int, default=200)
+    parser.add_argument("--days", type=int, default=40, help="Simulated days of samples per series")
+    parser.add_argument("--interval", type=int, default=60, help="Seconds between samples")
+    parser.add_argument("--batch", type=int, default=1440, help="Samples per extend() call")
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    timestamps = np.arange(START, START + args.days * DAY, args.interval, dtype=np.float64)
+    print(f"{args.series} series x {len(timestamps):,} samples ({args.days} days every {args.interval}s)\n")
+
+    results = {}
+    for mode in ("append", "extend"):
+        store = TimeSeriesStore()
+        start = time.perf_counter()
+        if mode == "append":
+            count = ingest_append(store, args.series, timestamps)
+        else:
+            count = ingest_extend(store, args.series, timestamps, args.batch)
+        elapsed = time.perf_counter() - start
+        results[mode] = store
+        print(f"{mode:<8}{count:>14,} samples in {elapsed:6.2f} s = {count / elapsed:>12,.0f} samples/s")
+
+    store = results["extend"]
+    stats = store.stats()
+    series = store.get("utilization_percent", "NODE-000000")
+    live = len(series.raw) * 16 + sum(len(buffer) * 40 for buffer in series.rollups.values())
+    print(f"\nretained per series: {stats['raw_samples'] // stats['series']:,} raw samples, "
+          f"{live / 1024:.0f} KiB in use, {stats['bytes'] / stats['series'] / 1024:.0f} KiB allocated "
+          f"(all {len(timestamps):,} raw samples would be {len(timestamps) * 16 / 1024:.0f} KiB)")
+
+    end = float(timestamps[-1])
+    queries = [
+        ("last 1h raw", end - 3600, None),
+        ("last 24h step=5m", end - DAY, 300),
+        ("last 30d step=1d", end - 30 * DAY, DAY),
+        ("last 30d step=1h", end - 30 * DAY, 3600),
+        ("all step=1d", None, DAY),
+    ]
+    print(f"\n{'query':<22}{'points':>8}{'res s':>8}{'p50 ms':>10}{'p99 ms':>10}")
+    for name, since, step in queries:
+        samples = []
+        for i in range(args.queries):
+            key = f"NODE-{i % args.series:06d}"
+            start = time.perf_counter()
+            resolution, rows = store.query("utilization_percent", key, since, None, step)
+            samples.append((time.perf_counter() - start) * 1000)
+        samples.sort()
+        p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))]
+        print(f"{name:<22}{len(rows):>8}{resolution:>8}{statistics.median(samples):>10.3f}{p99:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,257 @@
+"""
+Load-test harness for the Modexia ISP API.
+
+Drives a fixed set of endpoint and filter scenarios, either in-process through
+an ASGI client or over HTTP against a local uvicorn. For each scenario it
+reports throughput and p50/p99 latency. Results are saved as JSON so runs can
+be compared between commits.
+
+Usage (from the server directory; requires httpx):
+    # in-process, against a generated dataset of 100k customers
+    python benchmarks/loadtest.py --customers 100000 --output results.json
+    # against a uvicorn started by the harness (optionally with --workers N)
+    python benchmarks/loadtest.py --customers 100000 --spawn --output results.json
+    # against the pre-fork server (serve.py) sharing one dataset between workers
+    python benchmarks/loadtest.py --customers 100000 --spawn --prefork --workers 4
+    # against an already running server
+    python benchmarks/loadtest.py --url http://localhost:8000
+    # show the change against an earlier run
+    python benchmarks/loadtest.py --customers 100000 --compare results.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import List, Optional
+
+import httpx
+
+SERVER_DIR = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(SERVER_DIR))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from synth import write_dataset  # noqa: E402
+
+
+class Scenario:
+    def __init__(self, name: str, path: str, params: Optional[dict] = None, body: Optional[dict] = None,
+                 headers: Optional[dict] = None):
+        self.name = name
+        self.path = path
+        self.params = params
+        self.body = body
+        self.headers = headers
+
+    async def send(self, client: httpx.AsyncClient) -> httpx.Response:
+        if self.body is not None:
+            return await client.post(self.path, json=self.body, headers=self.headers)
+        return await client.get(self.path, params=self.params, headers=self.headers)
+
+
+async def build_scenarios(client: httpx.AsyncClient) -> List[Scenario]:
+    sample = (await client.get("/customers", params={"limit": 50, "fields": "customer_id"})).json()
+    customer_ids = [row["customer_id"] for row in sample]
+    etag = (await client.get("/network-infrastructure")).headers.get("etag", '"none"')
+    return [
+        Scenario("customers", "/customers"),
+        Scenario("customers?status=Active", "/customers", {"status": "Active"}),
+        Scenario("customers?limit=100", "/customers", {"limit": 100}),
+        Scenario("customers?limit=100&fields", "/customers", {"limit": 100, "fields": "customer_id,status,monthly_recurring_revenue"}),
+        Scenario("customers?format=ndjson&limit=1000", "/customers", {"format": "ndjson", "limit": 1000}),
+        Scenario("tickets?priority=Critical", "/tickets", {"priority": "Critical"}),
+        Scenario("tickets?priority=Critical&status=Open", "/tickets", {"priority": "Critical", "status": "Open"}),
+        Scenario("invoices?status=Overdue", "/invoices", {"status": "Overdue"}),
+        Scenario("network-infrastructure", "/network-infrastructure"),
+        Scenario("network-infrastructure 304", "/network-infrastructure", headers={"if-none-match": etag}),
+        Scenario("equipment-inventory?limit=500", "/equipment-inventory", {"limit": 500}),
+        Scenario("sla-metrics", "/sla-metrics"),
+        Scenario("bandwidth-usage?limit=500", "/bandwidth-usage", {"limit": 500}),
+        Scenario("products", "/products"),
+        Scenario("customers/batch x10", "/customers/batch", body={"customer_ids": customer_ids[:10]}),
+        Scenario("search fiber cut", "/search", {"q": "fiber cut", "resource": "tickets"}),
+        Scenario("search prefix", "/search", {"q": "nokia g-01"}),
+        Scenario("analytics/mrr", "/analytics/mrr"),
+        Scenario("analytics/utilization", "/analytics/utilization"),
+        Scenario("analytics/sla", "/analytics/sla"),
+    ]
+
+
+async def run_scenario(client: httpx.AsyncClient, scenario: Scenario, requests: int, concurrency: int, warmup: int) -> dict:
+    for _ in range(warmup):
+        await scenario.send(client)
+
+    latencies: List[float] = []
+    errors = 0
+    size = 0
+    remaining = requests
+
+    async def worker():
+        nonlocal remaining, errors, size
+        while remaining > 0:
+            remaining -= 1
+            start = time.perf_counter()
+            response = await scenario.send(client)
+            latencies.append(time.perf_counter() - start)
+            if response.status_code >= 400:
+                errors += 1
+            size += len(response.content)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    latencies.sort()
+    return {
+        "scenario": scenario.name,
+        "requests": len(latencies),
+        "errors": errors,
+        "throughput_rps": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 3),
+        "p99_ms": round(latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))] * 1000, 3),
+        "mean_ms": round(sum(latencies) / len(latencies) * 1000, 3),
+        "mean_bytes": size // len(latencies),
+    }
+
+
+async def run(client: httpx.AsyncClient, args) -> List[dict]:
+    scenarios = await build_scenarios(client)
+    if args.only:
+        scenarios = [s for s in scenarios if any(word in s.name for word in args.only)]
+    results = []
+    for scenario in scenarios:
+        result = await run_scenario(client, scenario, args.requests, args.concurrency, args.warmup)
+        results.append(result)
+        print(f"{result['scenario']:<40}{result['throughput_rps']:>10.1f}{result['p50_ms']:>10.2f}"
+              f"{result['p99_ms']:>10.2f}{result['mean_bytes']:>12}{result['errors']:>8}")
+    return results
+
+
+def start_server(port: int, workers: int, env: dict, prefork: bool = False) -> subprocess.Popen:
+    if prefork:
+        command = [sys.executable, "serve.py", "--port", str(port), "--workers", str(workers),
+                   "--reload-interval", "0", "--log-level", "warning"]
+    else:
+        command = [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"]
+        if workers > 1:
+            command += ["--workers", str(workers)]
+    process = subprocess.Popen(command, cwd=SERVER_DIR, env=env)
+    deadline = time.monotonic() + 600
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/health", timeout=1).status_code == 200:
+                return process
+        except httpx.TransportError:
+            pass
+        if process.poll() is not None:
+            raise RuntimeError("server exited before becoming healthy")
+        time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError("server did not become healthy in time")
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=SERVER_DIR, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(previous_path: Path, results: List[dict]) -> None:
+    previous = {row["scenario"]: row for row in json.loads(previous_path.read_text())["results"]}
+    print(f"\nchange vs {previous_path} ({json.loads(previous_path.read_text())['meta'].get('commit')})")
+    print(f"{'scenario':<40}{'rps':>10}{'p99':>10}")
+    for row in results:
+        before = previous.get(row["scenario"])
+        if before is None:
+            continue
+        rps = (row["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0.0
+        p99 = (row["p99_ms"] / before["p99_ms"] - 1) * 100 if before["p99_ms"] else 0.0
+        print(f"{row['scenario']:<40}{rps:>+9.1f}%{p99:>+9.1f}%")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--customers", type=int, help="Generate a synthetic dataset of this many customers")
+    parser.add_argument("--data-dir", type=Path, help="Use (or generate into) this MODEXIA_DATA_DIR")
+    parser.add_argument("--url", help="Benchmark an already running server instead of the in-process app")
+    parser.add_argument("--spawn", action="store_true", help="Start a local uvicorn for the run")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers when using --spawn")
+    parser.add_argument("--prefork", action="store_true", help="Spawn serve.py (shared pre-warmed dataset) instead of uvicorn")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=200, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--only", nargs="*", help="Only run scenarios whose name contains one of these words")
+    parser.add_argument("--output", type=Path, help="Write results as JSON")
+    parser.add_argument("--compare", type=Path, help="Earlier results JSON to compare against")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        data_dir = args.data_dir
+        if args.customers:
+            data_dir = data_dir or Path(tmp)
+            print(f"generating {args.customers:,} customers into {data_dir}")
+            write_dataset(data_dir, args.customers)
+        env = dict(os.environ, MODEXIA_RELOAD_INTERVAL="0")
+        if data_dir:
+            env["MODEXIA_DATA_DIR"] = str(data_dir)
+
+        print(f"\n{'scenario':<40}{'rps':>10}{'p50 ms':>10}{'p99 ms':>10}{'bytes':>12}{'errors':>8}")
+        process = None
+        if args.url or args.spawn:
+            mode = "http"
+            if args.spawn:
+                process = start_server(args.port, args.workers, env, args.prefork)
+            base_url = args.url or f"http://127.0.0.1:{args.port}"
+            limits = httpx.Limits(max_connections=args.concurrency)
+
+            async def over_http():
+                async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+                    return await run(client, args)
+
+            try:
+                results = asyncio.run(over_http())
+            finally:
+                if process is not None:
+                    process.terminate()
+                    process.wait()
+        else:
+            mode = "asgi"
+            os.environ.update(env)
+            import main as server
+
+            async def in_process():
+                transport = httpx.ASGITransport(app=server.app)
+                async with httpx.AsyncClient(transport=transport, base_url="http://modexia.test", timeout=60) as client:
+                    return await run(client, args)
+
+            results = asyncio.run(in_process())
+
+    meta = {
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "mode": mode,
+        "workers": args.workers if args.spawn else None,
+        "prefork": args.prefork if args.spawn else None,
+        "customers": args.customers,
+        "requests": args.requests,
+        "concurrency": args.concurrency,
+        "python": platform.python_version(),
+        "cpus": os.cpu_count(),
+    }
+    if args.output:
+        args.output.write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+        print(f"\nresults written to {args.output}")
+    if args.compare:
+        compare(args.compare, results)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+"""
+Synthetic data generator for load testing.
+
+Writes referentially consistent NDJSON dumps, one file per collection, that the
+server picks up through MODEXIA_DATA_DIR:
+
+- customers.ndjson           N customers
+- tickets.ndjson             ~2 per customer, customer_id/customer_name match the customer
+- invoices.ndjson            ~3 per customer, client_name matches Customer.account_name
+- sla_metrics.ndjson         one per customer per reporting period, service_plan matches the plan
+- bandwidth_usage.ndjson     one per customer, subscribed bandwidth matches the plan
+- network_infrastructure.ndjson   one node per ~1000 customers
+- equipment.ndjson           one CPE per customer plus a few per node, located at a node or customer site
+
+Every row is a pure function of its index and the seed, so the same arguments
+always produce the same files, and rows can be written as a stream without
+holding the dataset in memory.
+
+Usage (from the server directory):
+    python benchmarks/synth.py --customers 100000 --out /tmp/modexia-data
+    MODEXIA_DATA_DIR=/tmp/modexia-data python main.py
+"""
+
+import argparse
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Iterator, Sequence
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    orjson = None
+
+# (sku, bandwidth mbps, monthly cost, committed uptime, committed latency, customer type)
+PLANS = [
+    ("MDX-HOME-50", 50, 40, 95.0, 40, "Residential"),
+    ("MDX-BIZ-100", 100, 150, 98.0, 30, "SME"),
+    ("MDX-ENT-1G", 1000, 1200, 99.9, 20, "Enterprise"),
+    ("MDX-DARK", 10000, 5000, 99.99, 10, "Enterprise"),
+]
+CUSTOMER_STATUSES = ["Active", "Active", "Active", "Active", "Suspended", "Churned", "Trial"]
+SUPPORT_TIERS = {"Residential": "Basic", "SME": "Standard", "Enterprise": "Premium"}
+CITIES = ["New York, NY", "Boston, MA", "London, UK", "Madrid, ES", "Nairobi, KE", "Lagos, NG", "Accra, GH", "Mumbai, IN", "Singapore, SG"]
+NAME_PREFIXES = ["Apex", "Nova", "Global", "Blue", "Summit", "Kilimanjaro", "Harbor", "Metro", "Savanna", "Pioneer", "Atlas", "Orion"]
+NAME_SUFFIXES = ["Logistics", "Bank", "Health", "Retail", "Tech", "Foods", "Construct", "Media", "Energy", "Labs", "Hotels", "Schools"]
+STAFF = ["David Kimani", "Sarah Jenkins", "Priya Patel", "Kwame Mensah", "Elena Rodriguez", "System Admin"]
+ISSUES = [
+    ("Service Outage", "Complete fiber cut on main connection - no connectivity", ["Primary Internet", "VoIP"]),
+    ("Slow Speed", "Customer reports speeds below subscribed plan", ["Internet Speed"]),
+    ("Billing Dispute", "Customer disputes overdue charges - claims payment was made", ["Account Status"]),
+    ("Installation Request", "New branch office fiber installation", ["New Service"]),
+    ("Packet Loss", "Intermittent packet loss during peak hours", ["Primary Internet"]),
+    ("Hardware Fault", "ONT power supply failure at customer premises", ["Primary Internet", "IPTV"]),
+]
+TICKET_PRIORITIES = ["Critical", "High", "Medium", "Medium", "Low", "Low"]
+TICKET_STATUSES = ["Open", "In Progress", "Resolved", "Closed"]
+INVOICE_STATUSES = ["Paid", "Paid", "Paid", "Pending", "Overdue", "Failed"]
+NODE_TYPES = ["Point of Presence", "Core Router", "Fiber Route", "Street Cabinet"]
+NODE_STATUSES = ["Operational"] * 8 + ["Degraded", "Maintenance"]
+CPE_MODELS = [("Nokia", "G-010G-Q"), ("Huawei", "HG8245H"), ("ZTE", "F660")]
+NODE_EQUIPMENT = [("Core Router", "Cisco", "ASR 9000"), ("Distribution Switch", "Juniper", "EX4300-48T"), ("Edge Router", "MikroTik", "CCR1072-1G-8S+")]
+PERIODS = ["2025-08", "2025-09", "2025-10"]
+
+
+def _mix(i: int, salt: int) -> int:
+    """Cheap deterministic hash of (index, salt) used instead of a shared RNG"""
+    x = (i * 0x9E3779B1 + salt * 0x85EBCA77) & 0xFFFFFFFF
+    x ^= x >> 15
+    x = (x * 0x2C1B3C6D) & 0xFFFFFFFF
+    x ^= x >> 12
+    return x
+
+
+def _pick(options: Sequence, i: int, salt: int):
+    return options[_mix(i, salt) % len(options)]
+
+
+def _fraction(i: int, salt: int) -> float:
+    return _mix(i, salt) / 0xFFFFFFFF
+
+
+def _date(i: int, salt: int, start_year: int = 2022, years: int = 3) -> str:
+    h = _mix(i, salt)
+    return f"{start_year + h % years}-{(h >> 4) % 12 + 1:02d}-{(h >> 8) % 28 + 1:02d}"
+
+
+class Synth:
+    """Row generators for every collection of a dataset with the given number of customers"""
+
+    def __init__(self, customers: int, seed: int = 0):
+        self.customers = customers
+        self.seed = seed
+        self.nodes = max(customers // 1000, 4)
+
+    def _salt(self, n: int) -> int:
+        return self.seed * 1000 + n
+
+    def customer_id(self, i: int) -> str:
+        return f"CUST-{i:08d}"
+
+    def account_name(self, i: int) -> str:
+        return f"{_pick(NAME_PREFIXES, i, self._salt(1))} {_pick(NAME_SUFFIXES, i, self._salt(2))} {i}"
+
+    def plan(self, i: int) -> tuple:
+        return _pick(PLANS, i, self._salt(3))
+
+    def node_id(self, n: int) -> str:
+        return f"NODE-{n:06d}"
+
+    def customer(self, i: int) -> dict:
+        sku, _, cost, _, _, customer_type = self.plan(i)
+        start = _date(i, self._salt(4))
+        return {
+            "customer_id": self.customer_id(i),
+            "account_name": self.account_name(i),
+            "customer_type": customer_type,
+            "subscription_plan": sku,
+            "monthly_recurring_revenue": cost,
+            "contract_start_date": start,
+            "contract_end_date": f"{int(start[:4]) + 3}{start[4:]}",
+            "status": _pick(CUSTOMER_STATUSES, i, self._salt(5)),
+            "billing_cycle": "Quarterly" if customer_type == "Enterprise" else "Monthly",
+            "payment_method": _pick(["Wire Transfer", "Credit Card", "Direct Debit"], i, self._salt(6)),
+            "primary_contact": f"Contact {i}",
+            "contact_email": f"contact{i}@customer{i}.example.com",
+            "contact_phone": f"+1-555-{i % 10000:04d}",
+            "service_address": f"{i % 9000 + 1} Main Street, {_pick(CITIES, i, self._salt(7))}",
+            "installation_date": start,
+            "bandwidth_usage_percent": round(_fraction(i, self._salt(8)) * 100, 1),
+            "support_tier": SUPPORT_TIERS[customer_type],
+        }
+
+    def tickets(self) -> Iterator[dict]:
+        for t in range(self.customers * 2):
+            i = _mix(t, self._salt(10)) % self.customers
+            issue_type, description, services = _pick(ISSUES, t, self._salt(11))
+            status = _pick(TICKET_STATUSES, t, self._salt(12))
+            yield {
+                "ticket_id": f"TKT-{t:09d}",
+                "customer_id": self.customer_id(i),
+                "customer_name": self.account_name(i),
+                "issue_type": issue_type,
+                "priority": _pick(TICKET_PRIORITIES, t, self._salt(13)),
+                "status": status,
+                "created_date": _date(t, self._salt(14), 2025, 1) + "T09:00:00Z",
+                "assigned_to": _pick(STAFF, t, self._salt(15)),
+                "description": description,
+                "estimated_resolution": _date(t, self._salt(16), 2025, 1) + "T17:00:00Z",
+                "sla_breach": status in ("Open", "In Progress") and _fraction(t, self._salt(17)) < 0.1,
+                "affected_services": services,
+                "location": f"{i % 9000 + 1} Main Street, {_pick(CITIES, i, self._salt(7))}",
+            }
+
+    def invoices(self) -> Iterator[dict]:
+        for v in range(self.customers * 3):
+            i = v // 3
+            sku, _, cost, _, _, _ = self.plan(i)
+            status = _pick(INVOICE_STATUSES, v, self._salt(20))
+            yield {
+                "invoice_id": f"INV-{v:09d}",
+                "client_name": self.account_name(i),
+                "service_type": sku,
+                "amount_usd": cost * (3 if v % 3 == 0 else 1),
+                "due_date": _date(v, self._salt(21), 2025, 1),
+                "status": status,
+                "risk_level": "High" if status in ("Overdue", "Failed") else _pick(["Low", "Medium"], v, self._salt(22)),
+                "account_manager": _pick(STAFF, v, self._salt(23)),
+            }
+
+    def sla_metrics(self) -> Iterator[dict]:
+        for p, period in enumerate(PERIODS):
+            for i in range(self.customers):
+                sku, _, _, uptime, latency, _ = self.plan(i)
+                actual = min(100.0, uptime + (_fraction(i, self._salt(30) + p * 100) - 0.15) * 2)
+                downtime = round((100 - actual) / 100 * 30 * 24 * 60, 1)
+                met = actual >= uptime
+                yield {
+                    "customer_id": self.customer_id(i),
+                    "customer_name": self.account_name(i),
+                    "service_plan": sku,
+                    "reporting_period": period,
+                    "committed_uptime_percent": uptime,
+                    "actual_uptime_percent": round(actual, 3),
+                    "total_downtime_minutes": downtime,
+                    "sla_met": met,
+                    "avg_latency_ms": round(latency * (0.3 + _fraction(i, self._salt(31) + p * 100) * 0.9), 1),
+                    "committed_latency_ms": latency,
+                    "packet_loss_percent": round(_fraction(i, self._salt(32)) * 0.2, 3),
+                    "committed_packet_loss_percent": 0.1,
+                    "incident_count": _mix(i, self._salt(33)) % 4,
+                    "mean_time_to_repair_minutes": _mix(i, self._salt(34)) % 360,
+                    "credits_issued_usd": 0 if met else round(downtime / 10, 2),
+                }
+
+    def bandwidth_usage(self) -> Iterator[dict]:
+        for i in range(self.customers):
+            _, mbps, _, _, _, _ = self.plan(i)
+            utilization = _fraction(i, self._salt(40))
+            peak = round(mbps * utilization, 1)
+            yield {
+                "customer_id": self.customer_id(i),
+                "customer_name": self.account_name(i),
+                "measurement_date": "2025-11-22",
+                "subscribed_bandwidth_mbps": mbps,
+                "peak_usage_mbps": peak,
+                "average_usage_mbps": round(peak * 0.65, 1),
+                "off_peak_usage_mbps": round(peak * 0.3, 1),
+                "total_data_transferred_gb": round(peak * 0.65 * 86400 / 8 / 1024, 1),
+                "utilization_percent": round(utilization * 100, 1),
+                "burst_incidents": _mix(i, self._salt(41)) % 6,
+                "throttling_events": _mix(i, self._salt(42)) % 2,
+            }
+
+    def network_infrastructure(self) -> Iterator[dict]:
+        for n in range(self.nodes):
+            status = _pick(NODE_STATUSES, n, self._salt(50))
+            yield {
+                "node_id": self.node_id(n),
+                "node_type": _pick(NODE_TYPES, n, self._salt(51)),
+                "location": f"{_pick(CITIES, n, self._salt(52))} Site {n}",
+                "address": f"{n + 1} Network Way",
+                "status": status,
+                "capacity_gbps": _pick([10, 40, 100, 200], n, self._salt(53)),
+                "current_utilization_percent": round(_fraction(n, self._salt(54)) * (100 if status == "Degraded" else 85), 1),
+                "equipment_count": 3,
+                "uptime_percent": 98.5 if status == "Degraded" else 99.95,
+                "last_maintenance": _date(n, self._salt(55), 2025, 1),
+                "next_maintenance": _date(n, self._salt(56), 2026, 1),
+                "power_source": "Dual Feed + UPS",
+                "cooling_status": "Normal",
+            }
+
+    def equipment(self) -> Iterator[dict]:
+        for n in range(self.nodes):
+            for k, (equipment_type, manufacturer, model) in enumerate(NODE_EQUIPMENT):
+                e = n * len(NODE_EQUIPMENT) + k
+                yield self._equipment(f"EQ-NODE-{e:08d}", equipment_type, manufacturer, model, e, self.node_id(n), "Network Operations")
+        for i in range(self.customers):
+            manufacturer, model = _pick(CPE_MODELS, i, self._salt(60))
+            yield self._equipment(
+                f"EQ-CPE-{i:08d}", "ONT (Customer Premises)", manufacturer, model, i,
+                f"{self.customer_id(i)} Site", self.account_name(i),
+            )
+
+    def _equipment(self, equipment_id, equipment_type, manufacturer, model, i, location, assigned_to) -> dict:
+        purchased = _date(i, self._salt(61))
+        return {
+            "equipment_id": equipment_id,
+            "equipment_type": equipment_type,
+            "manufacturer": manufacturer,
+            "model": model,
+            "serial_number": f"{manufacturer[:3].upper()}{_mix(i, self._salt(62)):010d}",
+            "purchase_date": purchased,
+            "warranty_expiry": f"{int(purchased[:4]) + 3}{purchased[4:]}",
+            "status": "Deployed",
+            "location": location,
+            "assigned_to": assigned_to,
+            "cost_usd": 45000 if equipment_type == "Core Router" else 85,
+            "firmware_version": f"{_mix(i, self._salt(63)) % 8}.{_mix(i, self._salt(64)) % 10}",
+            "last_updated": _date(i, self._salt(65), 2025, 1),
+        }
+
+    def collections(self) -> dict:
+        return {
+            "customers": lambda: (self.customer(i) for i in range(self.customers)),
+            "tickets": self.tickets,
+            "invoices": self.invoices,
+            "sla_metrics": self.sla_metrics,
+            "bandwidth_usage": self.bandwidth_usage,
+            "network_infrastructure": self.network_infrastructure,
+            "equipment": self.equipment,
+        }
+
+
+def _encoder() -> Callable[[dict], bytes]:
+    if orjson is not None:
+        return lambda row: orjson.dumps(row) + b"\n"
+    return lambda row: json.dumps(row, separators=(",", ":")).encode() + b"\n"
+
+
+def write_dataset(out: Path, customers: int, seed: int = 0, only: Sequence[str] = ()) -> dict:
+    """Write every (or only the named) collection to out/<name>.ndjson; returns row counts"""
+    out.mkdir(parents=True, exist_ok=True)
+    encode = _encoder()
+    counts = {}
+    for name, rows in Synth(customers, seed).collections().items():
+        if only and name not in only:
+            continue
+        tmp = out / f".{name}.ndjson.tmp"
+        count = 0
+        with open(tmp, "wb", buffering=1024 * 1024) as fh:
+            for row in rows():
+                fh.write(encode(row))
+                count += 1
+        # Atomic rename so a running server never hot-reloads a half-written file
+        os.replace(tmp, out / f"{name}.ndjson")
+        counts[name] = count
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--customers", type=int, default=10_000, help="Number of customers (10k to 10M)")
+    parser.add_argument("--out", type=Path, required=True, help="Output directory (use as MODEXIA_DATA_DIR)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--only", nargs="*", default=(), help="Only write these collections")
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    counts = write_dataset(args.out, args.customers, args.seed, args.only)
+    for name, count in counts.items():
+        print(f"{name:<24}{count:>12,}")
+    print(f"written to {args.out} in {time.perf_counter() - start:.1f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,253 @@
+"""
+Pre-serialized response cache for the Modexia ISP API.
+
+List responses are validated against their Pydantic model and encoded to JSON
+bytes once per dataset version, then served as-is until the collection they
+were built from is reloaded. Large collections can instead be streamed as
+NDJSON, encoding one chunk of rows at a time.
+
+Each cached body carries a strong ETag (a hash of its bytes) and keeps its
+gzip/brotli encodings next to the raw bytes, so conditional requests and
+compression cost nothing after the first request for a dataset version.
+"""
+
+import gzip
+import hashlib
+import json
+from collections import OrderedDict
+from functools import lru_cache
+from typing import Any, Callable, Dict, Hashable, Iterable, Iterator, List, Optional, Sequence, Tuple, Type
+
+from pydantic import BaseModel, TypeAdapter
+from starlette.datastructures import Headers
+from starlette.responses import Response
+from starlette.types import Receive, Scope, Send
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    orjson = None
+
+from metrics import timed
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional, gzip is always available
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+# Suffix appended to the body digest in the ETag of each compressed representation
+ETAG_SUFFIXES = {"br": "br", "gzip": "gz"}
+
+
+def dumps(payload: Any) -> bytes:
+    """Encode a plain Python payload (e.g. an aggregate result) to compact JSON bytes"""
+    if orjson is not None:
+        return orjson.dumps(payload)
+    return json.dumps(payload, separators=(",", ":")).encode()
+
+
+@lru_cache(maxsize=None)
+def _list_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(List[model])
+
+
+@lru_cache(maxsize=None)
+def _row_adapter(model: Type[BaseModel]) -> TypeAdapter:
+    return TypeAdapter(model)
+
+
+def _projection(fields: Optional[Sequence[str]]) -> Optional[set]:
+    return set(fields) if fields else None
+
+
+def render(model: Type[BaseModel], rows: List[dict], fields: Optional[Sequence[str]] = None) -> bytes:
+    """Validate rows against model and encode the result (optionally projected to fields) to JSON bytes"""
+    adapter = _list_adapter(model)
+    include = _projection(fields)
+    with timed("validate"):
+        items = adapter.validate_python(rows)
+    with timed("encode"):
+        return adapter.dump_json(items, include={"__all__": include} if include else None)
+
+
+def stream_ndjson(
+    model: Type[BaseModel],
+    rows: Iterable[dict],
+    fields: Optional[Sequence[str]] = None,
+    chunk_size: int = 500,
+) -> Iterator[bytes]:
+    """Yield rows as newline-delimited JSON, validating and encoding chunk_size rows at a time"""
+    adapter = _row_adapter(model)
+    include = _projection(fields)
+    chunk: List[bytes] = []
+    for row in rows:
+        with timed("validate"):
+            item = adapter.validate_python(row)
+        with timed("encode"):
+            chunk.append(adapter.dump_json(item, include=include))
+        if len(chunk) >= chunk_size:
+            yield b"\n".join(chunk) + b"\n"
+            chunk = []
+    if chunk:
+        yield b"\n".join(chunk) + b"\n"
+
+
+def cache_key(endpoint: str, **params: Any) -> Tuple[Hashable, ...]:
+    """Build a cache key from an endpoint and its query params, ignoring unset ones"""
+    return (endpoint,) + tuple(sorted((name, value) for name, value in params.items() if value is not None))
+
+
+class CachedBody:
+    """Encoded response body with its ETag and lazily built compressed variants"""
+
+    def __init__(self, body: bytes, rows: Optional[int] = None):
+        self.body = body
+        self.rows = rows
+        self.digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+        self.etag = '"' + self.digest + '"'
+        self._encoded: Dict[str, bytes] = {}
+
+    def etag_for(self, encoding: Optional[str]) -> str:
+        """Strong ETag of one representation: each content-coding gets its own"""
+        if encoding is None:
+            return self.etag
+        return f'"{self.digest}-{ETAG_SUFFIXES[encoding]}"'
+
+    def encoded(self, encoding: str) -> bytes:
+        """The body compressed with encoding ("br" or "gzip"), compressed on first use"""
+        body = self._encoded.get(encoding)
+        if body is None:
+            with timed("compress"):
+                if encoding == "br":
+                    body = brotli.compress(self.body, quality=9)
+                else:
+                    body = gzip.compress(self.body, compresslevel=9, mtime=0)
+            self._encoded[encoding] = body
+        return body
+
+
+def _quality(params: str) -> float:
+    """q-value of one Accept-Encoding item (1 when absent, 0 when malformed)"""
+    for param in params.split(";"):
+        name, _, value = param.strip().partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return min(max(float(value), 0.0), 1.0)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def _negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """
+    The supported coding with the highest q-value, or None for identity.
+
+    Codings not listed take the weight of ``*``. Brotli wins a tie with gzip,
+    and identity wins when the client weights it above every coding.
+    """
+    weights: Dict[str, float] = {}
+    for item in accept_encoding.split(","):
+        coding, _, params = item.strip().partition(";")
+        coding = coding.strip().lower()
+        if coding:
+            weights[coding] = _quality(params)
+    supported = ("br", "gzip") if brotli is not None else ("gzip",)
+    best, best_weight = None, 0.0
+    for coding in supported:
+        weight = weights.get(coding, weights.get("*", 0.0))
+        if weight > best_weight:
+            best, best_weight = coding, weight
+    if best is not None and weights.get("identity", 0.0) > best_weight:
+        return None
+    return best
+
+
+def _etag_matches(if_none_match: str, digest: str) -> bool:
+    """Whether If-None-Match names any representation (identity or compressed) of the body"""
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        tag = (tag[2:] if tag.startswith("W/") else tag).strip('"')
+        base, _, suffix = tag.rpartition("-")
+        if tag == digest or (base == digest and suffix in ETAG_SUFFIXES.values()):
+            return True
+    return False
+
+
+class CachedResponse(Response):
+    """
+    Serve a CachedBody, honouring If-None-Match and Accept-Encoding.
+
+    A matching If-None-Match gets a 304 with no body; otherwise the cached
+    compressed variant is sent when the client accepts it. Each variant
+    carries its own strong ETag, and a validator of any variant counts as a
+    match because they all encode the same body.
+    """
+
+    media_type = "application/json"
+
+    def __init__(self, entry: CachedBody, headers: Optional[Dict[str, str]] = None):
+        super().__init__(content=entry.body, headers=headers)
+        self.entry = entry
+        self.headers["etag"] = entry.etag
+        self.headers["vary"] = "Accept-Encoding"
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        request_headers = Headers(scope=scope)
+        encoding = None
+        if len(self.entry.body) >= MIN_COMPRESS_BYTES:
+            encoding = _negotiate_encoding(request_headers.get("accept-encoding", ""))
+        self.headers["etag"] = self.entry.etag_for(encoding)
+
+        if_none_match = request_headers.get("if-none-match")
+        if if_none_match and _etag_matches(if_none_match, self.entry.digest):
+            headers = {key: value for key, value in self.headers.items() if not key.startswith("content-")}
+            not_modified = Response(status_code=304, headers=headers)
+            await not_modified(scope, receive, send)
+            return
+
+        if encoding:
+            self.body = self.entry.encoded(encoding)
+            self.headers["content-encoding"] = encoding
+            self.headers["content-length"] = str(len(self.body))
+        await super().__call__(scope, receive, send)
+
+
+class ResponseCache:
+    """LRU map of (endpoint, params) -> encoded response, tagged with the dataset version"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[Tuple[Hashable, ...], Tuple[Hashable, Any]]" = OrderedDict()
+
+    def get_or_build(self, key: Tuple[Hashable, ...], version: Hashable, build: Callable[[], Any]) -> Any:
+        """Return the cached response for key, rebuilding it if missing or built from an older version"""
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry[1]
+
+        self.misses += 1
+        value = build()
+        self._entries[key] = (version, value)
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return value
+
+    def invalidate(self, endpoint: Optional[str] = None) -> None:
+        """Drop every entry, or only those belonging to one endpoint"""
+        if endpoint is None:
+            self._entries.clear()
+            return
+        for key in [key for key in self._entries if key[0] == endpoint]:
+            del self._entries[key]
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "hits": self.hits, "misses": self.misses}
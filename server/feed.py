@@ -0,0 +1,200 @@
+"""
+Change feed for the Modexia ISP API.
+
+When a collection is reloaded, its old and new rows are diffed by primary key
+into insert, update and remove events. The events go into one version log, and
+every event gets the next sequence number. The log is bounded and the oldest
+events fall off the front.
+
+Each event is serialized once, as a ready-to-send Server-Sent Events frame
+whose id is ``<epoch>-<seq>``. The epoch is drawn once per feed, i.e. per
+server boot, so an id from an earlier run is recognized rather than mistaken
+for a position in this one. All subscribers wait on one shared asyncio
+event that is swapped out on every publish. A publish therefore wakes every
+stream once, and each stream only filters the new log entries and writes the
+shared frames. Subscribers at the same position with the same filters share
+one filtered batch, so fan-out cost grows with the number of distinct filters
+rather than the number of streams. A client that reconnects with
+``Last-Event-ID`` resumes right after the last event it saw, as long as that
+event is still in the log and was issued by this run. Closing the feed ends
+every stream, so clients reconnect elsewhere instead of waiting on a server
+that is shutting down.
+"""
+
+import asyncio
+import secrets
+from collections import deque
+from typing import Any, AsyncIterator, Deque, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from cache import dumps
+
+INSERT, UPDATE, REMOVE = "insert", "update", "remove"
+MAX_LOG_ENTRIES = 100_000
+# Seconds between keep-alive comments on an idle stream
+HEARTBEAT_INTERVAL = 15.0
+
+
+class Change:
+    """One inserted, updated or removed record, with its pre-rendered SSE frame"""
+
+    __slots__ = ("seq", "resource", "op", "key", "record", "previous", "frame")
+
+    def __init__(self, epoch: str, seq: int, resource: str, op: str, key: Any, record: Optional[dict], previous: Optional[dict]):
+        self.seq = seq
+        self.resource = resource
+        self.op = op
+        self.key = key
+        self.record = record
+        self.previous = previous
+        data = dumps({"seq": seq, "resource": resource, "op": op, "key": key, "record": record if record is not None else previous})
+        self.frame = b"id: %s-%d\nevent: %s\ndata: %s\n\n" % (epoch.encode(), seq, op.encode(), data)
+
+    def matches(self, resources: Optional[Sequence[str]], criteria: Dict[str, Any]) -> bool:
+        """
+        Whether a subscriber with these filters should see the change.
+
+        An update matches if the record matched before or after it, so a
+        subscriber to status=Degraded also learns when a node recovers.
+        """
+        if resources and self.resource not in resources:
+            return False
+        if not criteria:
+            return True
+        for row in (self.record, self.previous):
+            if row is not None and all(row.get(field) == value for field, value in criteria.items()):
+                return True
+        return False
+
+
+def diff(old_rows: Iterable[dict], new_rows: Iterable[dict], key_field: str) -> List[Tuple[str, Any, Optional[dict], Optional[dict]]]:
+    """(op, key, record, previous) for every record inserted, changed or removed between two loads"""
+    old = {row[key_field]: row for row in old_rows}
+    changes = []
+    for row in new_rows:
+        key = row[key_field]
+        before = old.pop(key, None)
+        if before is None:
+            changes.append((INSERT, key, row, None))
+        elif before != row:
+            changes.append((UPDATE, key, row, before))
+    changes.extend((REMOVE, key, None, row) for key, row in old.items())
+    return changes
+
+
+class ChangeFeed:
+    """Bounded log of changes across resources, broadcast to any number of subscribers"""
+
+    def __init__(self, max_entries: int = MAX_LOG_ENTRIES, epoch: Optional[str] = None):
+        # Distinguishes this run's event ids from those of earlier runs, whose sequence numbers also started at 0
+        self.epoch = epoch or secrets.token_hex(4)
+        self.seq = 0
+        self.subscribers = 0
+        self.closed = False
+        self._log: Deque[Change] = deque(maxlen=max_entries)
+        self._published = asyncio.Event()
+        # (position, resources, criteria) -> frames, shared by subscribers with the same filters
+        self._rendered: Dict[Tuple[int, Tuple[str, ...], Tuple[Tuple[str, Any], ...]], bytes] = {}
+
+    def publish(self, resource: str, changes: Iterable[Tuple[str, Any, Optional[dict], Optional[dict]]]) -> int:
+        """Append changes to the log and wake every subscriber; returns how many were added"""
+        count = 0
+        for op, key, record, previous in changes:
+            self.seq += 1
+            self._log.append(Change(self.epoch, self.seq, resource, op, key, record, previous))
+            count += 1
+        if count:
+            self._rendered = {}
+            self._wake()
+        return count
+
+    def close(self) -> None:
+        """End every open stream (and any opened later), e.g. when the server is shutting down"""
+        self.closed = True
+        self._wake()
+
+    def _wake(self) -> None:
+        published, self._published = self._published, asyncio.Event()
+        published.set()
+
+    def event_id(self, seq: int) -> bytes:
+        return b"%s-%d" % (self.epoch.encode(), seq)
+
+    def position(self, event_id: str) -> Optional[int]:
+        """Sequence number of an event id from this run, or None for an id from another run or a malformed one"""
+        epoch, _, seq = event_id.strip().rpartition("-")
+        if epoch != self.epoch or not seq.isdigit():
+            return None
+        return int(seq)
+
+    def since(self, seq: int) -> Optional[List[Change]]:
+        """Changes after seq, or None when some have left the log or seq was never issued"""
+        if seq > self.seq:
+            return None
+        if not self._log or seq >= self.seq:
+            return []
+        first = self._log[0].seq
+        if seq < first - 1:
+            return None
+        return [self._log[i] for i in range(seq - first + 1, len(self._log))]
+
+    async def stream(
+        self,
+        since: Optional[str] = None,
+        resources: Optional[Sequence[str]] = None,
+        criteria: Optional[Dict[str, Any]] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        SSE frames for changes after the event id since (default: from now) that pass the filters.
+
+        Starts with a ``ready`` event carrying the current epoch and sequence
+        number. If since is older than the log reaches or from another server
+        run, a ``reset`` event tells the client to refetch before applying
+        changes. Ends when the feed is closed.
+        """
+        if self.closed:
+            return
+        criteria = criteria or {}
+        position = self.seq if since is None else self.position(since)
+        ready = dumps({"epoch": self.epoch, "seq": self.seq})
+        self.subscribers += 1
+        try:
+            if position is None:
+                # No id: the client keeps its stale one until the reset event replaces it
+                yield b"event: ready\ndata: %s\n\n" % ready
+            else:
+                yield b"id: %s\nevent: ready\ndata: %s\n\n" % (self.event_id(position), ready)
+            async for frames in self._follow(position, resources, criteria):
+                yield frames
+        finally:
+            self.subscribers -= 1
+
+    def _frames(self, position: int, changes: List[Change], resources: Tuple[str, ...], criteria: Dict[str, Any]) -> bytes:
+        key = (position, resources, tuple(sorted(criteria.items())))
+        frames = self._rendered.get(key)
+        if frames is None:
+            frames = self._rendered[key] = b"".join(change.frame for change in changes if change.matches(resources, criteria))
+        return frames
+
+    async def _follow(self, position: Optional[int], resources: Optional[Sequence[str]], criteria: Dict[str, Any]) -> AsyncIterator[bytes]:
+        resources = tuple(sorted(resources or ()))
+        while not self.closed:
+            changes = None if position is None else self.since(position)
+            if changes is None:
+                position = self.seq
+                yield b"id: %s\nevent: reset\ndata: %s\n\n" % (self.event_id(position), dumps({"epoch": self.epoch, "seq": position}))
+                continue
+            if changes:
+                frames = self._frames(position, changes, resources, criteria)
+                position = changes[-1].seq
+                if frames:
+                    yield frames
+                continue
+            published = self._published
+            try:
+                async with asyncio.timeout(HEARTBEAT_INTERVAL):
+                    await published.wait()
+            except TimeoutError:
+                yield b": keep-alive\n\n"
+
+    def stats(self) -> Dict[str, int]:
+        return {"seq": self.seq, "entries": len(self._log), "subscribers": self.subscribers}
@@ -0,0 +1,280 @@
+"""
+Data loading for the Modexia ISP API.
+
+Collections are read at startup from ``resources/``:
+
+- ``modexia_master_data.json`` - the OpenAPI spec, whose response examples hold
+  the sample rows for every endpoint
+- ``Modexia ai Brain - Sheet1.csv`` - the HR sheet, merged into ``employees``
+  (it adds ``line_manager`` and ``asset_id``)
+
+A data directory (``MODEXIA_DATA_DIR``) may hold full dumps named after a
+collection (``customers.json``, ``tickets.ndjson``, ``equipment.csv``,
+``invoices.parquet``, ...), which replace the sample rows for that collection.
+Large JSON/NDJSON dumps are read through a memory map. String values are
+interned so that repeated categorical values (status, plan, dates) share one
+object across rows.
+
+Rows are validated against the collection's model before they are served
+(``DataLoader.validate()``), so a dump with a bad row fails the load instead
+of every request for that collection.
+
+``DataLoader.changed()`` compares source file mtimes against the last load so
+that only the affected collections need to be reloaded.
+"""
+
+import csv
+import json
+import mmap
+import os
+import sys
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Type, get_args, get_origin
+
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - orjson is an optional speed-up
+    orjson = None
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:  # pragma: no cover - parquet dumps need pyarrow
+    pq = None
+
+SPEC_FILE = "modexia_master_data.json"
+EMPLOYEE_SHEET = "Modexia ai Brain - Sheet1.csv"
+
+# Endpoint path in the spec -> collection name in the store
+SPEC_PATHS = {
+    "/customers": "customers",
+    "/employees": "employees",
+    "/invoices": "invoices",
+    "/tickets": "tickets",
+    "/network-infrastructure": "network_infrastructure",
+    "/equipment-inventory": "equipment",
+    "/sla-metrics": "sla_metrics",
+    "/vendor-contracts": "vendor_contracts",
+    "/bandwidth-usage": "bandwidth_usage",
+    "/products": "products",
+}
+
+# HR sheet column -> Employee field
+EMPLOYEE_SHEET_COLUMNS = {
+    "EmployeeID": "employee_id",
+    "FullName": "full_name",
+    "Role": "role",
+    "Department": "department",
+    "LineManager": "line_manager",
+    "Email": "email",
+    "Status": "status",
+    "CurrentShift": "current_shift",
+    "AssetID": "asset_id",
+    "LeaveBalance": "leave_balance_days",
+    "Location": "location",
+}
+EMPLOYEE_SHEET_KEY = "employee_id"
+
+DUMP_EXTENSIONS = (".parquet", ".ndjson", ".jsonl", ".json", ".csv")
+MMAP_THRESHOLD_BYTES = 16 * 1024 * 1024
+INTERN_MAX_LENGTH = 64
+
+
+def default_resources_dir() -> Path:
+    """resources/ next to the server (Docker image) or one level up (source checkout)"""
+    configured = os.getenv("MODEXIA_RESOURCES_DIR")
+    if configured:
+        return Path(configured)
+    here = Path(__file__).resolve().parent
+    for candidate in (here / "resources", here.parent / "resources"):
+        if candidate.is_dir():
+            return candidate
+    return here / "resources"
+
+
+def _loads(data) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(bytes(data))
+
+
+def _compact(row: Dict[str, Any]) -> Dict[str, Any]:
+    return {
+        sys.intern(key): sys.intern(value) if type(value) is str and len(value) <= INTERN_MAX_LENGTH else value
+        for key, value in row.items()
+    }
+
+
+def _converter(annotation: Any) -> Callable[[str], Any]:
+    """Build a str -> value converter for a model field, used for CSV cells"""
+    if get_origin(annotation) is not None and type(None) in get_args(annotation):
+        inner = next(arg for arg in get_args(annotation) if arg is not type(None))
+        convert = _converter(inner)
+        return lambda value: convert(value) if value != "" else None
+    if get_origin(annotation) in (list, List):
+        return lambda value: [item.strip() for item in value.split(";") if item.strip()]
+    if annotation is bool:
+        return lambda value: value.strip().lower() in ("true", "1", "yes")
+    if annotation is int:
+        return lambda value: int(float(value))
+    if annotation is float:
+        return float
+    return str
+
+
+def _read_json(path: Path) -> Iterator[dict]:
+    size = path.stat().st_size
+    if size == 0:
+        return
+    ndjson = path.suffix in (".ndjson", ".jsonl")
+    with open(path, "rb") as fh:
+        if size < MMAP_THRESHOLD_BYTES:
+            data = fh.read()
+            if ndjson:
+                yield from (_loads(line) for line in data.splitlines() if line.strip())
+            else:
+                yield from _loads(data)
+            return
+        with mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            if ndjson:
+                for line in iter(mm.readline, b""):
+                    if line.strip():
+                        yield _loads(line)
+            else:
+                view = memoryview(mm)
+                try:
+                    yield from _loads(view)
+                finally:
+                    view.release()
+
+
+def _read_csv(path: Path, columns: Optional[Dict[str, str]] = None) -> Iterator[dict]:
+    with open(path, newline="", encoding="utf-8") as fh:
+        reader = csv.DictReader(fh)
+        for record in reader:
+            if columns:
+                yield {columns.get(key, key): value for key, value in record.items()}
+            else:
+                yield record
+
+
+def _read_parquet(path: Path) -> Iterator[dict]:
+    if pq is None:
+        raise RuntimeError(f"Reading {path.name} requires pyarrow (pip install pyarrow)")
+    table = pq.read_table(path, memory_map=True)
+    for batch in table.to_batches():
+        yield from batch.to_pylist()
+
+
+class DataLoader:
+    """Reads every collection from resources/ and optional dumps, tracking source mtimes"""
+
+    def __init__(
+        self,
+        schemas: Dict[str, Type[BaseModel]],
+        resources_dir: Optional[Path] = None,
+        data_dir: Optional[Path] = None,
+    ):
+        self.schemas = schemas
+        self.resources_dir = Path(resources_dir) if resources_dir else default_resources_dir()
+        configured = os.getenv("MODEXIA_DATA_DIR")
+        self.data_dir = Path(data_dir) if data_dir else (Path(configured) if configured else None)
+        self._mtimes: Dict[str, Dict[Path, float]] = {}
+        self._spec: Optional[Tuple[float, dict]] = None
+        self._converters = {
+            name: {field: _converter(info.annotation) for field, info in model.model_fields.items()}
+            for name, model in schemas.items()
+        }
+        self._adapters = {name: TypeAdapter(List[model]) for name, model in schemas.items()}
+
+    def _dump_file(self, name: str) -> Optional[Path]:
+        if self.data_dir is None:
+            return None
+        for extension in DUMP_EXTENSIONS:
+            path = self.data_dir / f"{name}{extension}"
+            if path.is_file():
+                return path
+        return None
+
+    def sources(self, name: str) -> List[Path]:
+        """Files a collection is currently built from"""
+        dump = self._dump_file(name)
+        if dump is not None:
+            return [dump]
+        files = [self.resources_dir / SPEC_FILE]
+        if name == "employees":
+            files.append(self.resources_dir / EMPLOYEE_SHEET)
+        return [path for path in files if path.is_file()]
+
+    def _spec_examples(self, path: Path) -> Dict[str, List[dict]]:
+        mtime = path.stat().st_mtime
+        if self._spec is None or self._spec[0] != mtime:
+            spec = _loads(path.read_bytes())
+            examples = {}
+            for endpoint, name in SPEC_PATHS.items():
+                operation = spec.get("paths", {}).get(endpoint, {}).get("get", {})
+                content = operation.get("responses", {}).get("200", {}).get("content", {})
+                examples[name] = content.get("application/json", {}).get("example", [])
+            self._spec = (mtime, examples)
+        return self._spec[1]
+
+    def _coerce(self, name: str, row: Dict[str, str]) -> Dict[str, Any]:
+        converters = self._converters.get(name, {})
+        return {key: converters[key](value) if key in converters else value for key, value in row.items()}
+
+    def _read(self, name: str, path: Path) -> Iterator[dict]:
+        if path.name == SPEC_FILE:
+            return iter(self._spec_examples(path).get(name, []))
+        if path.name == EMPLOYEE_SHEET:
+            return (self._coerce(name, row) for row in _read_csv(path, EMPLOYEE_SHEET_COLUMNS))
+        if path.suffix == ".csv":
+            return (self._coerce(name, row) for row in _read_csv(path))
+        if path.suffix == ".parquet":
+            return _read_parquet(path)
+        return _read_json(path)
+
+    def load(self, name: str) -> List[dict]:
+        """Read one collection from its sources; HR sheet rows are merged over the spec's employees"""
+        files = self.sources(name)
+        self._mtimes[name] = {path: path.stat().st_mtime for path in files}
+        if len(files) == 1:
+            return [_compact(row) for row in self._read(name, files[0])]
+
+        merged: Dict[Any, dict] = {}
+        for path in files:
+            for row in self._read(name, path):
+                merged.setdefault(row[EMPLOYEE_SHEET_KEY], {}).update(row)
+        return [_compact(row) for row in merged.values()]
+
+    def validate(self, name: str, rows: List[dict]) -> None:
+        """Raise ValueError, naming the first bad row and field, unless every row fits the collection's model"""
+        try:
+            self._adapters[name].validate_python(rows)
+        except ValidationError as error:
+            first = error.errors()[0]
+            row, field = first["loc"][0], ".".join(str(part) for part in first["loc"][1:])
+            raise ValueError(
+                f"{name}: {error.error_count()} invalid value(s); first in row {row}, field '{field}': {first['msg']}"
+            ) from None
+
+    def load_all(self) -> Dict[str, List[dict]]:
+        """Every collection, validated; a bad source fails here rather than on each request"""
+        data = {}
+        for name in self.schemas:
+            data[name] = self.load(name)
+            self.validate(name, data[name])
+        return data
+
+    def changed(self) -> List[str]:
+        """Collections whose source files were modified, added or removed since they were loaded"""
+        stale = []
+        for name in self.schemas:
+            loaded = self._mtimes.get(name)
+            try:
+                current = {path: path.stat().st_mtime for path in self.sources(name)}
+            except FileNotFoundError:
+                continue
+            if loaded != current:
+                stale.append(name)
+        return stale
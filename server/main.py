@@ -3,16 +3,43 @@ Modexia Inc. ISP Enterprise API
 FastAPI server implementing all endpoints from the OpenAPI specification
 """
 
+import asyncio
+import logging
 import os
-from fastapi import FastAPI, Query
+import time
+from contextlib import asynccontextmanager
+from fastapi import Depends, FastAPI, Header, HTTPException, Query, Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware
-from typing import Optional, List
-from pydantic import BaseModel
-from datetime import datetime
+from typing import Any, Dict, List, Optional
+from pydantic import BaseModel, Field
+from datetime import datetime, timezone
+
+import analytics
+from cache import CachedBody, CachedResponse, ResponseCache, cache_key, dumps, render, stream_ndjson
+from feed import ChangeFeed, diff
+from loader import DataLoader
+from metrics import MetricsMiddleware, MetricsRegistry, SamplingProfiler, record_rows, timed
+from search import SearchEngine, build_index
+from store import DataStore
+from timeseries import TimeSeriesStore, parse_duration, points, summarize
 
 # Get port from environment variable (IBM Cloud uses PORT env var)
 PORT = int(os.getenv("PORT", 8000))
 
+logger = logging.getLogger("modexia.api")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    watcher = asyncio.create_task(watch_data_files()) if RELOAD_INTERVAL > 0 else None
+    METRICS.start_sampling()
+    yield
+    if watcher:
+        watcher.cancel()
+    METRICS.sample()
+
 app = FastAPI(
     title="Modexia ISP Enterprise API",
     description="Core operational API for Modexia Inc. (ISP Division). Provides access to HR records, Billing Invoices, and Product Catalog for the AI Orchestrator.",
@@ -23,7 +50,8 @@ app = FastAPI(
     },
     docs_url="/docs",
     redoc_url="/redoc",
-    openapi_url="/openapi.json"
+    openapi_url="/openapi.json",
+    lifespan=lifespan
 )
 
 # CORS middleware
@@ -33,8 +61,21 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag"],
 )
 
+# Set by serve.py so pre-forked workers report totals for the whole server
+METRICS = MetricsRegistry(os.getenv("MODEXIA_METRICS_DIR"))
+PROFILER = SamplingProfiler()
+# The profiler routes stay disabled (404) unless explicitly enabled for this deployment
+PROFILER_ENABLED = os.getenv("MODEXIA_ENABLE_PROFILER", "").lower() in ("1", "true", "yes")
+app.add_middleware(MetricsMiddleware, registry=METRICS)
+
+@app.exception_handler(RequestValidationError)
+async def validation_error_handler(request: Request, exc: RequestValidationError) -> Response:
+    """The default 422 body, encoded so a rejected NaN or infinite input does not fail the error response itself"""
+    return Response(dumps({"detail": jsonable_encoder(exc.errors())}), status_code=422, media_type="application/json")
+
 # ============================================
 # DATA MODELS
 # ============================================
@@ -68,6 +109,8 @@ class Employee(BaseModel):
     current_shift: str
     leave_balance_days: int
     location: str
+    line_manager: Optional[str] = None
+    asset_id: Optional[str] = None
 
 class Invoice(BaseModel):
     invoice_id: str
@@ -178,85 +221,342 @@ class Product(BaseModel):
     monthly_cost_usd: float
     sla_uptime: str
 
+class CustomerBatchRequest(BaseModel):
+    customer_ids: List[str]
+
+class CustomerOverview(BaseModel):
+    customer: Customer
+    tickets: List[Ticket]
+    sla_metrics: List[SLAMetric]
+    bandwidth_usage: List[BandwidthUsage]
+    invoices: List[Invoice]
+
+class CustomerBatchResponse(BaseModel):
+    customers: List[CustomerOverview]
+    not_found: List[str]
+
+class SearchHit(BaseModel):
+    resource: str
+    id: str
+    score: float
+    record: Dict[str, Any]
+
+class MRRGroup(BaseModel):
+    customer_type: Optional[str] = None
+    subscription_plan: Optional[str] = None
+    status: Optional[str] = None
+    support_tier: Optional[str] = None
+    billing_cycle: Optional[str] = None
+    customers: int
+    monthly_recurring_revenue: float
+
+class MetricDistribution(BaseModel):
+    metric: str
+    count: int
+    mean: Optional[float]
+    min: Optional[float]
+    max: Optional[float]
+    percentiles: Dict[str, float]
+
+class SLAPeriodSummary(BaseModel):
+    reporting_period: str
+    customers: int
+    sla_breaches: int
+    breach_rate: float
+    credits_issued_usd: float
+    total_downtime_minutes: float
+    avg_latency_ms: float
+
+class NodeSaturation(BaseModel):
+    node_id: str
+    node_type: str
+    status: str
+    capacity_gbps: float
+    current_utilization_percent: float
+    used_gbps: float
+    headroom_gbps: float
+    saturated: bool
+
 # ============================================
-# MOCK DATA
+# DATA STORE
 # ============================================
 
-CUSTOMERS = [
-    {"customer_id": "CUST-10001", "account_name": "Apex Logistics HQ", "customer_type": "Enterprise", "subscription_plan": "MDX-ENT-1G", "monthly_recurring_revenue": 1200, "contract_start_date": "2023-06-15", "contract_end_date": "2026-06-14", "status": "Active", "billing_cycle": "Monthly", "payment_method": "Wire Transfer", "primary_contact": "John Smith", "contact_email": "john.smith@apexlogistics.com", "contact_phone": "+1-555-0100", "service_address": "123 Industrial Blvd, New York, NY", "installation_date": "2023-06-20", "bandwidth_usage_percent": 78, "support_tier": "Premium"},
-    {"customer_id": "CUST-10045", "account_name": "TechNova Hub", "customer_type": "SME", "subscription_plan": "MDX-BIZ-100", "monthly_recurring_revenue": 150, "contract_start_date": "2024-03-10", "contract_end_date": "2025-03-09", "status": "Suspended", "billing_cycle": "Monthly", "payment_method": "Credit Card", "primary_contact": "Maria Chen", "contact_email": "maria@technovahub.io", "contact_phone": "+1-555-0245", "service_address": "456 Tech Park, San Francisco, CA", "installation_date": "2024-03-15", "bandwidth_usage_percent": 0, "support_tier": "Standard"},
-    {"customer_id": "CUST-10082", "account_name": "Global Bank Corp", "customer_type": "Enterprise", "subscription_plan": "MDX-DARK", "monthly_recurring_revenue": 5000, "contract_start_date": "2022-01-10", "contract_end_date": "2027-01-09", "status": "Active", "billing_cycle": "Quarterly", "payment_method": "Wire Transfer", "primary_contact": "Robert Lee", "contact_email": "r.lee@globalbank.com", "contact_phone": "+44-20-5550-1234", "service_address": "789 Financial District, London, UK", "installation_date": "2022-01-20", "bandwidth_usage_percent": 45, "support_tier": "Platinum"},
-    {"customer_id": "CUST-10091", "account_name": "HomeTech Solutions", "customer_type": "Residential", "subscription_plan": "MDX-HOME-50", "monthly_recurring_revenue": 40, "contract_start_date": "2024-11-01", "contract_end_date": "2025-10-31", "status": "Trial", "billing_cycle": "Monthly", "payment_method": "Direct Debit", "primary_contact": "Sarah Johnson", "contact_email": "sarah.j@email.com", "contact_phone": "+1-555-0789", "service_address": "12 Maple Street, Boston, MA", "installation_date": "2024-11-05", "bandwidth_usage_percent": 62, "support_tier": "Basic"}
-]
-
-EMPLOYEES = [
-    {"employee_id": "MDX-101", "full_name": "Alexander Thorne", "role": "CEO", "department": "Executive", "email": "alex.thorne@modexia.net", "status": "Active", "current_shift": "Day", "leave_balance_days": 30, "location": "New York"},
-    {"employee_id": "MDX-102", "full_name": "Amara Diallo", "role": "CTO", "department": "Network Operations", "email": "amara.diallo@modexia.net", "status": "Active", "current_shift": "Day", "leave_balance_days": 25, "location": "Nairobi"},
-    {"employee_id": "MDX-103", "full_name": "Sarah Jenkins", "role": "Head of NOC", "department": "Network Operations", "email": "sarah.j@modexia.net", "status": "Active", "current_shift": "Night-Rotation", "leave_balance_days": 18, "location": "London"},
-    {"employee_id": "MDX-104", "full_name": "David Kimani", "role": "Fiber Field Technician", "department": "Field Services", "email": "david.k@modexia.net", "status": "Probation", "current_shift": "Day", "leave_balance_days": 10, "location": "Nairobi"},
-    {"employee_id": "MDX-105", "full_name": "Elena Rodriguez", "role": "VP of Enterprise Sales", "department": "Sales", "email": "elena.r@modexia.net", "status": "Active", "current_shift": "Day", "leave_balance_days": 22, "location": "Madrid"},
-    {"employee_id": "MDX-106", "full_name": "Kwame Mensah", "role": "Corporate Account Manager", "department": "Sales", "email": "kwame.m@modexia.net", "status": "Active", "current_shift": "Day", "leave_balance_days": 15, "location": "Accra"},
-    {"employee_id": "MDX-107", "full_name": "Jessica Wu", "role": "HR Director", "department": "Human Resources", "email": "jessica.w@modexia.net", "status": "Active", "current_shift": "Day", "leave_balance_days": 20, "location": "Singapore"},
-    {"employee_id": "MDX-108", "full_name": "Samuel Abiodun", "role": "Field Safety Officer", "department": "Human Resources", "email": "sam.a@modexia.net", "status": "Onboarding", "current_shift": "Day", "leave_balance_days": 0, "location": "Lagos"},
-    {"employee_id": "MDX-109", "full_name": "System Admin", "role": "Core Network Architect", "department": "IT", "email": "sysadmin@modexia.net", "status": "Active", "current_shift": "On-Call", "leave_balance_days": 99, "location": "Remote"},
-    {"employee_id": "MDX-110", "full_name": "Priya Patel", "role": "Billing Manager", "department": "Finance", "email": "priya.p@modexia.net", "status": "Active", "current_shift": "Day", "leave_balance_days": 25, "location": "Mumbai"}
-]
-
-INVOICES = [
-    {"invoice_id": "INV-25-001", "client_name": "Apex Logistics HQ", "service_type": "Dedicated Fiber (1Gbps)", "amount_usd": 12000, "due_date": "2025-01-31", "status": "Paid", "risk_level": "Low", "account_manager": "Elena Rodriguez"},
-    {"invoice_id": "INV-25-045", "client_name": "TechNova Hub", "service_type": "SME Broadband (100Mbps)", "amount_usd": 450, "due_date": "2025-02-25", "status": "Overdue", "risk_level": "High", "account_manager": "Kwame Mensah"},
-    {"invoice_id": "INV-25-050", "client_name": "Global Bank Corp", "service_type": "Dark Fiber Lease", "amount_usd": 8500, "due_date": "2025-03-20", "status": "Pending", "risk_level": "Low", "account_manager": "Elena Rodriguez"},
-    {"invoice_id": "INV-25-052", "client_name": "AfriHealth NGO", "service_type": "Satellite Backup Link", "amount_usd": 1200, "due_date": "2025-03-22", "status": "Pending", "risk_level": "Medium", "account_manager": "Kwame Mensah"},
-    {"invoice_id": "INV-25-060", "client_name": "Retail Kings Ltd", "service_type": "Public IP Block (/29)", "amount_usd": 50, "due_date": "2025-02-28", "status": "Failed", "risk_level": "High", "account_manager": "System Admin"},
-    {"invoice_id": "INV-25-065", "client_name": "City Construct", "service_type": "Fiber Installation Fee", "amount_usd": 2500, "due_date": "2025-03-31", "status": "Pending", "risk_level": "Medium", "account_manager": "Kwame Mensah"}
-]
-
-TICKETS = [
-    {"ticket_id": "TKT-2025-001", "customer_id": "CUST-10001", "customer_name": "Apex Logistics HQ", "issue_type": "Service Outage", "priority": "Critical", "status": "In Progress", "created_date": "2025-11-20T08:30:00Z", "assigned_to": "David Kimani", "description": "Complete fiber cut on main connection - no connectivity", "estimated_resolution": "2025-11-23T18:00:00Z", "sla_breach": False, "affected_services": ["Primary Internet", "VoIP"], "location": "123 Industrial Blvd, New York, NY"},
-    {"ticket_id": "TKT-2025-002", "customer_id": "CUST-10045", "customer_name": "TechNova Hub", "issue_type": "Billing Dispute", "priority": "Medium", "status": "Open", "created_date": "2025-11-22T14:15:00Z", "assigned_to": "Priya Patel", "description": "Customer disputes overdue charges - claims payment was made", "estimated_resolution": "2025-11-25T17:00:00Z", "sla_breach": False, "affected_services": ["Account Status"], "location": "N/A"},
-    {"ticket_id": "TKT-2025-003", "customer_id": "CUST-10091", "customer_name": "HomeTech Solutions", "issue_type": "Slow Speed", "priority": "Low", "status": "Resolved", "created_date": "2025-11-18T10:00:00Z", "assigned_to": "Sarah Jenkins", "description": "Customer reports speeds below 50Mbps - testing showed WiFi router issue", "estimated_resolution": "2025-11-19T12:00:00Z", "sla_breach": False, "affected_services": ["Internet Speed"], "location": "12 Maple Street, Boston, MA"},
-    {"ticket_id": "TKT-2025-004", "customer_id": "CUST-10082", "customer_name": "Global Bank Corp", "issue_type": "Installation Request", "priority": "High", "status": "In Progress", "created_date": "2025-11-15T09:00:00Z", "assigned_to": "David Kimani", "description": "New branch office fiber installation - 1Gbps dedicated line", "estimated_resolution": "2025-11-30T17:00:00Z", "sla_breach": False, "affected_services": ["New Service"], "location": "42 Branch Ave, London, UK"}
-]
-
-NETWORK_INFRASTRUCTURE = [
-    {"node_id": "POP-NY-01", "node_type": "Point of Presence", "location": "New York Data Center", "address": "100 Tech Way, New York, NY", "status": "Operational", "capacity_gbps": 100, "current_utilization_percent": 67, "equipment_count": 12, "uptime_percent": 99.95, "last_maintenance": "2025-10-15", "next_maintenance": "2026-01-15", "power_source": "Dual Feed + Generator", "cooling_status": "Normal"},
-    {"node_id": "POP-LON-01", "node_type": "Point of Presence", "location": "London Data Center", "address": "50 Fiber Street, London, UK", "status": "Operational", "capacity_gbps": 80, "current_utilization_percent": 54, "equipment_count": 10, "uptime_percent": 99.98, "last_maintenance": "2025-09-20", "next_maintenance": "2025-12-20", "power_source": "Dual Feed + UPS", "cooling_status": "Normal"},
-    {"node_id": "CORE-NAI-01", "node_type": "Core Router", "location": "Nairobi Hub", "address": "25 Network Plaza, Nairobi, Kenya", "status": "Operational", "capacity_gbps": 200, "current_utilization_percent": 72, "equipment_count": 8, "uptime_percent": 99.92, "last_maintenance": "2025-11-01", "next_maintenance": "2026-02-01", "power_source": "Triple Feed + Battery", "cooling_status": "Normal"},
-    {"node_id": "FIBER-RT-105", "node_type": "Fiber Route", "location": "NY-BOS Backbone", "address": "Route 1 Corridor", "status": "Degraded", "capacity_gbps": 40, "current_utilization_percent": 88, "equipment_count": 4, "uptime_percent": 98.50, "last_maintenance": "2025-08-10", "next_maintenance": "2025-12-01", "power_source": "N/A", "cooling_status": "N/A"}
-]
-
-EQUIPMENT = [
-    {"equipment_id": "EQ-RTR-001", "equipment_type": "Core Router", "manufacturer": "Cisco", "model": "ASR 9000", "serial_number": "FCW2145G0XY", "purchase_date": "2022-03-15", "warranty_expiry": "2027-03-14", "status": "Deployed", "location": "POP-NY-01", "assigned_to": "Network Operations", "cost_usd": 45000, "firmware_version": "7.5.2", "last_updated": "2025-10-01"},
-    {"equipment_id": "EQ-SW-045", "equipment_type": "Distribution Switch", "manufacturer": "Juniper", "model": "EX4300-48T", "serial_number": "JN1234567890", "purchase_date": "2023-06-10", "warranty_expiry": "2026-06-09", "status": "Deployed", "location": "POP-LON-01", "assigned_to": "Network Operations", "cost_usd": 8500, "firmware_version": "18.4R2", "last_updated": "2025-09-15"},
-    {"equipment_id": "EQ-ONT-1024", "equipment_type": "ONT (Customer Premises)", "manufacturer": "Nokia", "model": "G-010G-Q", "serial_number": "NOK987654321", "purchase_date": "2024-03-01", "warranty_expiry": "2026-03-01", "status": "Deployed", "location": "CUST-10045 Site", "assigned_to": "TechNova Hub", "cost_usd": 85, "firmware_version": "3.1.0", "last_updated": "2024-03-15"},
-    {"equipment_id": "EQ-RTR-089", "equipment_type": "Edge Router", "manufacturer": "MikroTik", "model": "CCR1072-1G-8S+", "serial_number": "MTK445566778", "purchase_date": "2024-01-20", "warranty_expiry": "2025-01-19", "status": "Spare", "location": "Warehouse - Nairobi", "assigned_to": "Inventory", "cost_usd": 1200, "firmware_version": "7.11", "last_updated": "2024-01-25"}
-]
-
-SLA_METRICS = [
-    {"customer_id": "CUST-10001", "customer_name": "Apex Logistics HQ", "service_plan": "MDX-ENT-1G", "reporting_period": "2025-10", "committed_uptime_percent": 99.9, "actual_uptime_percent": 99.94, "total_downtime_minutes": 26, "sla_met": True, "avg_latency_ms": 12, "committed_latency_ms": 20, "packet_loss_percent": 0.01, "committed_packet_loss_percent": 0.1, "incident_count": 1, "mean_time_to_repair_minutes": 45, "credits_issued_usd": 0},
-    {"customer_id": "CUST-10045", "customer_name": "TechNova Hub", "service_plan": "MDX-BIZ-100", "reporting_period": "2025-10", "committed_uptime_percent": 98.0, "actual_uptime_percent": 96.5, "total_downtime_minutes": 1512, "sla_met": False, "avg_latency_ms": 28, "committed_latency_ms": 30, "packet_loss_percent": 0.15, "committed_packet_loss_percent": 0.5, "incident_count": 3, "mean_time_to_repair_minutes": 320, "credits_issued_usd": 75},
-    {"customer_id": "CUST-10082", "customer_name": "Global Bank Corp", "service_plan": "MDX-DARK", "reporting_period": "2025-10", "committed_uptime_percent": 99.99, "actual_uptime_percent": 99.99, "total_downtime_minutes": 4, "sla_met": True, "avg_latency_ms": 5, "committed_latency_ms": 10, "packet_loss_percent": 0.001, "committed_packet_loss_percent": 0.01, "incident_count": 0, "mean_time_to_repair_minutes": 0, "credits_issued_usd": 0}
-]
-
-VENDOR_CONTRACTS = [
-    {"contract_id": "VND-001", "vendor_name": "Level 3 Communications", "vendor_type": "Upstream Transit Provider", "service_description": "10Gbps IP Transit - New York", "contract_start_date": "2024-01-01", "contract_end_date": "2026-12-31", "monthly_cost_usd": 8000, "annual_cost_usd": 96000, "status": "Active", "payment_terms": "Net 30", "contact_person": "Tom Harrison", "contact_email": "tom.h@level3.com", "contact_phone": "+1-800-555-0199", "renewal_notice_days": 90},
-    {"contract_id": "VND-002", "vendor_name": "Cisco Systems", "vendor_type": "Equipment Vendor", "service_description": "SmartNet Total Care - ASR 9000 Series", "contract_start_date": "2023-03-15", "contract_end_date": "2026-03-14", "monthly_cost_usd": 1200, "annual_cost_usd": 14400, "status": "Active", "payment_terms": "Net 45", "contact_person": "Lisa Wong", "contact_email": "l.wong@cisco.com", "contact_phone": "+1-888-555-0234", "renewal_notice_days": 60},
-    {"contract_id": "VND-003", "vendor_name": "SEACOM", "vendor_type": "Submarine Cable Capacity", "service_description": "1Gbps Protected Capacity - African Segment", "contract_start_date": "2023-06-01", "contract_end_date": "2028-05-31", "monthly_cost_usd": 15000, "annual_cost_usd": 180000, "status": "Active", "payment_terms": "Net 30", "contact_person": "Ahmed Osman", "contact_email": "a.osman@seacom.com", "contact_phone": "+254-20-555-0567", "renewal_notice_days": 180},
-    {"contract_id": "VND-004", "vendor_name": "Crown Castle Fiber", "vendor_type": "Dark Fiber Lease", "service_description": "Dark Fiber Route - NY to Boston (285km)", "contract_start_date": "2022-08-01", "contract_end_date": "2027-07-31", "monthly_cost_usd": 12000, "annual_cost_usd": 144000, "status": "Active", "payment_terms": "Quarterly", "contact_person": "Mark Stevens", "contact_email": "m.stevens@crowncastle.com", "contact_phone": "+1-877-555-0888", "renewal_notice_days": 120}
-]
-
-BANDWIDTH_USAGE = [
-    {"customer_id": "CUST-10001", "customer_name": "Apex Logistics HQ", "measurement_date": "2025-11-22", "subscribed_bandwidth_mbps": 1000, "peak_usage_mbps": 780, "average_usage_mbps": 542, "off_peak_usage_mbps": 320, "total_data_transferred_gb": 1248, "utilization_percent": 78, "burst_incidents": 2, "throttling_events": 0},
-    {"customer_id": "CUST-10082", "customer_name": "Global Bank Corp", "measurement_date": "2025-11-22", "subscribed_bandwidth_mbps": 1000, "peak_usage_mbps": 450, "average_usage_mbps": 315, "off_peak_usage_mbps": 180, "total_data_transferred_gb": 725, "utilization_percent": 45, "burst_incidents": 0, "throttling_events": 0},
-    {"customer_id": "CUST-10091", "customer_name": "HomeTech Solutions", "measurement_date": "2025-11-22", "subscribed_bandwidth_mbps": 50, "peak_usage_mbps": 48, "average_usage_mbps": 31, "off_peak_usage_mbps": 12, "total_data_transferred_gb": 71, "utilization_percent": 96, "burst_incidents": 5, "throttling_events": 0}
-]
-
-PRODUCTS = [
-    {"sku": "MDX-HOME-50", "product_name": "Modexia Home Fiber", "category": "Residential", "bandwidth": "50 Mbps", "monthly_cost_usd": 40, "sla_uptime": "95%"},
-    {"sku": "MDX-BIZ-100", "product_name": "SME Business Connect", "category": "Business", "bandwidth": "100 Mbps", "monthly_cost_usd": 150, "sla_uptime": "98%"},
-    {"sku": "MDX-ENT-1G", "product_name": "Enterprise Dedicated", "category": "Enterprise", "bandwidth": "1 Gbps", "monthly_cost_usd": 1200, "sla_uptime": "99.9%"},
-    {"sku": "MDX-DARK", "product_name": "Dark Fiber Mile", "category": "Enterprise", "bandwidth": "Custom", "monthly_cost_usd": 5000, "sla_uptime": "99.99%"}
-]
+LOADER = DataLoader({
+    "customers": Customer,
+    "employees": Employee,
+    "invoices": Invoice,
+    "tickets": Ticket,
+    "network_infrastructure": NetworkNode,
+    "equipment": Equipment,
+    "sla_metrics": SLAMetric,
+    "vendor_contracts": VendorContract,
+    "bandwidth_usage": BandwidthUsage,
+    "products": Product,
+})
+DATA = LOADER.load_all()
+
+STORE = DataStore()
+STORE.register("customers", DATA["customers"], primary_key="customer_id", indexes=("status", "customer_type", "support_tier"), ordered=True)
+STORE.register("employees", DATA["employees"], primary_key="employee_id")
+STORE.register("invoices", DATA["invoices"], primary_key="invoice_id", indexes=("status", "client_name"))
+STORE.register("tickets", DATA["tickets"], primary_key="ticket_id", indexes=("priority", "status", "customer_id"), ordered=True)
+STORE.register("network_infrastructure", DATA["network_infrastructure"], primary_key="node_id", indexes=("status",))
+STORE.register("equipment", DATA["equipment"], primary_key="equipment_id", indexes=("status",), ordered=True)
+STORE.register("sla_metrics", DATA["sla_metrics"], indexes=("customer_id",))
+STORE.register("vendor_contracts", DATA["vendor_contracts"], primary_key="contract_id")
+STORE.register("bandwidth_usage", DATA["bandwidth_usage"], primary_key="customer_id", indexes=("customer_id",), ordered=True)
+STORE.register("products", DATA["products"], primary_key="sku")
+del DATA
+
+class TimeSeriesPoint(BaseModel):
+    timestamp: datetime
+    count: int
+    avg: float
+    min: float
+    max: float
+
+class TimeSeriesSummary(BaseModel):
+    count: int
+    avg: Optional[float] = None
+    min: Optional[float] = None
+    max: Optional[float] = None
+
+class TimeSeriesResponse(BaseModel):
+    id: str
+    metric: str
+    resolution_seconds: int
+    summary: TimeSeriesSummary
+    points: List[TimeSeriesPoint]
+
+class TimeSeriesSample(BaseModel):
+    timestamp: datetime
+    value: float = Field(allow_inf_nan=False)
+
+class TimeSeriesIngest(BaseModel):
+    samples: List[TimeSeriesSample]
+
+# Collection -> (key field, text fields) indexed for /search
+SEARCH_FIELDS = {
+    "tickets": ("ticket_id", ["ticket_id", "customer_name", "issue_type", "description", "assigned_to", "affected_services", "location"]),
+    "vendor_contracts": ("contract_id", ["contract_id", "vendor_name", "vendor_type", "service_description", "contact_person"]),
+    "equipment": ("equipment_id", ["equipment_id", "equipment_type", "manufacturer", "model", "serial_number", "location", "assigned_to"]),
+    "employees": ("employee_id", ["employee_id", "full_name", "role", "department", "location", "email"]),
+    "customers": ("customer_id", ["customer_id", "account_name", "primary_contact", "contact_email", "service_address", "subscription_plan"]),
+}
+
+SEARCH = SearchEngine()
+for name, (key_field, text_fields) in SEARCH_FIELDS.items():
+    SEARCH.replace(name, build_index(STORE[name].rows, key_field, text_fields))
+
+# Per-node utilization and per-customer bandwidth history. Node series get a
+# sample of current_utilization_percent at startup and on every reload.
+# Under serve.py, workers replace it with a RemoteTimeSeriesStore served by the master.
+TIMESERIES = TimeSeriesStore()
+NODE_UTILIZATION = "utilization_percent"
+BANDWIDTH_USAGE = "usage_mbps"
+
+def record_node_utilization(rows: List[dict], timestamp: float) -> None:
+    for row in rows:
+        TIMESERIES.append(NODE_UTILIZATION, row["node_id"], timestamp, row["current_utilization_percent"])
+
+record_node_utilization(STORE["network_infrastructure"].rows, time.time())
+
+# Seconds between checks for modified data files (0 disables hot reload)
+RELOAD_INTERVAL = float(os.getenv("MODEXIA_RELOAD_INTERVAL", 2))
+
+# Inserts, updates and removals found on reload, streamed from /changes
+FEED = ChangeFeed()
+
+def prepare_reload(name: str):
+    """
+    Read and validate a collection from its sources, build its search index
+    and diff it against the loaded rows; safe to run off the event loop.
+    Raises ValueError when a row does not fit the collection's model.
+    """
+    rows = LOADER.load(name)
+    LOADER.validate(name, rows)
+    search_index = None
+    if name in SEARCH_FIELDS:
+        key_field, text_fields = SEARCH_FIELDS[name]
+        search_index = build_index(rows, key_field, text_fields)
+    collection = STORE[name]
+    changes = diff(collection.rows, rows, collection.primary_key) if collection.primary_key else []
+    return rows, search_index, changes
+
+def apply_reload(name: str, rows: List[dict], search_index, changes) -> None:
+    """Swap freshly loaded rows and their search index into the store and publish the changes"""
+    STORE[name].load(rows)
+    if search_index is not None:
+        SEARCH.replace(name, search_index)
+    if name == "network_infrastructure":
+        record_node_utilization(rows, time.time())
+    FEED.publish(name, changes)
+
+async def watch_data_files():
+    """Reload collections whose source files changed, parsing off the event loop"""
+    while True:
+        await asyncio.sleep(RELOAD_INTERVAL)
+        for name in LOADER.changed():
+            try:
+                rows, search_index, changes = await asyncio.to_thread(prepare_reload, name)
+            except Exception:
+                logger.exception("Failed to reload %s; keeping the previous data", name)
+                continue
+            apply_reload(name, rows, search_index, changes)
+            logger.info("Reloaded %s (%d rows, %d changes)", name, len(rows), len(changes))
+
+RESPONSE_CACHE = ResponseCache()
+# Pages requested with a cursor, cached separately in a small LRU
+PAGE_CACHE = ResponseCache(max_entries=64)
+
+def cached_list(endpoint: str, model, collection: str, **filters) -> Response:
+    """Serve a filtered collection as pre-serialized JSON, validated once per dataset version"""
+    source = STORE[collection]
+
+    def build():
+        with timed("filter"):
+            rows = source.filter(**filters)
+        return CachedBody(render(model, rows), rows=len(rows))
+
+    entry = RESPONSE_CACHE.get_or_build(cache_key(endpoint, **filters), source.version, build)
+    record_rows(entry.rows)
+    return CachedResponse(entry)
+
+MAX_PAGE_SIZE = 1000
+
+class PageParams:
+    """Keyset pagination, field projection and output format for large collections"""
+
+    def __init__(
+        self,
+        limit: Optional[int] = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Maximum number of rows to return"),
+        cursor: Optional[str] = Query(None, description="Primary key of the last row of the previous page (from X-Next-Cursor)"),
+        fields: Optional[str] = Query(None, description="Comma-separated list of fields to return"),
+        format: str = Query("json", enum=["json", "ndjson"], description="json array, or newline-delimited JSON stream"),
+    ):
+        self.limit = limit
+        self.cursor = cursor
+        self.fields = tuple(sorted({f.strip() for f in fields.split(",") if f.strip()})) if fields else None
+        self.format = format
+
+def paged_list(endpoint: str, model, collection: str, page: PageParams, **filters) -> Response:
+    """Serve a key-ordered collection page by page, optionally projected or streamed as NDJSON"""
+    if page.fields:
+        unknown = [f for f in page.fields if f not in model.model_fields]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    source = STORE[collection]
+
+    if page.format == "ndjson":
+        with timed("filter"):
+            rows, next_cursor = source.page(source.filter(**filters), page.cursor, page.limit)
+        record_rows(len(rows))
+        headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+        return StreamingResponse(stream_ndjson(model, rows, page.fields), media_type="application/x-ndjson", headers=headers)
+
+    def build():
+        with timed("filter"):
+            rows, next_cursor = source.page(source.filter(**filters), page.cursor, page.limit)
+        return CachedBody(render(model, rows, page.fields), rows=len(rows)), next_cursor
+
+    # Cursor pages are mostly single-use; keep them from evicting the hot bodies
+    cache = RESPONSE_CACHE if page.cursor is None else PAGE_CACHE
+    entry, next_cursor = cache.get_or_build(
+        cache_key(endpoint, limit=page.limit, cursor=page.cursor, fields=page.fields, **filters),
+        source.version,
+        build,
+    )
+    record_rows(entry.rows)
+    headers = {"X-Next-Cursor": next_cursor} if next_cursor else None
+    return CachedResponse(entry, headers=headers)
+
+MAX_BATCH_SIZE = 500
+
+def customer_overview(customer: dict) -> dict:
+    """Join a customer with its related records through the foreign-key indexes"""
+    customer_id = customer["customer_id"]
+    return {
+        "customer": customer,
+        "tickets": STORE["tickets"].filter(customer_id=customer_id),
+        "sla_metrics": STORE["sla_metrics"].filter(customer_id=customer_id),
+        "bandwidth_usage": STORE["bandwidth_usage"].filter(customer_id=customer_id),
+        "invoices": STORE["invoices"].filter(client_name=customer["account_name"]),
+    }
+
+MAX_SERIES_POINTS = 10000
+MAX_INGEST_SAMPLES = 10000
+# Seconds a posted sample may lie in the future; retention counts back from the newest sample
+MAX_CLOCK_SKEW = 300
+
+def _epoch(value: Optional[datetime]) -> Optional[float]:
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+def series_response(metric: str, key: str, start: Optional[datetime], end: Optional[datetime], step: Optional[str]) -> dict:
+    """Range query on one series, downsampled to step, as a TimeSeriesResponse"""
+    try:
+        step_seconds = parse_duration(step) if step is not None else None
+    except ValueError as error:
+        raise HTTPException(status_code=400, detail=str(error))
+    if start is not None and end is not None and start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    with timed("filter"):
+        resolution, rows = TIMESERIES.query(metric, key, _epoch(start), _epoch(end), step_seconds)
+    if len(rows) > MAX_SERIES_POINTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Range has {len(rows)} points at {resolution}s resolution; narrow it or use a larger step",
+        )
+    record_rows(len(rows))
+    return {
+        "id": key,
+        "metric": metric,
+        "resolution_seconds": resolution,
+        "summary": summarize(rows),
+        "points": [
+            {"timestamp": datetime.fromtimestamp(bucket, timezone.utc), "count": count, "avg": avg, "min": low, "max": high}
+            for bucket, count, avg, low, high in points(rows)
+        ],
+    }
+
+def ingest_samples(metric: str, key: str, request: TimeSeriesIngest) -> dict:
+    if len(request.samples) > MAX_INGEST_SAMPLES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_INGEST_SAMPLES} samples per request")
+    timestamps = [_epoch(sample.timestamp) for sample in request.samples]
+    if timestamps and max(timestamps) > time.time() + MAX_CLOCK_SKEW:
+        raise HTTPException(status_code=400, detail=f"Sample timestamps may be at most {MAX_CLOCK_SKEW}s in the future")
+    TIMESERIES.extend(metric, key, timestamps, [sample.value for sample in request.samples])
+    return {"accepted": len(request.samples)}
+
+COLUMNS = analytics.ColumnCache()
+
+MRR_GROUP_COLUMNS = ["customer_type", "subscription_plan", "status", "support_tier", "billing_cycle"]
+
+# Metric name -> (collection, column) for /analytics/utilization
+DISTRIBUTION_METRICS = {
+    "utilization_percent": ("bandwidth_usage", "utilization_percent"),
+    "peak_usage_mbps": ("bandwidth_usage", "peak_usage_mbps"),
+    "avg_latency_ms": ("sla_metrics", "avg_latency_ms"),
+    "packet_loss_percent": ("sla_metrics", "packet_loss_percent"),
+    "node_utilization_percent": ("network_infrastructure", "current_utilization_percent"),
+}
+
+def cached_aggregate(endpoint: str, collections: List[str], compute, **params) -> Response:
+    """Serve an aggregate computed once per version of the collections it reads"""
+    version = tuple(STORE[name].version for name in collections)
+
+    def build():
+        with timed("aggregate"):
+            result = compute()
+        with timed("encode"):
+            return CachedBody(dumps(result), rows=len(result))
+
+    entry = RESPONSE_CACHE.get_or_build(cache_key(endpoint, **params), version, build)
+    record_rows(entry.rows)
+    return CachedResponse(entry)
 
 # ============================================
 # API ENDPOINTS
@@ -273,66 +573,280 @@ async def root():
     }
 
 @app.get("/customers", response_model=List[Customer], tags=["Customer Management"])
-async def get_customers(status: Optional[str] = Query(None, enum=["Active", "Suspended", "Churned", "Trial"])):
+async def get_customers(
+    status: Optional[str] = Query(None, enum=["Active", "Suspended", "Churned", "Trial"]),
+    page: PageParams = Depends()
+):
     """List all customers with optional status filter"""
-    if status:
-        return [c for c in CUSTOMERS if c["status"] == status]
-    return CUSTOMERS
+    return paged_list("/customers", Customer, "customers", page, status=status)
+
+@app.post("/customers/batch", response_model=CustomerBatchResponse, tags=["Customer Management"])
+async def get_customer_batch(request: CustomerBatchRequest):
+    """Customers with their tickets, SLA metrics, bandwidth usage and invoices, joined server-side"""
+    customer_ids = list(dict.fromkeys(request.customer_ids))
+    if len(customer_ids) > MAX_BATCH_SIZE:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BATCH_SIZE} customer_ids per request")
+    customers = STORE["customers"]
+    found, not_found = [], []
+    for customer_id in customer_ids:
+        customer = customers.get(customer_id)
+        if customer is None:
+            not_found.append(customer_id)
+        else:
+            found.append(customer_overview(customer))
+    record_rows(len(found))
+    return {"customers": found, "not_found": not_found}
 
 @app.get("/employees", response_model=List[Employee], tags=["HR"])
 async def get_employees():
     """List all employees"""
-    return EMPLOYEES
+    return cached_list("/employees", Employee, "employees")
 
 @app.get("/invoices", response_model=List[Invoice], tags=["Finance"])
 async def get_invoices(status: Optional[str] = Query(None, enum=["Paid", "Overdue", "Pending", "Failed"])):
     """List all invoices with optional status filter"""
-    if status:
-        return [i for i in INVOICES if i["status"] == status]
-    return INVOICES
+    return cached_list("/invoices", Invoice, "invoices", status=status)
 
 @app.get("/tickets", response_model=List[Ticket], tags=["Support"])
 async def get_tickets(
     priority: Optional[str] = Query(None, enum=["Critical", "High", "Medium", "Low"]),
-    status: Optional[str] = Query(None, enum=["Open", "In Progress", "Resolved", "Closed"])
+    status: Optional[str] = Query(None, enum=["Open", "In Progress", "Resolved", "Closed"]),
+    page: PageParams = Depends()
 ):
     """List support tickets with optional priority and status filters"""
-    result = TICKETS
-    if priority:
-        result = [t for t in result if t["priority"] == priority]
-    if status:
-        result = [t for t in result if t["status"] == status]
-    return result
+    return paged_list("/tickets", Ticket, "tickets", page, priority=priority, status=status)
 
 @app.get("/network-infrastructure", response_model=List[NetworkNode], tags=["Network Operations"])
 async def get_network_infrastructure():
     """List network infrastructure nodes"""
-    return NETWORK_INFRASTRUCTURE
+    return cached_list("/network-infrastructure", NetworkNode, "network_infrastructure")
+
+@app.get("/network-infrastructure/{node_id}/utilization", response_model=TimeSeriesResponse, tags=["Network Operations"])
+async def get_node_utilization(
+    node_id: str,
+    start: Optional[datetime] = Query(None, description="Range start (ISO 8601, UTC if no offset); default: oldest retained"),
+    end: Optional[datetime] = Query(None, description="Range end; default: newest sample"),
+    step: Optional[str] = Query(None, description="Downsample to buckets of this size, e.g. 5m, 1h, 1d"),
+):
+    """Utilization history of one node: avg/min/max per step over a time range"""
+    if STORE["network_infrastructure"].get(node_id) is None:
+        raise HTTPException(status_code=404, detail=f"Node {node_id} not found")
+    return series_response(NODE_UTILIZATION, node_id, start, end, step)
+
+@app.post("/network-infrastructure/{node_id}/utilization", tags=["Network Operations"])
+async def post_node_utilization(node_id: str, request: TimeSeriesIngest):
+    """Record utilization samples (percent) for one node"""
+    if STORE["network_infrastructure"].get(node_id) is None:
+        raise HTTPException(status_code=404, detail=f"Node {node_id} not found")
+    return ingest_samples(NODE_UTILIZATION, node_id, request)
 
 @app.get("/equipment-inventory", response_model=List[Equipment], tags=["Inventory"])
-async def get_equipment_inventory():
+async def get_equipment_inventory(page: PageParams = Depends()):
     """List equipment inventory"""
-    return EQUIPMENT
+    return paged_list("/equipment-inventory", Equipment, "equipment", page)
 
 @app.get("/sla-metrics", response_model=List[SLAMetric], tags=["Performance"])
 async def get_sla_metrics():
     """Get SLA performance metrics"""
-    return SLA_METRICS
+    return cached_list("/sla-metrics", SLAMetric, "sla_metrics")
 
 @app.get("/vendor-contracts", response_model=List[VendorContract], tags=["Vendors"])
 async def get_vendor_contracts():
     """List vendor contracts"""
-    return VENDOR_CONTRACTS
+    return cached_list("/vendor-contracts", VendorContract, "vendor_contracts")
 
 @app.get("/bandwidth-usage", response_model=List[BandwidthUsage], tags=["Analytics"])
-async def get_bandwidth_usage():
+async def get_bandwidth_usage(page: PageParams = Depends()):
     """Get bandwidth usage statistics"""
-    return BANDWIDTH_USAGE
+    return paged_list("/bandwidth-usage", BandwidthUsage, "bandwidth_usage", page)
+
+@app.get("/bandwidth-usage/{customer_id}/history", response_model=TimeSeriesResponse, tags=["Analytics"])
+async def get_bandwidth_history(
+    customer_id: str,
+    start: Optional[datetime] = Query(None, description="Range start (ISO 8601, UTC if no offset); default: oldest retained"),
+    end: Optional[datetime] = Query(None, description="Range end; default: newest sample"),
+    step: Optional[str] = Query(None, description="Downsample to buckets of this size, e.g. 5m, 1h, 1d"),
+):
+    """Bandwidth usage history (Mbps) of one customer: avg/min/max per step over a time range"""
+    if STORE["customers"].get(customer_id) is None:
+        raise HTTPException(status_code=404, detail=f"Customer {customer_id} not found")
+    return series_response(BANDWIDTH_USAGE, customer_id, start, end, step)
+
+@app.post("/bandwidth-usage/{customer_id}/history", tags=["Analytics"])
+async def post_bandwidth_history(customer_id: str, request: TimeSeriesIngest):
+    """Record bandwidth usage samples (Mbps) for one customer"""
+    if STORE["customers"].get(customer_id) is None:
+        raise HTTPException(status_code=404, detail=f"Customer {customer_id} not found")
+    return ingest_samples(BANDWIDTH_USAGE, customer_id, request)
 
 @app.get("/products", response_model=List[Product], tags=["Sales"])
 async def get_products():
     """Get product catalog"""
-    return PRODUCTS
+    return cached_list("/products", Product, "products")
+
+@app.get("/analytics/mrr", response_model=List[MRRGroup], tags=["Analytics"])
+async def get_mrr_breakdown(
+    group_by: List[str] = Query(["customer_type", "subscription_plan"], description="Columns to group by"),
+    status: Optional[str] = Query(None, enum=["Active", "Suspended", "Churned", "Trial"])
+):
+    """Monthly recurring revenue and customer count per group"""
+    unknown = [field for field in group_by if field not in MRR_GROUP_COLUMNS]
+    if unknown or not group_by:
+        raise HTTPException(status_code=400, detail=f"group_by must be drawn from: {', '.join(MRR_GROUP_COLUMNS)}")
+    group_by = list(dict.fromkeys(group_by))
+
+    def compute():
+        customers = STORE["customers"]
+        mask = COLUMNS.get(customers, "status") == status if status else None
+        return analytics.mrr_breakdown(COLUMNS, customers, group_by, mask)
+
+    return cached_aggregate("/analytics/mrr", ["customers"], compute, group_by=tuple(group_by), status=status)
+
+@app.get("/analytics/utilization", response_model=List[MetricDistribution], tags=["Analytics"])
+async def get_utilization_distribution(
+    percentiles: List[float] = Query([50, 95, 99], description="Percentiles to compute (0-100)")
+):
+    """Distribution of bandwidth utilization, latency, packet loss and node utilization"""
+    if any(not 0 <= p <= 100 for p in percentiles):
+        raise HTTPException(status_code=400, detail="percentiles must be between 0 and 100")
+    percentiles = sorted(set(percentiles))
+
+    def compute():
+        return [
+            dict(metric=metric, **analytics.distribution(COLUMNS.get(STORE[name], column, float), percentiles))
+            for metric, (name, column) in DISTRIBUTION_METRICS.items()
+        ]
+
+    sources = sorted({name for name, _ in DISTRIBUTION_METRICS.values()})
+    return cached_aggregate("/analytics/utilization", sources, compute, percentiles=tuple(percentiles))
+
+@app.get("/analytics/sla", response_model=List[SLAPeriodSummary], tags=["Analytics"])
+async def get_sla_summary():
+    """SLA breach rate, credits issued and latency per reporting period"""
+    return cached_aggregate("/analytics/sla", ["sla_metrics"], lambda: analytics.sla_by_period(COLUMNS, STORE["sla_metrics"]))
+
+@app.get("/analytics/network-saturation", response_model=List[NodeSaturation], tags=["Analytics"])
+async def get_network_saturation(threshold: float = Query(80, ge=0, le=100, description="Utilization percent at which a node counts as saturated")):
+    """Used capacity and headroom per network node, most utilized first"""
+    return cached_aggregate(
+        "/analytics/network-saturation",
+        ["network_infrastructure"],
+        lambda: analytics.node_saturation(COLUMNS, STORE["network_infrastructure"], threshold),
+        threshold=threshold,
+    )
+
+@app.get("/search", response_model=List[SearchHit], tags=["Search"])
+async def search(
+    q: str = Query(..., min_length=1, description="Search text; the last word also matches as a prefix"),
+    resource: Optional[str] = Query(None, enum=list(SEARCH_FIELDS), description="Limit results to one resource type"),
+    limit: int = Query(20, ge=1, le=100),
+    prefix: bool = Query(True, description="Match the last word as a prefix")
+):
+    """Ranked full-text search over tickets, vendor contracts, equipment, employees and customers"""
+    with timed("search"):
+        hits = SEARCH.search(q, [resource] if resource else None, limit, prefix)
+    results = []
+    for score, name, key in hits:
+        record = STORE[name].get(key)
+        if record is not None:
+            results.append({"resource": name, "id": key, "score": round(score, 4), "record": record})
+    record_rows(len(results))
+    return results
+
+@app.get("/changes", tags=["Operations"])
+async def get_changes(
+    resource: List[str] = Query([], description="Resources to follow, e.g. tickets, network_infrastructure (default: all)"),
+    since: Optional[str] = Query(None, description="Resume after this event id, <epoch>-<seq> (default: Last-Event-ID header, else from now)"),
+    priority: Optional[str] = Query(None, description="Only records with this priority, e.g. Critical"),
+    status: Optional[str] = Query(None, description="Only records with this status, e.g. Degraded"),
+    customer_id: Optional[str] = Query(None),
+    sla_breach: Optional[bool] = Query(None),
+    last_event_id: Optional[str] = Header(None),
+):
+    """
+    Server-Sent Events stream of inserted, updated and removed records.
+
+    Each event carries the server run's epoch and its sequence number as the
+    SSE id, so reconnecting clients resume where they left off, or get a
+    reset event after a restart. An update passes a filter if the record
+    matched it before or after the change.
+    """
+    unknown = [name for name in resource if name not in STORE or not STORE[name].primary_key]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown resource(s): {', '.join(unknown)}")
+    if since is None:
+        since = last_event_id
+    criteria = {
+        field: value
+        for field, value in (("priority", priority), ("status", status), ("customer_id", customer_id), ("sla_breach", sla_breach))
+        if value is not None
+    }
+    return StreamingResponse(
+        FEED.stream(since, resource, criteria),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@app.get("/cache/stats", tags=["Operations"])
+async def get_cache_stats():
+    """Response cache hit/miss counters (cursor pages under "pages")"""
+    return dict(RESPONSE_CACHE.stats(), pages=PAGE_CACHE.stats())
+
+METRICS.counter("modexia_response_cache_hits_total", "Response cache hits")
+METRICS.counter("modexia_response_cache_misses_total", "Response cache misses")
+METRICS.gauge("modexia_response_cache_entries", "Cached responses, summed over workers")
+METRICS.gauge("modexia_change_feed_subscribers", "Open /changes streams")
+METRICS.gauge("modexia_profiler_running", "Workers with the sampling profiler running")
+
+def process_metrics() -> Dict[str, float]:
+    cache = RESPONSE_CACHE.stats()
+    return {
+        "modexia_response_cache_hits_total": cache["hits"],
+        "modexia_response_cache_misses_total": cache["misses"],
+        "modexia_response_cache_entries": cache["entries"],
+        "modexia_change_feed_subscribers": FEED.stats()["subscribers"],
+        "modexia_profiler_running": int(PROFILER.running),
+    }
+
+METRICS.collect_with(process_metrics)
+
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Operations"])
+async def get_metrics():
+    """Request, cache and dataset metrics in Prometheus text format"""
+    # Every worker holds the same dataset, so these are reported as seen here
+    extra = ["# TYPE modexia_collection_rows gauge"]
+    extra += [f'modexia_collection_rows{{collection="{c.name}"}} {len(c)}' for c in STORE]
+    extra.append("# TYPE modexia_collection_version gauge")
+    extra += [f'modexia_collection_version{{collection="{c.name}"}} {c.version}' for c in STORE]
+    extra.append("# TYPE modexia_change_feed_seq gauge")
+    extra.append(f"modexia_change_feed_seq {FEED.stats()['seq']}")
+    series = TIMESERIES.stats()
+    extra.append("# TYPE modexia_timeseries_series gauge")
+    extra.append(f"modexia_timeseries_series {series['series']}")
+    extra.append("# TYPE modexia_timeseries_bytes gauge")
+    extra.append(f"modexia_timeseries_bytes {series['bytes']}")
+    return PlainTextResponse(METRICS.render(extra), media_type="text/plain; version=0.0.4")
+
+def require_profiler() -> None:
+    if not PROFILER_ENABLED:
+        raise HTTPException(status_code=404, detail="Profiler disabled; set MODEXIA_ENABLE_PROFILER=1 to enable it")
+
+@app.post("/metrics/profiler/start", tags=["Operations"], dependencies=[Depends(require_profiler)])
+async def start_profiler(interval_ms: float = Query(5, ge=1, le=1000, description="Sampling interval in milliseconds")):
+    """Start the sampling profiler (clears previous samples)"""
+    PROFILER.start(interval_ms / 1000)
+    return {"running": True, "interval_ms": interval_ms, "worker": os.getpid()}
+
+@app.post("/metrics/profiler/stop", tags=["Operations"], dependencies=[Depends(require_profiler)])
+async def stop_profiler():
+    """Stop the sampling profiler, keeping its samples"""
+    PROFILER.stop()
+    return {"running": False, "worker": os.getpid()}
+
+@app.get("/metrics/profiler", response_class=PlainTextResponse, tags=["Operations"], dependencies=[Depends(require_profiler)])
+async def get_profile():
+    """Sampled stacks in collapsed format (one 'worker-<pid>;frame;... count' per line) for flamegraph tools"""
+    return PlainTextResponse(PROFILER.collapsed())
 
 @app.get("/health")
 async def health_check():
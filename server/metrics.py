@@ -0,0 +1,464 @@
+"""
+Request instrumentation for the Modexia ISP API.
+
+MetricsMiddleware records, per route template and status code, a latency
+histogram, response bytes and rows returned. Handlers mark the time spent in
+filtering, model validation and JSON encoding with ``timed(phase)``, and the
+middleware folds those into per-route phase histograms when the response
+finishes. Everything is rendered in the Prometheus text exposition format.
+
+Under the pre-forked server every worker would otherwise count only the
+requests it happened to accept. Given a directory, MetricsRegistry keeps each
+process's values in a memory-mapped file there (in the spirit of the
+Prometheus client's multiprocess mode) and any worker renders the sum over all
+of them. When a worker exits, the master folds its counters into a retired
+file and drops its gauges, so totals survive reloads and respawns without a
+per-worker label.
+
+SamplingProfiler is an opt-in wall-clock sampler: a background thread takes a
+snapshot of every thread's stack at a fixed interval and counts collapsed
+stacks, which can be fed straight into flamegraph tools.
+"""
+
+import fcntl
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+from contextlib import contextmanager
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Size a process's value file starts at; it doubles whenever it fills up
+VALUE_FILE_BYTES = 64 * 1024
+# Counters of workers that have exited, merged by the master
+RETIRED_FILE = "retired.db"
+# How often each worker copies its collector values into its file
+SAMPLE_INTERVAL = 1.0
+
+# Value kinds: counters are kept after a worker exits, gauges only while it runs
+COUNTER, GAUGE = "c", "g"
+
+_USED = struct.Struct("<Q")
+_LENGTH = struct.Struct("<I")
+_VALUE = struct.Struct("<d")
+
+
+class RequestStats:
+    """Measurements collected while one request is being handled"""
+
+    __slots__ = ("phases", "rows")
+
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+        self.rows: Optional[int] = None
+
+
+_current: ContextVar[Optional[RequestStats]] = ContextVar("modexia_request_stats", default=None)
+
+
+@contextmanager
+def timed(phase: str) -> Iterator[None]:
+    """Add the time spent in the block to the current request's phase total"""
+    stats = _current.get()
+    if stats is None:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        stats.phases[phase] = stats.phases.get(phase, 0.0) + time.perf_counter() - start
+
+
+def record_rows(count: int) -> None:
+    """Record how many rows the current request returns"""
+    stats = _current.get()
+    if stats is not None:
+        stats.rows = count
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _key(kind: str, name: str, labels: str, part: str = "") -> str:
+    """
+    Flat key of one value: its kind, metric family, rendered labels and, for
+    histograms, the bucket bound or ``sum``.
+    """
+    return f"{kind}\x1f{name}\x1f{labels}\x1f{part}"
+
+
+def _entries(buffer: Union[bytes, mmap.mmap]) -> Iterator[Tuple[str, int, float]]:
+    """(key, value offset, value) of every entry in a value file's contents"""
+    used = _USED.unpack_from(buffer, 0)[0] if len(buffer) >= _USED.size else 0
+    position = _USED.size
+    while position < used:
+        length = _LENGTH.unpack_from(buffer, position)[0]
+        key = bytes(buffer[position + _LENGTH.size:position + _LENGTH.size + length]).decode()
+        offset = position + _padded(length)
+        yield key, offset, _VALUE.unpack_from(buffer, offset)[0]
+        position = offset + _VALUE.size
+
+
+def _padded(length: int) -> int:
+    """Bytes taken by a key's length and text, rounded up so its value is 8-byte aligned"""
+    return (_LENGTH.size + length + 7) // 8 * 8
+
+
+def read_values(path: Path) -> Dict[str, float]:
+    """Every value in a value file (raises FileNotFoundError once it is retired)"""
+    return {key: value for key, _, value in _entries(path.read_bytes())}
+
+
+def write_values(path: Path, values: Dict[str, float]) -> None:
+    """Atomically replace a value file with the given values"""
+    chunks = []
+    for key, value in values.items():
+        encoded = key.encode()
+        chunks.append(_LENGTH.pack(len(encoded)) + encoded.ljust(_padded(len(encoded)) - _LENGTH.size, b"\0") + _VALUE.pack(value))
+    body = b"".join(chunks)
+    temporary = path.with_name(path.name + ".tmp")
+    temporary.write_bytes(_USED.pack(_USED.size + len(body)) + body)
+    os.replace(temporary, path)
+
+
+class _LocalValues:
+    """Values of a registry without a directory: one process, no files"""
+
+    def __init__(self):
+        self.values: Dict[str, float] = {}
+
+    def inc(self, key: str, amount: float) -> None:
+        self.values[key] = self.values.get(key, 0.0) + float(amount)
+
+    def set(self, key: str, value: float) -> None:
+        self.values[key] = float(value)
+
+    def close(self) -> None:
+        pass
+
+
+class _ValueFile:
+    """
+    One process's values in a memory-mapped file other processes can read.
+
+    The file starts with the number of bytes in use, followed by entries of
+    a key length, the UTF-8 key padded to 8 bytes and a float64 value. Only
+    the owning process writes; entries are appended and never move, so a
+    reader copying the file sees whole entries up to the recorded length.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._lock = threading.Lock()
+        self._file = open(path, "a+b")
+        if os.fstat(self._file.fileno()).st_size < VALUE_FILE_BYTES:
+            self._file.truncate(VALUE_FILE_BYTES)
+        self._map = mmap.mmap(self._file.fileno(), 0)
+        self._offsets = {key: offset for key, offset, _ in _entries(self._map)}
+        self._used = max(_USED.unpack_from(self._map, 0)[0], _USED.size)
+
+    def _offset(self, key: str) -> int:
+        offset = self._offsets.get(key)
+        if offset is not None:
+            return offset
+        encoded = key.encode()
+        offset = self._used + _padded(len(encoded))
+        if offset + _VALUE.size > len(self._map):
+            size = len(self._map)
+            while offset + _VALUE.size > size:
+                size *= 2
+            self._map.resize(size)
+        self._map[self._used:offset] = _LENGTH.pack(len(encoded)) + encoded.ljust(offset - self._used - _LENGTH.size, b"\0")
+        _VALUE.pack_into(self._map, offset, 0.0)
+        self._used = offset + _VALUE.size
+        # Publish the entry only once it is complete
+        _USED.pack_into(self._map, 0, self._used)
+        self._offsets[key] = offset
+        return offset
+
+    def inc(self, key: str, amount: float) -> None:
+        with self._lock:
+            offset = self._offset(key)
+            _VALUE.pack_into(self._map, offset, _VALUE.unpack_from(self._map, offset)[0] + amount)
+
+    def set(self, key: str, value: float) -> None:
+        with self._lock:
+            _VALUE.pack_into(self._map, self._offset(key), value)
+
+    def close(self) -> None:
+        self._map.close()
+        self._file.close()
+
+
+class MetricsRegistry:
+    """
+    Request metrics plus collected per-process values.
+
+    Without a directory values live in this process only. With one, each
+    process writes to ``<pid>.db`` there and ``render`` sums every file, so
+    any pre-forked worker reports totals for the whole server.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = Path(directory) if directory else None
+        self._families: Dict[str, Tuple[str, str]] = {}
+        self._collectors: List[Callable[[], Dict[str, float]]] = []
+        self._values: Union[_LocalValues, _ValueFile, None] = None
+        self._pid: Optional[int] = None
+        self._sampler: Optional[threading.Thread] = None
+        self.histogram("modexia_http_request_duration_seconds", "Request latency by route, method and status")
+        self.histogram("modexia_request_phase_seconds", "Time spent filtering, validating and encoding per request")
+        self.counter("modexia_http_response_bytes_total", "Response body bytes sent by route")
+        self.counter("modexia_http_response_rows_total", "Rows returned by route")
+
+    def histogram(self, name: str, help: str) -> None:
+        self._families[name] = ("histogram", help)
+
+    def counter(self, name: str, help: str) -> None:
+        self._families[name] = ("counter", help)
+
+    def gauge(self, name: str, help: str) -> None:
+        """Declare a gauge; across workers, the values of running workers are summed"""
+        self._families[name] = ("gauge", help)
+
+    def collect_with(self, collect: Callable[[], Dict[str, float]]) -> None:
+        """
+        Register a callable returning this process's current value of
+        unlabelled counters and gauges, by name. Values are copied in by
+        ``sample`` and before every render.
+        """
+        self._collectors.append(collect)
+
+    def _store(self) -> Union[_LocalValues, _ValueFile]:
+        pid = os.getpid()
+        # A forked child must never write to the file it inherited
+        if self._pid != pid:
+            self._pid = pid
+            self._values = _ValueFile(self.directory / f"{pid}.db") if self.directory else _LocalValues()
+        return self._values
+
+    def reset(self) -> None:
+        """Forget everything this process has observed"""
+        if self._values is not None and self._pid == os.getpid():
+            self._values.close()
+            if self.directory:
+                (self.directory / f"{self._pid}.db").unlink(missing_ok=True)
+        self._values = None
+        self._pid = None
+
+    def observe(self, route: str, method: str, status: int, elapsed: float, size: int, stats: RequestStats) -> None:
+        values = self._store()
+        route = _escape(route)
+        self._observe(values, "modexia_http_request_duration_seconds",
+                      f'route="{route}",method="{method}",status="{status}"', elapsed)
+        values.inc(_key(COUNTER, "modexia_http_response_bytes_total", f'route="{route}"'), size)
+        if stats.rows is not None:
+            values.inc(_key(COUNTER, "modexia_http_response_rows_total", f'route="{route}"'), stats.rows)
+        for phase, seconds in stats.phases.items():
+            self._observe(values, "modexia_request_phase_seconds", f'route="{route}",phase="{phase}"', seconds)
+
+    @staticmethod
+    def _observe(values: Union[_LocalValues, _ValueFile], name: str, labels: str, value: float) -> None:
+        # Buckets are stored non-cumulative and summed up when rendered
+        bound = next((f"{bound:g}" for bound in LATENCY_BUCKETS if value <= bound), "+Inf")
+        values.inc(_key(COUNTER, name, labels, bound), 1)
+        values.inc(_key(COUNTER, name, labels, "sum"), value)
+
+    def sample(self) -> None:
+        """Copy the collectors' current values into this process's store"""
+        values = self._store()
+        for collect in self._collectors:
+            for name, value in collect().items():
+                kind = GAUGE if self._families[name][0] == "gauge" else COUNTER
+                values.set(_key(kind, name, ""), value)
+
+    def start_sampling(self) -> None:
+        """Sample the collectors every SAMPLE_INTERVAL seconds, so idle workers stay current"""
+        if self.directory is None or (self._sampler is not None and self._sampler.is_alive()):
+            return
+
+        def run() -> None:
+            while True:
+                time.sleep(SAMPLE_INTERVAL)
+                self.sample()
+
+        self._sampler = threading.Thread(target=run, name="modexia-metrics", daemon=True)
+        self._sampler.start()
+
+    def _lock(self, operation: int):
+        lock = open(self.directory / ".lock", "a")
+        fcntl.flock(lock, operation)
+        return lock
+
+    def collect(self) -> Dict[str, float]:
+        """Every value, summed over all processes writing to the directory"""
+        if self.directory is None:
+            return dict(self._store().values)
+        totals: Dict[str, float] = defaultdict(float)
+        with self._lock(fcntl.LOCK_SH):
+            for path in self.directory.glob("*.db"):
+                try:
+                    values = read_values(path)
+                except FileNotFoundError:
+                    continue
+                for key, value in values.items():
+                    totals[key] += value
+        return totals
+
+    def retire(self, pid: int) -> None:
+        """Fold an exited worker's counters into the retired total and drop its gauges"""
+        if self.directory is None:
+            return
+        path = self.directory / f"{pid}.db"
+        with self._lock(fcntl.LOCK_EX):
+            try:
+                values = read_values(path)
+            except FileNotFoundError:
+                return
+            retired = self.directory / RETIRED_FILE
+            totals = Counter(read_values(retired)) if retired.exists() else Counter()
+            for key, value in values.items():
+                if key.startswith(COUNTER):
+                    totals[key] += value
+            write_values(retired, totals)
+            path.unlink()
+
+    def render(self, extra: Sequence[str] = ()) -> str:
+        """Prometheus text exposition of all metrics, followed by extra pre-rendered lines"""
+        self.sample()
+        series: Dict[str, Dict[str, Dict[str, float]]] = defaultdict(lambda: defaultdict(dict))
+        for key, value in self.collect().items():
+            _, name, labels, part = key.split("\x1f")
+            series[name][labels][part] = value
+
+        lines: List[str] = []
+        for name, (kind, help) in self._families.items():
+            lines += [f"# HELP {name} {help}", f"# TYPE {name} {kind}"]
+            for labels, parts in sorted(series[name].items()):
+                if kind == "histogram":
+                    lines.extend(_histogram_lines(name, labels, parts))
+                elif labels:
+                    lines.append(f"{name}{{{labels}}} {_number(parts[''])}")
+                else:
+                    lines.append(f"{name} {_number(parts[''])}")
+        lines.extend(extra)
+        return "\n".join(lines) + "\n"
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+def _histogram_lines(name: str, labels: str, parts: Dict[str, float]) -> Iterator[str]:
+    """Cumulative Prometheus buckets from per-bucket counts"""
+    cumulative = 0.0
+    for bound in LATENCY_BUCKETS:
+        cumulative += parts.get(f"{bound:g}", 0.0)
+        yield f'{name}_bucket{{{labels},le="{bound:g}"}} {_number(cumulative)}'
+    cumulative += parts.get("+Inf", 0.0)
+    yield f'{name}_bucket{{{labels},le="+Inf"}} {_number(cumulative)}'
+    yield f"{name}_sum{{{labels}}} {parts.get('sum', 0.0):.6f}"
+    yield f"{name}_count{{{labels}}} {_number(cumulative)}"
+
+
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request until its last body chunk is sent"""
+
+    def __init__(self, app: ASGIApp, registry: MetricsRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats()
+        token = _current.set(stats)
+        start = time.perf_counter()
+        status = 500
+        size = 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            route_path = getattr(route, "path", None) or "unmatched"
+            self.registry.observe(route_path, scope["method"], status, time.perf_counter() - start, size, stats)
+
+
+class SamplingProfiler:
+    """Background wall-clock stack sampler producing collapsed (flamegraph) stacks"""
+
+    def __init__(self):
+        self.samples: Counter = Counter()
+        self.interval = 0.005
+        self._thread: Optional[threading.Thread] = None
+        self._stop = threading.Event()
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, interval: float = 0.005) -> None:
+        if self.running:
+            return
+        self.interval = interval
+        with self._lock:
+            self.samples.clear()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="modexia-profiler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def _run(self) -> None:
+        own_id = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            for thread_id, frame in sys._current_frames().items():
+                if thread_id == own_id:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                    frame = frame.f_back
+                with self._lock:
+                    self.samples[";".join(reversed(stack))] += 1
+
+    def collapsed(self) -> str:
+        """
+        Sampled stacks in collapsed format, most frequent first.
+
+        Each stack is rooted at a ``worker-<pid>`` frame, so profiles taken
+        from several pre-forked workers can be concatenated and told apart.
+        """
+        with self._lock:
+            stacks = self.samples.most_common()
+        root = f"worker-{os.getpid()}"
+        return "".join(f"{root};{stack} {count}\n" for stack, count in stacks)
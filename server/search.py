@@ -0,0 +1,155 @@
+"""
+Full-text search for the Modexia ISP API.
+
+Each searchable collection gets its own in-process inverted index, built one
+document at a time as the collection is loaded. Queries are tokenized the same
+way as documents, the last query token can match as a prefix (so "fib" finds
+"fiber"), and hits are ranked with BM25. A reloaded collection gets a freshly
+built index that replaces the old one in a single assignment.
+"""
+
+import heapq
+import math
+import re
+from bisect import bisect_left
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Weight applied to terms matched only through prefix expansion
+PREFIX_WEIGHT = 0.5
+MAX_PREFIX_EXPANSIONS = 50
+# Terms in more than 1/COMMON_TERM_RATIO of the documents are dropped from
+# mixed queries once an index holds at least COMMON_TERM_MIN_DOCS documents
+COMMON_TERM_RATIO = 2
+COMMON_TERM_MIN_DOCS = 1000
+
+
+def tokenize(text: str) -> List[str]:
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+def _document_text(row: dict, fields: Sequence[str]) -> str:
+    parts = []
+    for field in fields:
+        value = row.get(field)
+        if isinstance(value, list):
+            parts.extend(str(item) for item in value)
+        elif value is not None:
+            parts.append(str(value))
+    return " ".join(parts)
+
+
+class SearchIndex:
+    """BM25-ranked inverted index over the documents of one resource type"""
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._keys: List[Any] = []
+        self._lengths: List[int] = []
+        self._total_length = 0
+        self._sorted_terms: Optional[List[str]] = None
+        self._norms: Optional[List[float]] = None
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def add(self, key: Any, text: str) -> None:
+        """Index one document under key"""
+        doc_id = len(self._keys)
+        terms = Counter(tokenize(text))
+        for term, frequency in terms.items():
+            postings = self._postings.get(term)
+            if postings is None:
+                postings = self._postings[term] = {}
+                self._sorted_terms = None
+            postings[doc_id] = frequency
+        length = sum(terms.values())
+        self._keys.append(key)
+        self._lengths.append(length)
+        self._total_length += length
+        self._norms = None
+
+    def _expand(self, prefix: str) -> List[str]:
+        if self._sorted_terms is None:
+            self._sorted_terms = sorted(self._postings)
+        terms = []
+        position = bisect_left(self._sorted_terms, prefix)
+        while position < len(self._sorted_terms) and len(terms) < MAX_PREFIX_EXPANSIONS:
+            term = self._sorted_terms[position]
+            if not term.startswith(prefix):
+                break
+            terms.append(term)
+            position += 1
+        return terms
+
+    def search(self, query: str, limit: int = 20, prefix: bool = True) -> List[Tuple[float, Any]]:
+        """Return up to limit (score, key) pairs, best first"""
+        tokens = tokenize(query)
+        if not tokens or not self._keys:
+            return []
+
+        weights: Dict[str, float] = {}
+        for token in tokens:
+            if token in self._postings:
+                weights[token] = 1.0
+        if prefix:
+            for term in self._expand(tokens[-1]):
+                weights.setdefault(term, PREFIX_WEIGHT)
+        if not weights:
+            return []
+        # Terms found in most documents add almost nothing to the ranking but
+        # dominate the cost; skip them unless they are all the query has.
+        common = [term for term in weights if len(self._postings[term]) * COMMON_TERM_RATIO > len(self._keys)]
+        if len(self._keys) >= COMMON_TERM_MIN_DOCS and len(common) < len(weights):
+            for term in common:
+                del weights[term]
+
+        if self._norms is None:
+            average = self._total_length / len(self._keys) or 1.0
+            self._norms = [self.k1 * (1 - self.b + self.b * length / average) for length in self._lengths]
+        norms = self._norms
+        documents = len(self._keys)
+        k1_plus_one = self.k1 + 1
+
+        scores: Dict[int, float] = {}
+        for term, weight in weights.items():
+            postings = self._postings[term]
+            idf = weight * math.log(1 + (documents - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, frequency in postings.items():
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * frequency * k1_plus_one / (frequency + norms[doc_id])
+
+        best = heapq.nlargest(limit, scores.items(), key=lambda item: item[1])
+        return [(score, self._keys[doc_id]) for doc_id, score in best]
+
+
+def build_index(rows: Iterable[dict], key_field: str, text_fields: Sequence[str]) -> SearchIndex:
+    """Index every row by key_field over the given text fields"""
+    index = SearchIndex()
+    for row in rows:
+        index.add(row[key_field], _document_text(row, text_fields))
+    return index
+
+
+class SearchEngine:
+    """Per-resource search indexes queried together or one resource at a time"""
+
+    def __init__(self):
+        self._indexes: Dict[str, SearchIndex] = {}
+
+    def replace(self, resource: str, index: SearchIndex) -> None:
+        self._indexes[resource] = index
+
+    def search(
+        self, query: str, resources: Optional[Sequence[str]] = None, limit: int = 20, prefix: bool = True
+    ) -> List[Tuple[float, str, Any]]:
+        """Return up to limit (score, resource, key) hits across the selected resources"""
+        hits = []
+        for resource in resources or list(self._indexes):
+            index = self._indexes.get(resource)
+            if index is not None:
+                hits.extend((score, resource, key) for score, key in index.search(query, limit, prefix))
+        return heapq.nlargest(limit, hits, key=lambda hit: hit[0])
@@ -0,0 +1,366 @@
+"""
+Pre-fork multi-worker server for the Modexia ISP API.
+
+The master process loads the dataset once, builds every primary-key map,
+index, search index and analytics column, and renders the unfiltered,
+uncompressed body of every list and analytics endpoint. It then freezes the
+heap and forks N uvicorn workers that accept on one shared listening socket.
+Filtered and compressed variants are rendered lazily by the worker that first
+needs them.
+
+Workers inherit the dataset copy-on-write and never modify it, so the pages
+holding it stay shared between processes instead of being parsed, indexed and
+rendered again in every worker. The largest pieces, the pre-serialized
+unfiltered response bodies, stay shared for as long as the worker lives. ``gc.freeze()``
+keeps the cyclic garbage collector from writing to those pages.
+
+Workers do not watch the data files themselves. The master does, and on a
+change (or SIGHUP) it reloads and re-warms its own copy, forks a new
+generation of workers from it and only then gracefully stops the previous
+one. At any moment every worker serves one complete dataset version.
+
+Time-series samples are posted to the API, so forked copies cannot hold them.
+The master keeps the only store and serves it on a unix socket in a private
+runtime directory. Each worker sends its time-series calls to that socket, so
+samples posted to any worker are visible in all of them and survive reloads.
+
+Request metrics are kept per process in memory-mapped files in a shared
+directory (``$MODEXIA_METRICS_DIR``, by default inside the runtime directory),
+so whichever worker answers ``/metrics`` reports totals for the whole server.
+The master folds the counters of every worker it reaps into a retired file.
+
+Usage (from the server directory):
+    python serve.py --workers 4 --port 8000
+"""
+
+import argparse
+import asyncio
+import gc
+import logging
+import math
+import os
+import shutil
+import signal
+import socket
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import uvicorn
+
+from timeseries import RemoteTimeSeriesStore, TimeSeriesServer
+
+logger = logging.getLogger("modexia.serve")
+
+# Routes never requested when warming (the change feed never ends)
+WARM_SKIP_PATHS = {"/changes"}
+# Requests that build lazy shared state of endpoints with required parameters (the search term list and norms)
+WARM_EXTRA_REQUESTS = [("/search", b"q=a")]
+# Seconds an old worker generation may take to finish in-flight requests after a swap
+GRACEFUL_SHUTDOWN_SECONDS = 30
+
+
+async def _get(app, path: str, query: bytes = b"", encoding: bytes = b"identity") -> int:
+    """Send one GET request through the ASGI app in-process and return its status"""
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query,
+        "root_path": "",
+        "headers": [(b"host", b"localhost"), (b"accept-encoding", encoding)],
+        "client": ("127.0.0.1", 0),
+        "server": ("127.0.0.1", 0),
+    }
+    status = 0
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+
+    await app(scope, receive, send)
+    return status
+
+
+def warm_requests(openapi: dict) -> Iterator[Tuple[str, bytes]]:
+    """Unfiltered GET requests for every route without path or required parameters"""
+    for path, operations in openapi["paths"].items():
+        get = operations.get("get")
+        if get is None or "{" in path or path in WARM_SKIP_PATHS:
+            continue
+        if any(p.get("required") for p in get.get("parameters", [])):
+            continue
+        yield path, b""
+    yield from WARM_EXTRA_REQUESTS
+
+
+def warm(api) -> int:
+    """Build all lazy state of the app in this process; returns the number of responses rendered"""
+    for collection in api.STORE:
+        collection.warm()
+
+    async def run():
+        count = 0
+        for path, query in warm_requests(api.app.openapi()):
+            if await _get(api.app, path, query) == 200:
+                count += 1
+        return count
+
+    count = asyncio.run(run())
+    # Workers count their own traffic from zero, not the master's warm-up
+    api.METRICS.reset()
+    api.RESPONSE_CACHE.hits = api.RESPONSE_CACHE.misses = 0
+    return count
+
+
+def cgroup_cpu_limit() -> Optional[float]:
+    """CPUs allowed by the container's CFS quota (cgroup v2, then v1), or None when unlimited"""
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        return None if quota == "max" else int(quota) / int(period)
+    except (OSError, ValueError):
+        pass
+    try:
+        quota = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_quota_us").read_text())
+        period = int(Path("/sys/fs/cgroup/cpu/cpu.cfs_period_us").read_text())
+        return None if quota <= 0 else quota / period
+    except (OSError, ValueError):
+        return None
+
+
+def default_workers() -> int:
+    """
+    $WEB_CONCURRENCY, else one worker per CPU this process may actually use.
+
+    ``os.cpu_count()`` reports the host's CPUs; inside a container the CPU
+    affinity mask and the cgroup quota are what bound the useful workers.
+    """
+    if os.getenv("WEB_CONCURRENCY"):
+        return int(os.environ["WEB_CONCURRENCY"])
+    cpus = len(os.sched_getaffinity(0)) if hasattr(os, "sched_getaffinity") else os.cpu_count() or 1
+    limit = cgroup_cpu_limit()
+    if limit is not None:
+        cpus = min(cpus, math.ceil(limit))
+    return max(1, cpus)
+
+
+def memory_usage(pid: int) -> Dict[str, int]:
+    """Resident and proportional set size of a process in kB (Linux only)"""
+    usage = {}
+    try:
+        for line in Path(f"/proc/{pid}/smaps_rollup").read_text().splitlines():
+            name, _, rest = line.partition(":")
+            if name in ("Rss", "Pss", "Shared_Clean", "Shared_Dirty"):
+                usage[name] = int(rest.split()[0])
+    except OSError:
+        pass
+    return usage
+
+
+class WorkerServer(uvicorn.Server):
+    """
+    uvicorn server that ends the change feed's streams as soon as it starts shutting down.
+
+    uvicorn waits for open connections before running the lifespan shutdown,
+    so the app cannot end its never-ending /changes streams itself. Without
+    this an old worker generation would hold its subscribers until the
+    graceful-shutdown timeout instead of letting them reconnect to the new one.
+    """
+
+    def __init__(self, config: uvicorn.Config, feed):
+        super().__init__(config)
+        self.feed = feed
+
+    async def shutdown(self, sockets=None) -> None:
+        self.feed.close()
+        await super().shutdown(sockets=sockets)
+
+
+class Master:
+    """Owns the dataset and the listening socket, and keeps one generation of workers running"""
+
+    def __init__(self, api, sock: socket.socket, timeseries: RemoteTimeSeriesStore, workers: int,
+                 reload_interval: float, log_level: str):
+        self.api = api
+        self.sock = sock
+        self.timeseries = timeseries
+        self.workers = workers
+        self.reload_interval = reload_interval
+        self.log_level = log_level
+        self.generation: List[int] = []
+        self._stopping = False
+        self._reload_requested = False
+        self._report_at: Optional[float] = None
+
+    def prepare(self) -> None:
+        gc.unfreeze()
+        start = time.perf_counter()
+        responses = warm(self.api)
+        gc.collect()
+        gc.freeze()
+        logger.info("Warmed %d responses in %.1fs", responses, time.perf_counter() - start)
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid:
+            return pid
+        for signum in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP):
+            signal.signal(signum, signal.SIG_DFL)
+        # The master's store is only a stale copy here
+        self.api.TIMESERIES = self.timeseries
+        code = 0
+        try:
+            config = uvicorn.Config(self.api.app, log_level=self.log_level, lifespan="on",
+                                    timeout_graceful_shutdown=GRACEFUL_SHUTDOWN_SECONDS)
+            WorkerServer(config, self.api.FEED).run(sockets=[self.sock])
+        except BaseException:
+            logger.exception("Worker %d failed", os.getpid())
+            code = 1
+        finally:
+            os._exit(code)
+
+    def start_generation(self) -> None:
+        previous = self.generation
+        self.generation = [self.spawn() for _ in range(self.workers)]
+        for pid in previous:
+            self._signal(pid, signal.SIGTERM)
+        logger.info("Started workers %s", self.generation)
+        self._report_at = time.monotonic() + 5
+
+    def report_memory(self) -> None:
+        for pid in [os.getpid()] + self.generation:
+            usage = memory_usage(pid)
+            if usage:
+                logger.info("pid %d: rss %d MB, pss %d MB, shared %d MB", pid, usage["Rss"] // 1024, usage["Pss"] // 1024,
+                            (usage["Shared_Clean"] + usage["Shared_Dirty"]) // 1024)
+
+    def reload(self, names: Optional[List[str]] = None) -> None:
+        names = self.api.LOADER.changed() if names is None else names
+        if not names:
+            return
+        reloaded = []
+        for name in names:
+            try:
+                rows, search_index, changes = self.api.prepare_reload(name)
+            except Exception:
+                logger.exception("Failed to reload %s; keeping the previous data", name)
+                continue
+            self.api.apply_reload(name, rows, search_index, changes)
+            reloaded.append(name)
+        if reloaded:
+            logger.info("Reloaded %s", ", ".join(reloaded))
+            self.prepare()
+            self.start_generation()
+
+    def _signal(self, pid: int, signum: int) -> None:
+        try:
+            os.kill(pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _reap(self) -> None:
+        while True:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            self.api.METRICS.retire(pid)
+            if pid in self.generation and not self._stopping:
+                logger.warning("Worker %d exited with status %d; replacing it", pid, status)
+                self.generation[self.generation.index(pid)] = self.spawn()
+
+    def run(self) -> None:
+        self.prepare()
+        self.start_generation()
+
+        def stop(signum, frame):
+            self._stopping = True
+
+        def request_reload(signum, frame):
+            self._reload_requested = True
+
+        signal.signal(signal.SIGTERM, stop)
+        signal.signal(signal.SIGINT, stop)
+        signal.signal(signal.SIGHUP, request_reload)
+
+        last_check = time.monotonic()
+        while not self._stopping:
+            time.sleep(0.2)
+            self._reap()
+            if self._report_at is not None and time.monotonic() >= self._report_at:
+                self._report_at = None
+                self.report_memory()
+            if self._reload_requested:
+                self._reload_requested = False
+                self.reload(list(self.api.LOADER.schemas))
+            elif self.reload_interval > 0 and time.monotonic() - last_check >= self.reload_interval:
+                last_check = time.monotonic()
+                self.reload()
+
+        for pid in self.generation:
+            self._signal(pid, signal.SIGTERM)
+        for pid in self.generation:
+            try:
+                os.waitpid(pid, 0)
+            except ChildProcessError:
+                pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", 8000)))
+    parser.add_argument("--workers", type=int, default=default_workers(),
+                        help="Worker processes (default: $WEB_CONCURRENCY, else the CPUs allowed by affinity and cgroup quota)")
+    parser.add_argument("--reload-interval", type=float, default=float(os.getenv("MODEXIA_RELOAD_INTERVAL", 2)),
+                        help="Seconds between checks for modified data files (0 disables hot reload)")
+    parser.add_argument("--log-level", default="info")
+    args = parser.parse_args()
+    logging.basicConfig(level=args.log_level.upper(), format="%(asctime)s %(name)s %(levelname)s %(message)s")
+
+    # Only the master watches the data files; workers serve the generation they were forked with
+    os.environ["MODEXIA_RELOAD_INTERVAL"] = "0"
+    # Private to this server: the time-series socket and, by default, the metrics files
+    runtime_dir = Path(tempfile.mkdtemp(prefix="modexia-"))
+    # Every process writes its metrics here and any worker renders the sum
+    if os.getenv("MODEXIA_METRICS_DIR"):
+        for stale in Path(os.environ["MODEXIA_METRICS_DIR"]).glob("*.db"):
+            stale.unlink()
+    else:
+        os.environ["MODEXIA_METRICS_DIR"] = str(runtime_dir / "metrics")
+        (runtime_dir / "metrics").mkdir()
+    import main as api
+
+    address, authkey = str(runtime_dir / "timeseries.sock"), os.urandom(32)
+    timeseries = TimeSeriesServer(api.TIMESERIES, address, authkey)
+    timeseries.start()
+
+    sock = socket.socket(socket.AF_INET6 if ":" in args.host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((args.host, args.port))
+    sock.listen(2048)
+    sock.set_inheritable(True)
+
+    master = Master(api, sock, RemoteTimeSeriesStore(address, authkey), args.workers, args.reload_interval, args.log_level)
+    logger.info("Serving on %s:%d with %d workers", args.host, args.port, args.workers)
+    try:
+        master.run()
+    finally:
+        sock.close()
+        timeseries.close()
+        shutil.rmtree(runtime_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+"""
+In-memory data store for the Modexia ISP API.
+
+Each collection keeps its rows in load order, a primary-key map and hash
+indexes on the columns the list endpoints filter by. The map and indexes are
+built lazily, once per load, the first time they are needed. Filtered requests
+then touch only the matching index bucket instead of scanning the whole
+collection.
+
+Collections registered with ``ordered=True`` keep their rows sorted by primary
+key, so every filter result is also in key order and can be paged with a
+keyset cursor (the last primary key seen) in O(log n).
+"""
+
+from bisect import bisect_right
+from operator import itemgetter
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+
+class Collection:
+    """A named list of records with a primary-key map and secondary indexes"""
+
+    def __init__(
+        self,
+        name: str,
+        rows: List[dict],
+        primary_key: Optional[str] = None,
+        indexes: Sequence[str] = (),
+        ordered: bool = False,
+    ):
+        if ordered and primary_key is None:
+            raise ValueError(f"Collection '{name}' needs a primary key to be ordered")
+        self.name = name
+        self.primary_key = primary_key
+        self.indexed_fields = tuple(indexes)
+        self.ordered = ordered
+        self.version = 0
+        self.load(rows)
+
+    def load(self, rows: List[dict]) -> None:
+        """Replace the collection contents; indexes are rebuilt on next use"""
+        self.rows = sorted(rows, key=itemgetter(self.primary_key)) if self.ordered else list(rows)
+        self._by_key: Optional[Dict[Any, dict]] = None
+        self._indexes: Dict[str, Dict[Any, List[dict]]] = {}
+        self.version += 1
+
+    def _index(self, field: str) -> Dict[Any, List[dict]]:
+        index = self._indexes.get(field)
+        if index is None:
+            if field not in self.indexed_fields:
+                raise KeyError(f"Collection '{self.name}' has no index on '{field}'")
+            index = {}
+            for row in self.rows:
+                index.setdefault(row[field], []).append(row)
+            self._indexes[field] = index
+        return index
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def __iter__(self) -> Iterator[dict]:
+        return iter(self.rows)
+
+    def _key_map(self) -> Dict[Any, dict]:
+        if self._by_key is None:
+            self._by_key = {row[self.primary_key]: row for row in self.rows} if self.primary_key else {}
+        return self._by_key
+
+    def get(self, key: Any) -> Optional[dict]:
+        """Look up a single record by primary key"""
+        return self._key_map().get(key)
+
+    def warm(self) -> None:
+        """Build the primary-key map and every index now rather than on first use"""
+        self._key_map()
+        for field in self.indexed_fields:
+            self._index(field)
+
+    def filter(self, **criteria: Any) -> List[dict]:
+        """
+        Return the rows matching every given field == value criterion.
+
+        Criteria set to None are ignored. The smallest matching index bucket
+        is taken as the candidate set and intersected with the remaining
+        criteria, so the cost is bounded by the most selective filter rather
+        than by the collection size.
+        """
+        criteria = {field: value for field, value in criteria.items() if value is not None}
+        if not criteria:
+            return self.rows
+
+        buckets = []
+        for field, value in criteria.items():
+            bucket = self._index(field).get(value)
+            if not bucket:
+                return []
+            buckets.append((len(bucket), field, bucket))
+
+        buckets.sort(key=lambda entry: entry[0])
+        candidates = buckets[0][2]
+        for _, field, _ in buckets[1:]:
+            value = criteria[field]
+            candidates = [row for row in candidates if row[field] == value]
+        return candidates
+
+    def page(
+        self, rows: List[dict], cursor: Optional[Any] = None, limit: Optional[int] = None
+    ) -> Tuple[List[dict], Optional[Any]]:
+        """
+        Slice rows (a key-ordered result of filter()) to the page after cursor.
+
+        Returns the page and the cursor for the next one, or None when the
+        page reaches the end of rows.
+        """
+        if not self.ordered:
+            raise ValueError(f"Collection '{self.name}' is not ordered and cannot be paged")
+        start = 0 if cursor is None else bisect_right(rows, cursor, key=itemgetter(self.primary_key))
+        if limit is None or start + limit >= len(rows):
+            return rows[start:], None
+        page = rows[start:start + limit]
+        return page, page[-1][self.primary_key]
+
+
+class DataStore:
+    """Registry of the collections served by the API"""
+
+    def __init__(self):
+        self._collections: Dict[str, Collection] = {}
+
+    def register(
+        self,
+        name: str,
+        rows: List[dict],
+        primary_key: Optional[str] = None,
+        indexes: Sequence[str] = (),
+        ordered: bool = False,
+    ) -> Collection:
+        collection = Collection(name, rows, primary_key=primary_key, indexes=indexes, ordered=ordered)
+        self._collections[name] = collection
+        return collection
+
+    def __getitem__(self, name: str) -> Collection:
+        return self._collections[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._collections
+
+    def __iter__(self) -> Iterator[Collection]:
+        return iter(self._collections.values())
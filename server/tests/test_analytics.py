@@ -0,0 +1,150 @@
+import os
+
+os.environ.setdefault("MODEXIA_RELOAD_INTERVAL", "0")
+
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from analytics import ColumnCache, distribution, mrr_breakdown, node_saturation, sla_by_period  # noqa: E402
+from store import Collection  # noqa: E402
+
+CUSTOMERS = [
+    {"customer_id": "C1", "customer_type": "Enterprise", "subscription_plan": "Fiber 1G", "status": "Active", "monthly_recurring_revenue": 1000.0},
+    {"customer_id": "C2", "customer_type": "Enterprise", "subscription_plan": "Fiber 1G", "status": "Suspended", "monthly_recurring_revenue": 500.0},
+    {"customer_id": "C3", "customer_type": "SMB", "subscription_plan": "Fiber 1G", "status": "Active", "monthly_recurring_revenue": 200.0},
+    {"customer_id": "C4", "customer_type": "Enterprise", "subscription_plan": "Fiber 10G", "status": "Active", "monthly_recurring_revenue": 4000.0},
+    {"customer_id": "C5", "customer_type": "SMB", "subscription_plan": "Fiber 1G", "status": "Active", "monthly_recurring_revenue": 250.5},
+]
+
+SLA = [
+    {"reporting_period": "2024-02", "sla_met": True, "credits_issued_usd": 0.0, "total_downtime_minutes": 5.0, "avg_latency_ms": 10.0},
+    {"reporting_period": "2024-01", "sla_met": False, "credits_issued_usd": 150.0, "total_downtime_minutes": 90.0, "avg_latency_ms": 30.0},
+    {"reporting_period": "2024-01", "sla_met": True, "credits_issued_usd": 0.0, "total_downtime_minutes": 0.0, "avg_latency_ms": 12.0},
+    {"reporting_period": "2024-02", "sla_met": False, "credits_issued_usd": 50.5, "total_downtime_minutes": 45.0, "avg_latency_ms": 20.0},
+    {"reporting_period": "2024-02", "sla_met": False, "credits_issued_usd": 25.0, "total_downtime_minutes": 15.0, "avg_latency_ms": 30.0},
+]
+
+NODES = [
+    {"node_id": "N1", "node_type": "Core Router", "status": "Operational", "capacity_gbps": 100.0, "current_utilization_percent": 40.0},
+    {"node_id": "N2", "node_type": "Edge Switch", "status": "Degraded", "capacity_gbps": 10.0, "current_utilization_percent": 92.0},
+    {"node_id": "N3", "node_type": "OLT", "status": "Operational", "capacity_gbps": 40.0, "current_utilization_percent": 85.0},
+    {"node_id": "N4", "node_type": "OLT", "status": "Operational", "capacity_gbps": 40.0, "current_utilization_percent": 85.0},
+]
+
+
+def by_group(result, group_by):
+    return {tuple(row[field] for field in group_by): (row["customers"], row["monthly_recurring_revenue"]) for row in result}
+
+
+def test_mrr_breakdown_groups_by_several_columns():
+    columns, customers = ColumnCache(), Collection("customers", CUSTOMERS)
+    result = mrr_breakdown(columns, customers, ["customer_type", "subscription_plan"])
+    assert by_group(result, ["customer_type", "subscription_plan"]) == {
+        ("Enterprise", "Fiber 1G"): (2, 1500.0),
+        ("Enterprise", "Fiber 10G"): (1, 4000.0),
+        ("SMB", "Fiber 1G"): (2, 450.5),
+    }
+    # Only combinations that occur are reported
+    assert ("SMB", "Fiber 10G") not in by_group(result, ["customer_type", "subscription_plan"])
+
+
+def test_mrr_breakdown_with_three_columns_matches_a_brute_force_group_by():
+    rng = np.random.default_rng(0)
+    rows = [
+        {"a": str(rng.integers(3)), "b": str(rng.integers(4)), "c": str(rng.integers(5)), "monthly_recurring_revenue": float(i)}
+        for i in range(300)
+    ]
+    expected = {}
+    for row in rows:
+        count, total = expected.get((row["a"], row["b"], row["c"]), (0, 0.0))
+        expected[(row["a"], row["b"], row["c"])] = (count + 1, total + row["monthly_recurring_revenue"])
+    result = mrr_breakdown(ColumnCache(), Collection("customers", rows), ["a", "b", "c"])
+    assert by_group(result, ["a", "b", "c"]) == expected
+
+
+def test_mrr_breakdown_applies_the_status_mask():
+    columns, customers = ColumnCache(), Collection("customers", CUSTOMERS)
+    mask = columns.get(customers, "status") == "Active"
+    result = mrr_breakdown(columns, customers, ["customer_type"], mask)
+    assert by_group(result, ["customer_type"]) == {("Enterprise",): (2, 5000.0), ("SMB",): (2, 450.5)}
+
+
+def test_mrr_breakdown_is_empty_when_the_mask_or_collection_is_empty():
+    columns, customers = ColumnCache(), Collection("customers", CUSTOMERS)
+    mask = columns.get(customers, "status") == "Churned"
+    assert mrr_breakdown(columns, customers, ["customer_type"], mask) == []
+    assert mrr_breakdown(ColumnCache(), Collection("customers", []), ["customer_type"]) == []
+
+
+def test_sla_by_period():
+    result = sla_by_period(ColumnCache(), Collection("sla_metrics", SLA))
+    assert result == [
+        {"reporting_period": "2024-01", "customers": 2, "sla_breaches": 1, "breach_rate": 0.5,
+         "credits_issued_usd": 150.0, "total_downtime_minutes": 90.0, "avg_latency_ms": 21.0},
+        {"reporting_period": "2024-02", "customers": 3, "sla_breaches": 2, "breach_rate": 2 / 3,
+         "credits_issued_usd": 75.5, "total_downtime_minutes": 65.0, "avg_latency_ms": 20.0},
+    ]
+    assert sla_by_period(ColumnCache(), Collection("sla_metrics", [])) == []
+
+
+def test_distribution():
+    values = np.array([10.0, 20.0, 30.0, 40.0, 50.0])
+    assert distribution(values, [50, 90, 100]) == {
+        "count": 5, "mean": 30.0, "min": 10.0, "max": 50.0,
+        "percentiles": {"p50": 30.0, "p90": 46.0, "p100": 50.0},
+    }
+    assert distribution(np.array([]), [50]) == {"count": 0, "mean": None, "min": None, "max": None, "percentiles": {}}
+
+
+def test_node_saturation_orders_by_utilization_and_flags_the_threshold():
+    result = node_saturation(ColumnCache(), Collection("network_infrastructure", NODES), 85.0)
+    # Ties keep their collection order
+    assert [row["node_id"] for row in result] == ["N2", "N3", "N4", "N1"]
+    assert result[0] == {"node_id": "N2", "node_type": "Edge Switch", "status": "Degraded", "capacity_gbps": 10.0,
+                         "current_utilization_percent": 92.0, "used_gbps": pytest.approx(9.2),
+                         "headroom_gbps": pytest.approx(0.8), "saturated": True}
+    assert [row["saturated"] for row in result] == [True, True, True, False]
+    assert result[3]["used_gbps"] == 40.0 and result[3]["headroom_gbps"] == 60.0
+
+
+def test_column_cache_rebuilds_only_after_a_reload():
+    columns, customers = ColumnCache(), Collection("customers", CUSTOMERS)
+    first = columns.get(customers, "monthly_recurring_revenue", np.float64)
+    assert columns.get(customers, "monthly_recurring_revenue", np.float64) is first
+    customers.load(CUSTOMERS[:2])
+    assert columns.get(customers, "monthly_recurring_revenue", np.float64).tolist() == [1000.0, 500.0]
+
+
+def test_cached_aggregate_computes_once_per_collection_version(monkeypatch):
+    products = main.STORE["products"]
+    calls = []
+
+    def compute():
+        calls.append(products.version)
+        return [{"products": len(products)}]
+
+    monkeypatch.setattr(main, "RESPONSE_CACHE", main.ResponseCache())
+    first = main.cached_aggregate("/test/aggregate", ["products"], compute, scope="all")
+    main.cached_aggregate("/test/aggregate", ["products"], compute, scope="all")
+    assert len(calls) == 1
+    main.cached_aggregate("/test/aggregate", ["products"], compute, scope="other")
+    assert len(calls) == 2
+    products.load(list(products.rows))
+    again = main.cached_aggregate("/test/aggregate", ["products"], compute, scope="all")
+    assert len(calls) == 3 and calls[-1] == calls[0] + 1
+    assert again.entry.body == first.entry.body
+
+
+def test_mrr_endpoint_matches_the_loaded_customers():
+    response = TestClient(main.app).get("/analytics/mrr", params={"group_by": "status"})
+    assert response.status_code == 200
+    expected = {}
+    for row in main.STORE["customers"].rows:
+        count, total = expected.get((row["status"],), (0, 0.0))
+        expected[(row["status"],)] = (count + 1, total + row["monthly_recurring_revenue"])
+    got = by_group(response.json(), ["status"])
+    assert got.keys() == expected.keys()
+    for key, (count, total) in expected.items():
+        assert got[key][0] == count and got[key][1] == pytest.approx(total)
@@ -0,0 +1,201 @@
+import json
+import os
+import time
+from datetime import datetime, timezone
+
+os.environ.setdefault("MODEXIA_RELOAD_INTERVAL", "0")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from cache import MIN_COMPRESS_BYTES  # noqa: E402
+from loader import DataLoader  # noqa: E402
+from timeseries import SUM, RemoteTimeSeriesStore, TimeSeriesServer, TimeSeriesStore  # noqa: E402
+
+
+@pytest.fixture
+def client():
+    main.RESPONSE_CACHE.invalidate()
+    main.PAGE_CACHE.invalidate()
+    return TestClient(main.app)
+
+
+def test_cursor_pages_do_not_enter_the_main_response_cache(client):
+    first = client.get("/customers", params={"limit": 1})
+    assert first.status_code == 200
+    entries = main.RESPONSE_CACHE.stats()["entries"]
+    cursor = first.headers.get("x-next-cursor")
+    while cursor:
+        response = client.get("/customers", params={"limit": 1, "cursor": cursor})
+        assert response.status_code == 200
+        cursor = response.headers.get("x-next-cursor")
+    assert main.RESPONSE_CACHE.stats()["entries"] == entries
+    assert main.PAGE_CACHE.stats()["entries"] > 0
+
+
+def test_each_content_coding_has_its_own_strong_etag(client):
+    identity = client.get("/tickets", headers={"accept-encoding": "identity"})
+    gzipped = client.get("/tickets", headers={"accept-encoding": "gzip"})
+    assert len(identity.content) >= MIN_COMPRESS_BYTES
+    assert gzipped.headers["content-encoding"] == "gzip"
+    plain_tag, gzip_tag = identity.headers["etag"], gzipped.headers["etag"]
+    assert plain_tag != gzip_tag
+    assert gzip_tag == plain_tag[:-1] + '-gz"'
+    assert not plain_tag.startswith("W/")
+
+
+@pytest.mark.parametrize("encoding", ["identity", "gzip"])
+def test_if_none_match_accepts_a_validator_of_any_variant(client, encoding):
+    gzip_tag = client.get("/tickets", headers={"accept-encoding": "gzip"}).headers["etag"]
+    response = client.get("/tickets", headers={"accept-encoding": encoding, "if-none-match": gzip_tag})
+    assert response.status_code == 304
+    assert response.content == b""
+    expected = gzip_tag if encoding == "gzip" else gzip_tag.replace("-gz", "")
+    assert response.headers["etag"] == expected
+
+
+def test_if_none_match_with_a_stale_tag_returns_the_body(client):
+    response = client.get("/tickets", headers={"if-none-match": '"0000-gz", W/"1111"'})
+    assert response.status_code == 200
+
+
+def test_profiler_routes_are_disabled_by_default(client, monkeypatch):
+    monkeypatch.setattr(main, "PROFILER_ENABLED", False)
+    assert client.post("/metrics/profiler/start").status_code == 404
+    assert client.post("/metrics/profiler/stop").status_code == 404
+    assert client.get("/metrics/profiler").status_code == 404
+    assert not main.PROFILER.running
+
+
+def test_profiler_routes_work_when_enabled(client, monkeypatch):
+    monkeypatch.setattr(main, "PROFILER_ENABLED", True)
+    try:
+        assert client.post("/metrics/profiler/start", params={"interval_ms": 1}).status_code == 200
+        assert main.PROFILER.running
+    finally:
+        assert client.post("/metrics/profiler/stop").status_code == 200
+    assert client.get("/metrics/profiler").status_code == 200
+
+
+def test_metrics_report_requests_and_process_values(client):
+    client.get("/products")
+    body = client.get("/metrics").text
+    assert 'modexia_http_request_duration_seconds_count{route="/products",method="GET",status="200"}' in body
+    assert "modexia_response_cache_entries " in body
+    assert "worker=" not in body
+
+
+def test_time_series_ingest_and_query(client):
+    node_id = main.STORE["network_infrastructure"].rows[0]["node_id"]
+    now = time.time()
+    samples = [{"timestamp": now - 3600 + 60 * i, "value": float(i)} for i in range(60)]
+    response = client.post(f"/network-infrastructure/{node_id}/utilization", json={"samples": samples})
+    assert response.json() == {"accepted": 60}
+    start = datetime.fromtimestamp(now - 3600, timezone.utc).isoformat()
+    history = client.get(f"/network-infrastructure/{node_id}/utilization", params={"start": start, "step": "1h"}).json()
+    assert history["resolution_seconds"] == 3600
+    assert history["summary"]["max"] >= 59.0
+
+
+@pytest.mark.parametrize("value", ["NaN", "Infinity", "-Infinity"])
+def test_time_series_ingest_rejects_non_finite_values(client, value):
+    customer_id = main.STORE["customers"].rows[0]["customer_id"]
+    body = '{"samples": [{"timestamp": "2026-01-01T00:00:00Z", "value": %s}]}' % value
+    response = client.post(f"/bandwidth-usage/{customer_id}/history", content=body,
+                           headers={"content-type": "application/json"})
+    assert response.status_code == 422
+
+
+def test_time_series_ingest_rejects_far_future_timestamps(client):
+    customer_id = main.STORE["customers"].rows[0]["customer_id"]
+    before = client.get(f"/bandwidth-usage/{customer_id}/history").json()["summary"]["count"]
+    samples = [{"timestamp": time.time(), "value": 1.0}, {"timestamp": "2099-01-01T00:00:00Z", "value": 2.0}]
+    response = client.post(f"/bandwidth-usage/{customer_id}/history", json={"samples": samples})
+    assert response.status_code == 400
+    assert client.get(f"/bandwidth-usage/{customer_id}/history").json()["summary"]["count"] == before
+
+
+def test_time_series_routes_work_against_a_served_store(client, tmp_path, monkeypatch):
+    store = TimeSeriesStore()
+    server = TimeSeriesServer(store, str(tmp_path / "timeseries.sock"), b"key")
+    server.start()
+    try:
+        # As in a serve.py worker
+        monkeypatch.setattr(main, "TIMESERIES", RemoteTimeSeriesStore(server.address, b"key"))
+        node_id = main.STORE["network_infrastructure"].rows[0]["node_id"]
+        now = time.time()
+        response = client.post(f"/network-infrastructure/{node_id}/utilization",
+                               json={"samples": [{"timestamp": now - 60, "value": 10.0}, {"timestamp": now, "value": 30.0}]})
+        assert response.json() == {"accepted": 2}
+        assert store.query(main.NODE_UTILIZATION, node_id)[1][:, SUM].tolist() == [10.0, 30.0]
+        summary = client.get(f"/network-infrastructure/{node_id}/utilization").json()["summary"]
+        assert summary == {"count": 2, "avg": 20.0, "min": 10.0, "max": 30.0}
+        assert "modexia_timeseries_series 1" in client.get("/metrics").text
+    finally:
+        server.close()
+
+
+def test_reload_with_a_bad_row_keeps_the_previous_collection(client, tmp_path, monkeypatch):
+    rows = [dict(row) for row in main.STORE["tickets"].rows]
+    rows[0]["assigned_to"] = None
+    (tmp_path / "tickets.ndjson").write_text("".join(json.dumps(row) + "\n" for row in rows))
+    monkeypatch.setattr(main, "LOADER", DataLoader(main.LOADER.schemas, main.LOADER.resources_dir, tmp_path))
+    version = main.STORE["tickets"].version
+    with pytest.raises(ValueError, match="assigned_to"):
+        main.prepare_reload("tickets")
+    assert main.STORE["tickets"].version == version
+    assert client.get("/tickets").status_code == 200
+    assert client.get("/tickets", params={"priority": "Critical"}).status_code == 200
+
+
+def expected_overview(customer):
+    """Related record ids for one customer, found by scanning every row"""
+    rows = {name: main.STORE[name].rows for name in ("tickets", "sla_metrics", "bandwidth_usage", "invoices")}
+    return {
+        "tickets": [row["ticket_id"] for row in rows["tickets"] if row["customer_id"] == customer["customer_id"]],
+        "sla_metrics": [row["reporting_period"] for row in rows["sla_metrics"] if row["customer_id"] == customer["customer_id"]],
+        "bandwidth_usage": [row["customer_id"] for row in rows["bandwidth_usage"] if row["customer_id"] == customer["customer_id"]],
+        "invoices": [row["invoice_id"] for row in rows["invoices"] if row["client_name"] == customer["account_name"]],
+    }
+
+
+def overview_ids(overview):
+    return {
+        "tickets": [row["ticket_id"] for row in overview["tickets"]],
+        "sla_metrics": [row["reporting_period"] for row in overview["sla_metrics"]],
+        "bandwidth_usage": [row["customer_id"] for row in overview["bandwidth_usage"]],
+        "invoices": [row["invoice_id"] for row in overview["invoices"]],
+    }
+
+
+def test_customer_batch_joins_related_records(client):
+    customers = main.STORE["customers"].rows
+    response = client.post("/customers/batch", json={"customer_ids": [row["customer_id"] for row in customers]})
+    assert response.status_code == 200
+    body = response.json()
+    assert body["not_found"] == []
+    assert [overview["customer"]["customer_id"] for overview in body["customers"]] == [row["customer_id"] for row in customers]
+    for customer, overview in zip(customers, body["customers"]):
+        assert overview_ids(overview) == expected_overview(customer)
+    # Invoices are joined by account name, and the sample data has customers with and without them
+    assert {bool(overview["invoices"]) for overview in body["customers"]} == {True, False}
+
+
+def test_customer_batch_reports_unknown_ids_and_removes_duplicates(client):
+    known = main.STORE["customers"].rows[0]["customer_id"]
+    response = client.post("/customers/batch", json={"customer_ids": ["CUST-NOPE", known, known, "CUST-NOPE", "CUST-GONE"]})
+    body = response.json()
+    assert [overview["customer"]["customer_id"] for overview in body["customers"]] == [known]
+    assert body["not_found"] == ["CUST-NOPE", "CUST-GONE"]
+
+
+def test_customer_batch_limits_the_number_of_distinct_ids(client):
+    too_many = [f"CUST-{i}" for i in range(main.MAX_BATCH_SIZE + 1)]
+    assert client.post("/customers/batch", json={"customer_ids": too_many}).status_code == 400
+    # Duplicates do not count against the limit
+    repeated = too_many[:main.MAX_BATCH_SIZE] * 2
+    response = client.post("/customers/batch", json={"customer_ids": repeated})
+    assert response.status_code == 200
+    assert len(response.json()["not_found"]) == main.MAX_BATCH_SIZE
+    assert client.post("/customers/batch", json={"customer_ids": []}).json() == {"customers": [], "not_found": []}
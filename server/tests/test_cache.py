@@ -0,0 +1,21 @@
+import pytest
+
+from cache import _negotiate_encoding
+
+
+@pytest.mark.parametrize("accept_encoding, expected", [
+    ("gzip, deflate, br", "br"),
+    ("gzip", "gzip"),
+    ("gzip;q=1, br;q=0.1", "gzip"),
+    ("br;q=0.5, gzip;q=0.5", "br"),
+    ("br;q=0, gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("*", "br"),
+    ("*;q=0.2, gzip;q=0.8", "gzip"),
+    ("br;q=0.3, identity;q=0.9", None),
+    ("gzip;q=abc, br;q=0.1", "br"),
+    ("", None),
+    ("deflate", None),
+])
+def test_negotiate_encoding_honours_q_values(accept_encoding, expected):
+    assert _negotiate_encoding(accept_encoding) == expected
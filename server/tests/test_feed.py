@@ -0,0 +1,118 @@
+import asyncio
+
+from feed import INSERT, REMOVE, UPDATE, ChangeFeed, diff
+
+
+def node(node_id, status="Operational", utilization=50):
+    return {"node_id": node_id, "status": status, "current_utilization_percent": utilization}
+
+
+def events(chunks):
+    """(id, event) of every frame in the chunks, skipping keep-alive comments"""
+    frames = [frame for chunk in chunks for frame in chunk.decode().split("\n\n") if frame and not frame.startswith(":")]
+    parsed = []
+    for frame in frames:
+        fields = dict(line.split(": ", 1) for line in frame.splitlines())
+        parsed.append((fields.get("id"), fields["event"]))
+    return parsed
+
+
+async def collect(stream, count):
+    chunks = []
+    async for chunk in stream:
+        chunks.append(chunk)
+        if len(events(chunks)) >= count:
+            break
+    return events(chunks)
+
+
+def read(feed, since=None, count=1, **filters):
+    """The first count events of a stream, publishing nothing in between"""
+    return asyncio.run(collect(feed.stream(since, **filters), count))
+
+
+def publish_updates(feed, count):
+    for seq in range(count):
+        feed.publish("network_infrastructure", [(UPDATE, f"N{seq}", node(f"N{seq}", utilization=seq), node(f"N{seq}"))])
+
+
+def test_diff_finds_inserts_updates_and_removals():
+    old = [node("A"), node("B"), node("C")]
+    new = [node("A"), node("B", status="Degraded"), node("D")]
+    assert diff(old, new, "node_id") == [
+        (UPDATE, "B", node("B", status="Degraded"), node("B")),
+        (INSERT, "D", node("D"), None),
+        (REMOVE, "C", None, node("C")),
+    ]
+    assert diff(new, new, "node_id") == []
+
+
+def test_since_returns_changes_after_a_position():
+    feed = ChangeFeed()
+    publish_updates(feed, 5)
+    assert [change.seq for change in feed.since(2)] == [3, 4, 5]
+    assert [change.seq for change in feed.since(0)] == [1, 2, 3, 4, 5]
+    assert feed.since(5) == []
+    # Never issued by this feed
+    assert feed.since(6) is None
+
+
+def test_since_is_none_once_the_position_left_the_log():
+    feed = ChangeFeed(max_entries=3)
+    publish_updates(feed, 5)
+    assert feed.since(1) is None
+    assert [change.seq for change in feed.since(2)] == [3, 4, 5]
+
+
+def test_event_ids_carry_the_epoch():
+    feed = ChangeFeed(epoch="abc")
+    assert feed.event_id(7) == b"abc-7"
+    assert feed.position("abc-7") == 7
+    assert feed.position("def-7") is None
+    assert feed.position("7") is None
+    assert feed.position("abc-x") is None
+    assert ChangeFeed().epoch != ChangeFeed().epoch
+
+
+def test_stream_resumes_after_the_last_event_id():
+    feed = ChangeFeed(epoch="abc")
+    publish_updates(feed, 4)
+    assert read(feed, "abc-2", count=3) == [("abc-2", "ready"), ("abc-3", UPDATE), ("abc-4", UPDATE)]
+
+
+def test_stream_filters_resumed_changes():
+    feed = ChangeFeed(epoch="abc")
+    feed.publish("tickets", [(INSERT, "T1", {"ticket_id": "T1", "priority": "Low"}, None),
+                             (INSERT, "T2", {"ticket_id": "T2", "priority": "Critical"}, None)])
+    publish_updates(feed, 1)
+    got = read(feed, "abc-0", count=2, resources=["tickets"], criteria={"priority": "Critical"})
+    assert got == [("abc-0", "ready"), ("abc-2", INSERT)]
+
+
+def test_stream_resets_for_an_id_from_another_run():
+    feed = ChangeFeed(epoch="abc")
+    publish_updates(feed, 2)
+    # The ready event has no id, so the client keeps its stale one until the reset replaces it
+    assert read(feed, "old-1", count=2) == [(None, "ready"), ("abc-2", "reset")]
+    assert read(feed, "1", count=2) == [(None, "ready"), ("abc-2", "reset")]
+
+
+def test_stream_resets_once_the_position_left_the_log():
+    feed = ChangeFeed(max_entries=2, epoch="abc")
+    publish_updates(feed, 5)
+    assert read(feed, "abc-1", count=2) == [("abc-1", "ready"), ("abc-5", "reset")]
+
+
+def test_close_ends_open_streams():
+    feed = ChangeFeed(epoch="abc")
+
+    async def run():
+        task = asyncio.create_task(collect(feed.stream(), 10))
+        await asyncio.sleep(0.01)
+        assert feed.subscribers == 1
+        feed.close()
+        return await asyncio.wait_for(task, 1)
+
+    assert asyncio.run(run()) == [("abc-0", "ready")]
+    assert feed.subscribers == 0
+    assert read(feed, count=1) == []
@@ -0,0 +1,202 @@
+import json
+import os
+from typing import List, Optional
+
+import pytest
+from pydantic import BaseModel
+
+import loader
+from loader import EMPLOYEE_SHEET, SPEC_FILE, DataLoader, _converter
+
+
+class Employee(BaseModel):
+    employee_id: str
+    full_name: str
+    role: str
+    leave_balance_days: int
+    line_manager: Optional[str] = None
+    asset_id: Optional[str] = None
+
+
+class Ticket(BaseModel):
+    ticket_id: str
+    priority: str
+    assigned_to: str
+    sla_breach: bool
+    affected_services: List[str]
+
+
+SCHEMAS = {"employees": Employee, "tickets": Ticket}
+
+SPEC_EMPLOYEES = [
+    {"employee_id": "MDX-101", "full_name": "Alexander Thorne", "role": "CEO", "leave_balance_days": 30},
+    {"employee_id": "MDX-103", "full_name": "Mei Chen", "role": "Engineer", "leave_balance_days": 12},
+]
+SPEC_TICKETS = [
+    {"ticket_id": "TKT-1", "priority": "High", "assigned_to": "MDX-103", "sla_breach": False, "affected_services": ["Fiber"]},
+]
+SHEET = (
+    "EmployeeID,FullName,Role,LineManager,AssetID,LeaveBalance\n"
+    "MDX-101,Alexander Thorne,Chief Executive,Board,MBA-X99,28\n"
+    "MDX-102,Amara Diallo,CTO,Alexander Thorne,LNV-P1,25\n"
+)
+
+
+def spec(examples):
+    return {"paths": {path: {"get": {"responses": {"200": {"content": {"application/json": {"example": rows}}}}}}
+                      for path, rows in examples.items()}}
+
+
+@pytest.fixture
+def resources(tmp_path):
+    directory = tmp_path / "resources"
+    directory.mkdir()
+    (directory / SPEC_FILE).write_text(json.dumps(spec({"/employees": SPEC_EMPLOYEES, "/tickets": SPEC_TICKETS})))
+    (directory / EMPLOYEE_SHEET).write_text(SHEET)
+    return directory
+
+
+@pytest.fixture
+def data_dir(tmp_path):
+    directory = tmp_path / "data"
+    directory.mkdir()
+    return directory
+
+
+def tickets(n, **overrides):
+    return [dict({"ticket_id": f"TKT-{i}", "priority": "Low", "assigned_to": "MDX-101", "sla_breach": False,
+                  "affected_services": ["Fiber", "VoIP"]}, **overrides) for i in range(n)]
+
+
+def write_ndjson(path, rows):
+    path.write_text("".join(json.dumps(row) + "\n" for row in rows))
+
+
+def touch(path, seconds=10):
+    """Move a file's mtime forward, as a fresh write would on a coarse-mtime filesystem"""
+    mtime = path.stat().st_mtime + seconds
+    os.utime(path, (mtime, mtime))
+
+
+def test_hr_sheet_is_merged_over_the_spec_employees(resources):
+    rows = {row["employee_id"]: row for row in DataLoader(SCHEMAS, resources).load("employees")}
+    assert sorted(rows) == ["MDX-101", "MDX-102", "MDX-103"]
+    # The sheet overrides the spec and adds line_manager and asset_id
+    assert rows["MDX-101"] == {"employee_id": "MDX-101", "full_name": "Alexander Thorne", "role": "Chief Executive",
+                               "leave_balance_days": 28, "line_manager": "Board", "asset_id": "MBA-X99"}
+    assert rows["MDX-102"]["line_manager"] == "Alexander Thorne"
+    assert rows["MDX-102"]["leave_balance_days"] == 25
+    # Employees only in the spec keep their spec fields
+    assert "line_manager" not in rows["MDX-103"]
+
+
+@pytest.mark.parametrize("annotation, text, expected", [
+    (int, "12", 12),
+    (int, "12.0", 12),
+    (float, "2.5", 2.5),
+    (bool, "Yes", True),
+    (bool, " true ", True),
+    (bool, "false", False),
+    (bool, "0", False),
+    (List[str], "Fiber; VoIP;;", ["Fiber", "VoIP"]),
+    (Optional[int], "", None),
+    (Optional[int], "7", 7),
+    (Optional[str], "", None),
+    (str, "", ""),
+])
+def test_csv_cells_are_converted_by_field_type(annotation, text, expected):
+    assert _converter(annotation)(text) == expected
+
+
+def test_csv_dump_is_coerced_to_the_model(resources, data_dir):
+    (data_dir / "tickets.csv").write_text(
+        "ticket_id,priority,assigned_to,sla_breach,affected_services\n"
+        "TKT-9,Critical,MDX-102,True,Fiber;Business Internet\n"
+    )
+    source = DataLoader(SCHEMAS, resources, data_dir)
+    rows = source.load("tickets")
+    assert rows == [{"ticket_id": "TKT-9", "priority": "Critical", "assigned_to": "MDX-102", "sla_breach": True,
+                     "affected_services": ["Fiber", "Business Internet"]}]
+    source.validate("tickets", rows)
+
+
+@pytest.mark.parametrize("name", ["tickets.ndjson", "tickets.json"])
+def test_memory_mapped_dumps_read_like_small_ones(resources, data_dir, monkeypatch, name):
+    rows = tickets(50)
+    path = data_dir / name
+    if name.endswith(".ndjson"):
+        write_ndjson(path, rows)
+    else:
+        path.write_text(json.dumps(rows))
+    source = DataLoader(SCHEMAS, resources, data_dir)
+    assert source.load("tickets") == rows
+    monkeypatch.setattr(loader, "MMAP_THRESHOLD_BYTES", 0)
+    assert source.load("tickets") == rows
+
+
+def test_dump_replaces_the_spec_rows(resources, data_dir):
+    source = DataLoader(SCHEMAS, resources, data_dir)
+    assert source.load("tickets") == SPEC_TICKETS
+    write_ndjson(data_dir / "tickets.ndjson", tickets(3))
+    assert [row["ticket_id"] for row in source.load("tickets")] == ["TKT-0", "TKT-1", "TKT-2"]
+
+
+def test_changed_reports_modified_added_and_removed_sources(resources, data_dir):
+    source = DataLoader(SCHEMAS, resources, data_dir)
+    source.load_all()
+    assert source.changed() == []
+
+    touch(resources / EMPLOYEE_SHEET)
+    assert source.changed() == ["employees"]
+    source.load("employees")
+    assert source.changed() == []
+
+    dump = data_dir / "tickets.ndjson"
+    write_ndjson(dump, tickets(2))
+    assert source.changed() == ["tickets"]
+    source.load("tickets")
+    assert source.changed() == []
+
+    dump.unlink()
+    assert source.changed() == ["tickets"]
+    assert source.load("tickets") == SPEC_TICKETS
+
+
+def test_spec_change_marks_every_collection_read_from_it(resources):
+    source = DataLoader(SCHEMAS, resources)
+    source.load_all()
+    touch(resources / SPEC_FILE)
+    assert source.changed() == ["employees", "tickets"]
+
+
+@pytest.mark.parametrize("bad_row", [{"assigned_to": None}, {"assigned_to": ...}, {"sla_breach": "sometimes"}])
+def test_reload_with_a_bad_row_fails_validation(resources, data_dir, bad_row):
+    dump = data_dir / "tickets.ndjson"
+    write_ndjson(dump, tickets(3))
+    source = DataLoader(SCHEMAS, resources, data_dir)
+    source.load_all()
+
+    rows = tickets(3)
+    for field, value in bad_row.items():
+        if value is ...:
+            del rows[1][field]
+        else:
+            rows[1][field] = value
+    write_ndjson(dump, rows)
+    touch(dump)
+    assert source.changed() == ["tickets"]
+    reloaded = source.load("tickets")
+    with pytest.raises(ValueError, match=rf"tickets: 1 invalid value\(s\); first in row 1, field '{next(iter(bad_row))}'"):
+        source.validate("tickets", reloaded)
+
+
+def test_load_all_fails_fast_on_a_bad_source(resources, data_dir):
+    write_ndjson(data_dir / "tickets.ndjson", tickets(2, assigned_to=None))
+    with pytest.raises(ValueError, match="tickets: 2 invalid"):
+        DataLoader(SCHEMAS, resources, data_dir).load_all()
+
+
+def test_repeated_strings_are_interned(resources, data_dir):
+    write_ndjson(data_dir / "tickets.ndjson", tickets(2))
+    first, second = DataLoader(SCHEMAS, resources, data_dir).load("tickets")
+    assert first["priority"] is second["priority"]
@@ -0,0 +1,127 @@
+import os
+
+import pytest
+
+from metrics import RETIRED_FILE, VALUE_FILE_BYTES, MetricsRegistry, RequestStats, read_values, write_values
+
+DURATION = 'modexia_http_request_duration_seconds_count{route="/products",method="GET",status="200"}'
+ROWS = 'modexia_http_response_rows_total{route="/products"}'
+
+
+def request(registry, elapsed=0.003, rows=10):
+    stats = RequestStats()
+    stats.rows = rows
+    stats.phases["encode"] = elapsed / 2
+    registry.observe("/products", "GET", 200, elapsed, 100, stats)
+
+
+def samples(registry):
+    """{series: value} of a rendering, without comments"""
+    lines = [line for line in registry.render().splitlines() if line and not line.startswith("#")]
+    return {series: float(value) for series, value in (line.rsplit(" ", 1) for line in lines)}
+
+
+def in_child(work):
+    """Run work in a forked child, as a pre-forked worker would, and return its pid"""
+    pid = os.fork()
+    if pid == 0:
+        try:
+            work()
+        finally:
+            os._exit(0)
+    os.waitpid(pid, 0)
+    return pid
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = MetricsRegistry(str(tmp_path))
+    registry.gauge("open_streams", "Open streams")
+    registry.counter("cache_hits_total", "Cache hits")
+    return registry
+
+
+def test_histograms_are_rendered_cumulative():
+    registry = MetricsRegistry()
+    for elapsed in (0.0004, 0.003, 0.003, 20.0):
+        request(registry, elapsed)
+    got = samples(registry)
+    bucket = 'modexia_http_request_duration_seconds_bucket{route="/products",method="GET",status="200",le="%s"}'
+    assert got[bucket % "0.0005"] == 1
+    assert got[bucket % "0.005"] == 3
+    assert got[bucket % "10"] == 3
+    assert got[bucket % "+Inf"] == 4
+    assert got[DURATION] == 4
+    assert got['modexia_http_request_duration_seconds_sum{route="/products",method="GET",status="200"}'] == pytest.approx(20.0064)
+    assert got['modexia_request_phase_seconds_count{route="/products",phase="encode"}'] == 4
+    assert got[ROWS] == 40
+
+
+def test_every_process_renders_the_sum_over_all_processes(registry, tmp_path):
+    streams = {"open_streams": 0, "cache_hits_total": 0}
+    registry.collect_with(lambda: dict(streams))
+    request(registry)
+
+    def worker():
+        streams.update(open_streams=2, cache_hits_total=5)
+        for _ in range(3):
+            request(registry)
+        registry.sample()
+
+    child = in_child(worker)
+    assert (tmp_path / f"{child}.db").exists()
+    streams.update(open_streams=1, cache_hits_total=1)
+    got = samples(registry)
+    assert got[DURATION] == 4
+    assert got[ROWS] == 40
+    assert got["open_streams"] == 3
+    assert got["cache_hits_total"] == 6
+    assert not any("worker" in series for series in got)
+
+
+def test_a_forked_child_never_writes_to_its_parents_file(registry, tmp_path):
+    request(registry)
+    in_child(lambda: request(registry))
+    assert read_values(tmp_path / f"{os.getpid()}.db") == read_values(next(
+        path for path in tmp_path.glob("*.db") if path.name != f"{os.getpid()}.db"))
+    assert samples(registry)[DURATION] == 2
+
+
+def test_retired_workers_keep_their_counters_and_drop_their_gauges(registry, tmp_path):
+    registry.collect_with(lambda: {"open_streams": 4, "cache_hits_total": 7})
+    first = in_child(lambda: (request(registry), registry.sample()))
+    second = in_child(lambda: (request(registry), request(registry), registry.sample()))
+    registry.retire(first)
+    registry.retire(second)
+    registry.retire(second)
+    assert [path.name for path in tmp_path.glob("*.db")] == [RETIRED_FILE]
+    got = samples(registry)
+    assert got[DURATION] == 3
+    # Only this process's streams are still open
+    assert got["open_streams"] == 4
+    assert got["cache_hits_total"] == 7 * 3
+
+
+def test_reset_removes_this_processs_values(registry, tmp_path):
+    request(registry)
+    registry.reset()
+    assert list(tmp_path.glob("*.db")) == []
+    assert DURATION not in samples(registry)
+
+
+def test_value_file_grows_past_its_initial_size(registry, tmp_path):
+    routes = VALUE_FILE_BYTES // 64
+    for i in range(routes):
+        registry.observe(f"/route/{i}", "GET", 200, 0.001, 1, RequestStats())
+    own = tmp_path / f"{os.getpid()}.db"
+    assert own.stat().st_size > VALUE_FILE_BYTES
+    got = samples(registry)
+    assert all(got[f'modexia_http_request_duration_seconds_count{{route="/route/{i}",method="GET",status="200"}}'] == 1
+               for i in range(routes))
+
+
+def test_value_files_round_trip(tmp_path):
+    values = {"c\x1fa\x1f\x1f": 1.5, "g\x1fgauge with a longer name\x1flabel=\"x\"\x1f": 3.0}
+    write_values(tmp_path / "values.db", values)
+    assert read_values(tmp_path / "values.db") == values
+    assert not (tmp_path / "values.db.tmp").exists()
@@ -0,0 +1,132 @@
+import math
+import os
+
+os.environ.setdefault("MODEXIA_RELOAD_INTERVAL", "0")
+
+import pytest  # noqa: E402
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+import search  # noqa: E402
+from search import COMMON_TERM_MIN_DOCS, PREFIX_WEIGHT, SearchEngine, SearchIndex, _document_text, build_index, tokenize  # noqa: E402
+
+
+def index_of(documents):
+    index = SearchIndex()
+    for key, text in documents.items():
+        index.add(key, text)
+    return index
+
+
+def keys(hits):
+    return [key for _, key in hits]
+
+
+def bm25(query_terms, documents, key, k1=1.2, b=0.75):
+    """BM25 score of one document, computed from the raw texts"""
+    tokenized = {k: tokenize(text) for k, text in documents.items()}
+    average = sum(len(tokens) for tokens in tokenized.values()) / len(tokenized)
+    score = 0.0
+    for term, weight in query_terms.items():
+        containing = sum(term in tokens for tokens in tokenized.values())
+        idf = weight * math.log(1 + (len(documents) - containing + 0.5) / (containing + 0.5))
+        frequency = tokenized[key].count(term)
+        score += idf * frequency * (k1 + 1) / (frequency + k1 * (1 - b + b * len(tokenized[key]) / average))
+    return score
+
+
+def test_tokenize_lowercases_and_splits_on_punctuation():
+    assert tokenize("Fiber-Cut @ FCW21, node_7!") == ["fiber", "cut", "fcw21", "node", "7"]
+    assert tokenize("  ") == []
+
+
+def test_document_text_flattens_lists_and_skips_missing_fields():
+    row = {"id": "T1", "description": "Packet loss", "affected_services": ["VoIP", "Fiber"], "location": None}
+    assert _document_text(row, ["description", "affected_services", "location", "absent"]) == "Packet loss VoIP Fiber"
+
+
+def test_scores_follow_bm25():
+    documents = {
+        "A": "fiber cut on the main fiber trunk",
+        "B": "fiber maintenance",
+        "C": "billing dispute over invoice",
+        "D": "packet loss on fiber link during peak hours with repeated alarms",
+    }
+    hits = index_of(documents).search("fiber loss", prefix=False)
+    expected = {key: bm25({"fiber": 1.0, "loss": 1.0}, documents, key) for key in ("A", "B", "D")}
+    assert keys(hits) == sorted(expected, key=expected.get, reverse=True)
+    for score, key in hits:
+        assert score == pytest.approx(expected[key])
+
+
+def test_last_token_matches_as_a_prefix():
+    index = index_of({"A": "fiber cut", "B": "wireless channel", "C": "copper cut"})
+    assert keys(index.search("fib")) == ["A"]
+    assert index.search("fib", prefix=False) == []
+    # Only the last token is expanded: "cop" first matches nothing, "cop" last finds copper
+    assert sorted(keys(index.search("cop cut"))) == ["A", "C"]
+    assert keys(index.search("cut cop")) == ["C", "A"]
+
+
+def test_prefix_only_matches_are_weighted_down():
+    documents = {"A": "fiber outage", "B": "fibers outage"}
+    hits = index_of(documents).search("fiber")
+    assert keys(hits) == ["A", "B"]
+    assert hits[1][0] == pytest.approx(bm25({"fibers": PREFIX_WEIGHT}, documents, "B"))
+
+
+def test_prefix_expansion_is_capped(monkeypatch):
+    monkeypatch.setattr(search, "MAX_PREFIX_EXPANSIONS", 3)
+    index = index_of({f"K{i}": f"node{i:02d}" for i in range(10)})
+    assert len(index.search("node", limit=10)) == 3
+
+
+def test_common_terms_are_dropped_from_mixed_queries_in_large_indexes():
+    documents = {f"K{i:04d}": "router " + ("fiber" if i % 100 == 0 else "copper") for i in range(COMMON_TERM_MIN_DOCS)}
+    index = index_of(documents)
+    hits = index.search("router fiber", limit=50, prefix=False)
+    assert sorted(keys(hits)) == [f"K{i:04d}" for i in range(0, COMMON_TERM_MIN_DOCS, 100)]
+    # Fiber-only scores: router contributed nothing
+    assert hits[0][0] == pytest.approx(bm25({"fiber": 1.0}, documents, hits[0][1]))
+    # A query of only common terms still matches
+    assert len(index.search("router", limit=50, prefix=False)) == 50
+
+
+def test_common_terms_are_kept_in_small_indexes():
+    index = index_of({f"K{i:03d}": "router " + ("fiber" if i % 10 == 0 else "copper") for i in range(100)})
+    assert len(index.search("router fiber", limit=50, prefix=False)) == 50
+
+
+def test_engine_scopes_and_merges_resources():
+    engine = SearchEngine()
+    engine.replace("tickets", build_index([{"ticket_id": "T1", "description": "fiber cut"}], "ticket_id", ["description"]))
+    engine.replace("equipment", build_index([{"equipment_id": "E1", "model": "fiber splicer"},
+                                             {"equipment_id": "E2", "model": "copper crimper"}], "equipment_id", ["model"]))
+    assert {(resource, key) for _, resource, key in engine.search("fiber")} == {("tickets", "T1"), ("equipment", "E1")}
+    assert [(resource, key) for _, resource, key in engine.search("fiber", ["equipment"])] == [("equipment", "E1")]
+    assert engine.search("fiber", ["unknown"]) == []
+    assert len(engine.search("fiber", limit=1)) == 1
+
+
+def test_replaced_index_serves_the_reloaded_rows():
+    engine = SearchEngine()
+    engine.replace("tickets", build_index([{"ticket_id": "T1", "description": "fiber cut"}], "ticket_id", ["description"]))
+    engine.replace("tickets", build_index([{"ticket_id": "T2", "description": "billing dispute"}], "ticket_id", ["description"]))
+    assert engine.search("fiber") == []
+    assert [key for _, _, key in engine.search("billing")] == ["T2"]
+
+
+def test_search_endpoint_follows_a_reload():
+    client = TestClient(main.app)
+    tickets = main.STORE["tickets"]
+    original = list(tickets.rows)
+    key_field, text_fields = main.SEARCH_FIELDS["tickets"]
+    changed = [dict(original[0], description="quokka sighted near the splice enclosure")] + original[1:]
+    try:
+        main.apply_reload("tickets", changed, build_index(changed, key_field, text_fields), [])
+        hits = client.get("/search", params={"q": "quokka", "resource": "tickets"}).json()
+        assert [hit["id"] for hit in hits] == [original[0]["ticket_id"]]
+        assert hits[0]["record"]["description"].startswith("quokka")
+    finally:
+        main.apply_reload("tickets", original, build_index(original, key_field, text_fields), [])
+    assert client.get("/search", params={"q": "quokka"}).json() == []
@@ -0,0 +1,77 @@
+import json
+import signal
+import socket
+import subprocess
+import sys
+import time
+import urllib.request
+from pathlib import Path
+
+import pytest
+
+SERVER_DIR = Path(__file__).resolve().parents[1]
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def request(url, body=None):
+    """One request on a fresh connection, so the kernel may hand it to any worker"""
+    data = json.dumps(body).encode() if body is not None else None
+    with urllib.request.urlopen(urllib.request.Request(url, data, {"Content-Type": "application/json"}), timeout=10) as response:
+        payload = response.read()
+    return json.loads(payload) if response.headers["content-type"].startswith("application/json") else payload.decode()
+
+
+def wait_for(check, seconds=60):
+    deadline = time.monotonic() + seconds
+    while True:
+        try:
+            if check():
+                return
+        except OSError:
+            pass
+        if time.monotonic() > deadline:
+            raise AssertionError("timed out")
+        time.sleep(0.2)
+
+
+@pytest.fixture
+def server():
+    port = free_port()
+    process = subprocess.Popen(
+        [sys.executable, "serve.py", "--host", "127.0.0.1", "--port", str(port), "--workers", "2",
+         "--reload-interval", "0", "--log-level", "warning"],
+        cwd=SERVER_DIR,
+    )
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_for(lambda: request(f"{url}/products"))
+        yield process, url
+    finally:
+        process.terminate()
+        process.wait(timeout=60)
+
+
+def test_samples_posted_to_any_worker_are_served_by_all(server):
+    process, url = server
+    node_id = request(f"{url}/network-infrastructure")[0]["node_id"]
+    series = f"{url}/network-infrastructure/{node_id}/utilization"
+    now = time.time()
+    for i in range(20):
+        assert request(series, {"samples": [{"timestamp": now - 60 * i, "value": float(i)}]}) == {"accepted": 1}
+
+    # One sample was recorded from the dataset at startup
+    summaries = [request(series)["summary"] for _ in range(20)]
+    assert {summary["count"] for summary in summaries} == {21}
+    assert len({summary["avg"] for summary in summaries}) == 1
+    route = 'route="/network-infrastructure/{node_id}/utilization",method="POST",status="200"'
+    assert f"modexia_http_request_duration_seconds_count{{{route}}} 20" in request(f"{url}/metrics")
+
+    # A reload forks new workers and records one more dataset sample in the same store
+    process.send_signal(signal.SIGHUP)
+    wait_for(lambda: request(series)["summary"]["count"] == 22)
+    assert {request(series)["summary"]["count"] for _ in range(10)} == {22}
@@ -0,0 +1,92 @@
+import pytest
+
+from store import Collection
+
+
+def tickets(n=50):
+    priorities = ["Critical", "High", "Medium", "Low"]
+    statuses = ["Open", "Resolved", "Closed"]
+    # Inserted out of key order on purpose: an ordered collection must sort them
+    return [
+        {"ticket_id": f"TKT-{i:04d}", "priority": priorities[i % 4], "status": statuses[i % 3]}
+        for i in reversed(range(n))
+    ]
+
+
+def collection(rows=None):
+    return Collection("tickets", rows if rows is not None else tickets(), primary_key="ticket_id",
+                      indexes=("priority", "status"), ordered=True)
+
+
+def walk(source, rows, limit):
+    pages, cursor = [], None
+    while True:
+        page, cursor = source.page(rows, cursor, limit)
+        pages.append(page)
+        if cursor is None:
+            return pages
+
+
+def test_filter_uses_indexes_and_intersects_criteria():
+    source = collection()
+    expected = [row for row in source.rows if row["priority"] == "Critical" and row["status"] == "Open"]
+    assert source.filter(priority="Critical", status="Open") == expected
+    assert source.filter(priority="Critical", status=None) == [r for r in source.rows if r["priority"] == "Critical"]
+    assert source.filter(priority="Unknown") == []
+    assert source.filter() is source.rows
+
+
+def test_filter_rejects_unindexed_field():
+    with pytest.raises(KeyError):
+        collection().filter(customer_id="CUST-1")
+
+
+@pytest.mark.parametrize("limit", [1, 3, 7, 50, 100])
+def test_cursor_pages_cover_filtered_rows_exactly_once(limit):
+    source = collection()
+    for criteria in ({}, {"priority": "High"}, {"priority": "Critical", "status": "Open"}):
+        rows = source.filter(**criteria)
+        pages = walk(source, rows, limit)
+        assert [row for page in pages for row in page] == rows
+        assert all(len(page) <= limit for page in pages)
+
+
+def test_cursor_is_last_key_of_page_and_resumes_after_it():
+    source = collection()
+    rows = source.filter(priority="Low")
+    page, cursor = source.page(rows, None, 2)
+    assert cursor == page[-1]["ticket_id"]
+    following, _ = source.page(rows, cursor, 2)
+    assert following[0]["ticket_id"] > cursor
+
+
+def test_cursor_for_a_key_not_in_the_filter_result():
+    # Cursors are keys, not positions: one taken from another filter still resumes in key order
+    source = collection()
+    rows = source.filter(priority="Medium")
+    page, _ = source.page(rows, "TKT-0010", None)
+    assert page == [row for row in rows if row["ticket_id"] > "TKT-0010"]
+
+
+def test_last_page_has_no_cursor():
+    source = collection()
+    rows = source.filter(priority="Critical")
+    assert source.page(rows, None, len(rows))[1] is None
+    assert source.page(rows, rows[-1]["ticket_id"], 10) == ([], None)
+
+
+def test_unordered_collection_cannot_be_paged():
+    source = Collection("invoices", [{"invoice_id": "INV-1"}], primary_key="invoice_id")
+    with pytest.raises(ValueError):
+        source.page(source.rows, None, 10)
+
+
+def test_load_rebuilds_indexes_and_bumps_version():
+    source = collection()
+    assert len(source.filter(priority="Critical")) > 0
+    version = source.version
+    source.load([{"ticket_id": "TKT-9999", "priority": "Low", "status": "Open"}])
+    assert source.version == version + 1
+    assert source.filter(priority="Critical") == []
+    assert source.get("TKT-9999")["priority"] == "Low"
+    assert source.get("TKT-0001") is None
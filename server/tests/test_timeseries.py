@@ -0,0 +1,187 @@
+import os
+from multiprocessing import AuthenticationError
+
+import numpy as np
+import pytest
+
+from timeseries import (COUNT, MAX, MIN, ROLLUP_RESOLUTIONS, SUM, RemoteTimeSeriesStore, Series, TimeSeriesServer, TimeSeriesStore,
+                        parse_duration, summarize)
+
+DAY = 86400
+# Long enough that nothing in these tests is evicted unless they say so
+KEEP_ALL = {0: 10 * 365 * DAY, 300: 10 * 365 * DAY, 3600: 10 * 365 * DAY, 86400: 10 * 365 * DAY}
+
+
+def expected_rollup(timestamps, values, resolution):
+    """(bucket, count, sum, min, max) rows computed one sample at a time"""
+    buckets = {}
+    for timestamp, value in zip(timestamps, values):
+        bucket = timestamp - timestamp % resolution
+        count, total, low, high = buckets.get(bucket, (0, 0.0, np.inf, -np.inf))
+        buckets[bucket] = (count + 1, total + value, min(low, value), max(high, value))
+    return np.array([(bucket, *buckets[bucket]) for bucket in sorted(buckets)])
+
+
+def samples(n=2000, seed=0):
+    rng = np.random.default_rng(seed)
+    timestamps = 1_700_000_000 + np.sort(rng.uniform(0, 3 * DAY, n)).round()
+    return timestamps, rng.uniform(0, 100, n).round(2)
+
+
+def test_out_of_order_appends_and_batches_match_a_brute_force_rollup():
+    timestamps, values = samples()
+    rng = np.random.default_rng(1)
+    order = np.arange(len(timestamps))
+    # Mostly in order, with a shuffled middle stretch and late batches
+    rng.shuffle(order[500:900])
+    series = Series(KEEP_ALL)
+    for i in order[:1200]:
+        series.append(timestamps[i], values[i])
+    late = order[1200:]
+    rng.shuffle(late)
+    for chunk in np.array_split(late, 7):
+        series.extend(timestamps[chunk], values[chunk])
+
+    resolution, raw = series.query()
+    assert resolution == 0
+    assert np.array_equal(raw[:, 0], timestamps)
+    for level in ROLLUP_RESOLUTIONS:
+        _, rows = series.query(step=level)
+        expected = expected_rollup(timestamps, values, level)
+        assert np.array_equal(rows[:, [0, COUNT, MIN, MAX]], expected[:, [0, 1, 3, 4]])
+        assert np.allclose(rows[:, SUM], expected[:, 2])
+
+
+def test_duplicate_timestamps_are_all_kept():
+    series = Series(KEEP_ALL)
+    series.append(1000.0, 1.0)
+    series.extend(np.array([1000.0, 1000.0]), np.array([2.0, 3.0]))
+    _, rows = series.query(step=300)
+    assert rows[:, COUNT].tolist() == [3]
+    assert summarize(rows) == {"count": 3, "avg": 2.0, "min": 1.0, "max": 3.0}
+
+
+def test_retention_evicts_old_rows_and_bounds_the_buffers():
+    retention = {0: DAY, 300: 7 * DAY, 3600: 30 * DAY, 86400: 365 * DAY}
+    series = Series(retention)
+    for minute in range(20 * 24 * 60):
+        series.append(minute * 60.0, 1.0)
+    series.flush()
+    newest = (20 * 24 * 60 - 1) * 60.0
+    assert series.raw.view()[0, 0] >= newest - DAY
+    assert series.rollups[300].view()[0, 0] >= newest - 7 * DAY - 300
+    assert len(series.rollups[3600]) == 20 * 24
+    # The raw buffer holds about a day of minutes, not all twenty days
+    assert len(series.raw.data) <= 4 * 24 * 60
+    capacity = len(series.raw.data)
+    for minute in range(20 * 24 * 60, 30 * 24 * 60):
+        series.append(minute * 60.0, 1.0)
+    assert len(series.raw.data) == capacity
+
+
+def test_query_without_step_uses_the_finest_level_reaching_start():
+    retention = {0: DAY, 300: 7 * DAY, 3600: 30 * DAY, 86400: 365 * DAY}
+    series = Series(retention)
+    timestamps = np.arange(0, 10 * DAY, 60.0)
+    series.extend(timestamps, np.ones(len(timestamps)))
+    newest = timestamps[-1]
+    assert series.query(start=newest - 3600)[0] == 0
+    assert series.query(start=newest - 3 * DAY)[0] == 300
+    assert series.query(start=newest - 9 * DAY)[0] == 3600
+    assert series.query(start=newest - 60 * DAY)[0] == 86400
+    # Nothing reaches back that far: the coarsest level has the most history
+    assert series.query(start=newest - 400 * DAY)[0] == 86400
+    # With no start, the finest level still holding the oldest retained row
+    assert series.query()[0] == 3600
+
+
+def test_query_with_step_downsamples_from_the_coarsest_dividing_rollup():
+    series = Series(KEEP_ALL)
+    timestamps = np.arange(0, 2 * DAY, 60.0)
+    series.extend(timestamps, np.arange(len(timestamps), dtype=float))
+    resolution, rows = series.query(step=7200)
+    assert resolution == 7200
+    assert len(rows) == 24
+    assert rows[:, COUNT].tolist() == [120] * 24
+    resolution, rows = series.query(start=3600, end=3 * 3600 - 1, step=600)
+    assert resolution == 600
+    assert rows[0, 0] == 3600 and rows[-1, 0] == 3 * 3600 - 600
+    # A step no rollup divides is built from the raw samples
+    assert series.query(step=90)[0] == 90
+
+
+def test_store_query_of_an_unknown_series_is_empty():
+    store = TimeSeriesStore()
+    assert store.query("usage_mbps", "CUST-0", step=3600)[0] == 3600
+    assert len(store.query("usage_mbps", "CUST-0")[1]) == 0
+    store.append("usage_mbps", "CUST-1", 0.0, 1.0)
+    assert list(store) == [("usage_mbps", "CUST-1")]
+
+
+@pytest.fixture
+def served(tmp_path):
+    store = TimeSeriesStore()
+    server = TimeSeriesServer(store, str(tmp_path / "timeseries.sock"), b"secret")
+    server.start()
+    yield store, server.address
+    server.close()
+
+
+def test_remote_store_reads_and_writes_the_served_store(served):
+    store, address = served
+    remote = RemoteTimeSeriesStore(address, b"secret")
+    remote.append("usage_mbps", "CUST-1", 0.0, 1.0)
+    remote.extend("usage_mbps", "CUST-1", np.array([60.0, 120.0]), np.array([2.0, 3.0]))
+    assert store.query("usage_mbps", "CUST-1", step=300)[1][:, COUNT].tolist() == [3]
+    resolution, rows = remote.query("usage_mbps", "CUST-1", step=300)
+    assert resolution == 300 and summarize(rows) == {"count": 3, "avg": 2.0, "min": 1.0, "max": 3.0}
+    assert remote.stats() == store.stats()
+
+
+def test_remote_store_raises_the_servers_errors(served):
+    _, address = served
+    remote = RemoteTimeSeriesStore(address, b"secret")
+    with pytest.raises(TypeError):
+        remote._call("stats", "unexpected")
+    with pytest.raises(ValueError, match="Unknown time-series method"):
+        remote._call("get", "usage_mbps", "CUST-1")
+    # The connection is still usable
+    assert remote.stats()["series"] == 0
+
+
+def test_remote_store_needs_the_authkey(served):
+    _, address = served
+    with pytest.raises(AuthenticationError):
+        RemoteTimeSeriesStore(address, b"wrong").stats()
+    assert RemoteTimeSeriesStore(address, b"secret").stats()["series"] == 0
+
+
+def test_forked_workers_share_the_served_store(served):
+    store, address = served
+    remote = RemoteTimeSeriesStore(address, b"secret")
+    remote.stats()
+    children = []
+    for worker in range(3):
+        pid = os.fork()
+        if pid == 0:
+            code = 1
+            try:
+                remote.extend("utilization_percent", "NODE-1", [float(worker)], [float(worker)])
+                code = 0
+            finally:
+                os._exit(code)
+        children.append(pid)
+    assert all(os.waitpid(pid, 0)[1] == 0 for pid in children)
+    assert sorted(remote.query("utilization_percent", "NODE-1")[1][:, SUM].tolist()) == [0.0, 1.0, 2.0]
+    assert store.stats()["raw_samples"] == 3
+
+
+@pytest.mark.parametrize("text, seconds", [("300s", 300), ("5m", 300), ("1h", 3600), (" 30D ", 30 * DAY), ("2w", 14 * DAY)])
+def test_parse_duration(text, seconds):
+    assert parse_duration(text) == seconds
+
+
+@pytest.mark.parametrize("text", ["", "0m", "5", "1.5h", "-1h", "1y"])
+def test_parse_duration_rejects_invalid_text(text):
+    with pytest.raises(ValueError):
+        parse_duration(text)
@@ -0,0 +1,405 @@
+"""
+Time-series storage for the Modexia ISP API.
+
+Each series (a metric for one node or customer) keeps its raw samples in a
+growable NumPy buffer of (timestamp, value) rows. Next to it are rollup
+buffers at 5-minute, hourly and daily resolution, each holding (bucket start,
+count, sum, min, max) rows. Single in-order samples are staged in a short list
+and folded into the arrays a block at a time; batches go straight in. Merging
+an in-order block only touches the last bucket of each rollup, and a late
+sample or batch re-merges just the tail of the buffers it overlaps.
+
+Every level has its own retention, measured back from the newest sample in
+the series. Older rows are dropped from the front of the buffer and the space
+is reclaimed on the next growth, so memory per series stays bounded however
+long it is fed. A range query is answered from the finest level that still
+covers the requested start, or from the coarsest rollup whose resolution
+divides the requested step, and is then downsampled to that step.
+
+Pre-forked workers cannot share one store in memory. Instead, the process that
+owns the store serves it with TimeSeriesServer on a unix socket. Workers use a
+RemoteTimeSeriesStore, which sends every call to that server, so a sample
+posted to any worker can be read back from all of them.
+"""
+
+import os
+import re
+import threading
+from multiprocessing.connection import Client, Connection, Listener
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+ROLLUP_RESOLUTIONS = (300, 3600, 86400)
+# Seconds of history kept per resolution (0 = raw samples)
+DEFAULT_RETENTION = {0: 2 * 86400, 300: 30 * 86400, 3600: 180 * 86400, 86400: 5 * 365 * 86400}
+INITIAL_CAPACITY = 4
+# In-order samples staged in Python lists before being folded into the arrays
+PENDING_LIMIT = 64
+
+# Columns of a rollup row
+BUCKET, COUNT, SUM, MIN, MAX = range(5)
+
+DURATION_PATTERN = re.compile(r"(\d+)([smhdw])")
+DURATION_UNITS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 7 * 86400}
+
+
+def parse_duration(text: str) -> int:
+    """Seconds in a duration such as "300s", "5m", "1h" or "30d" """
+    match = DURATION_PATTERN.fullmatch(text.strip().lower())
+    if match is None or int(match.group(1)) == 0:
+        raise ValueError(f"Invalid duration '{text}'; expected a positive number followed by s, m, h, d or w")
+    return int(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+def _aggregate(buckets: np.ndarray, count: np.ndarray, total: np.ndarray,
+               low: np.ndarray, high: np.ndarray) -> np.ndarray:
+    """Combine rows sharing a bucket (buckets must be sorted) into one rollup row each"""
+    if not len(buckets):
+        return np.empty((0, 5))
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    return np.column_stack([
+        buckets[starts],
+        np.add.reduceat(count, starts),
+        np.add.reduceat(total, starts),
+        np.minimum.reduceat(low, starts),
+        np.maximum.reduceat(high, starts),
+    ])
+
+
+def _rollup(rows: np.ndarray, resolution: int) -> np.ndarray:
+    """Re-bucket time-sorted rollup rows to a coarser resolution"""
+    buckets = rows[:, BUCKET] - rows[:, BUCKET] % resolution
+    return _aggregate(buckets, rows[:, COUNT], rows[:, SUM], rows[:, MIN], rows[:, MAX])
+
+
+class _Buffer:
+    """Time-sorted rows in a preallocated array that grows by doubling and evicts from the front"""
+
+    __slots__ = ("data", "start", "end", "evicted_until")
+
+    def __init__(self, columns: int):
+        self.data = np.empty((INITIAL_CAPACITY, columns))
+        self.start = 0
+        self.end = 0
+        # Every row older than this has been dropped
+        self.evicted_until = -np.inf
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def view(self) -> np.ndarray:
+        return self.data[self.start:self.end]
+
+    def _reserve(self, extra: int) -> None:
+        live = self.end - self.start
+        if self.end + extra <= len(self.data):
+            return
+        if live + extra <= len(self.data) * 3 // 4:
+            # Enough space freed by eviction: compact instead of growing
+            self.data[:live] = self.data[self.start:self.end]
+        else:
+            grown = np.empty((max(2 * len(self.data), live + extra), self.data.shape[1]))
+            grown[:live] = self.data[self.start:self.end]
+            self.data = grown
+        self.start, self.end = 0, live
+
+    def replace_tail(self, position: int, rows: np.ndarray) -> None:
+        """Replace rows from position (relative to the live view) to the end"""
+        self.end = self.start + position
+        self._reserve(len(rows))
+        self.data[self.end:self.end + len(rows)] = rows
+        self.end += len(rows)
+
+    def evict_before(self, cutoff: float) -> None:
+        if self.end > self.start and self.data[self.start, 0] < cutoff:
+            self.start += int(np.searchsorted(self.view()[:, 0], cutoff, side="left"))
+        self.evicted_until = max(self.evicted_until, cutoff)
+
+
+class Series:
+    """Raw samples and rollups of one metric for one entity"""
+
+    __slots__ = ("raw", "rollups", "retention", "_pending_t", "_pending_v", "_last")
+
+    def __init__(self, retention: Dict[int, int]):
+        self.raw = _Buffer(2)
+        self.rollups = {resolution: _Buffer(5) for resolution in ROLLUP_RESOLUTIONS}
+        self.retention = retention
+        self._pending_t: List[float] = []
+        self._pending_v: List[float] = []
+        self._last = -np.inf
+
+    def __len__(self) -> int:
+        return len(self.raw) + len(self._pending_t)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes allocated for the raw and rollup buffers"""
+        return self.raw.data.nbytes + sum(buffer.data.nbytes for buffer in self.rollups.values())
+
+    def append(self, timestamp: float, value: float) -> None:
+        """Add one sample; in-order samples are staged and folded in PENDING_LIMIT at a time"""
+        if timestamp < self._last:
+            self.extend(np.array([timestamp]), np.array([value]))
+            return
+        self._last = timestamp
+        self._pending_t.append(timestamp)
+        self._pending_v.append(value)
+        if len(self._pending_t) >= PENDING_LIMIT:
+            self.flush()
+
+    def flush(self) -> None:
+        """Fold staged samples into the raw buffer and rollups"""
+        if self._pending_t:
+            timestamps = np.array(self._pending_t)
+            values = np.array(self._pending_v)
+            self._pending_t = []
+            self._pending_v = []
+            self._merge(timestamps, values)
+
+    def extend(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        """Add a batch of samples in any order"""
+        if not len(timestamps):
+            return
+        self.flush()
+        self._merge(timestamps, values)
+        self._last = max(self._last, float(self.raw.data[self.raw.end - 1, 0]))
+
+    def _merge(self, timestamps: np.ndarray, values: np.ndarray) -> None:
+        order = np.argsort(timestamps, kind="stable")
+        timestamps = np.asarray(timestamps, dtype=np.float64)[order]
+        values = np.asarray(values, dtype=np.float64)[order]
+
+        raw = self.raw
+        existing = raw.view()
+        position = int(np.searchsorted(existing[:, 0], timestamps[0], side="right"))
+        merged = np.concatenate([existing[position:], np.column_stack([timestamps, values])])
+        if position < len(existing):
+            merged = merged[np.argsort(merged[:, 0], kind="stable")]
+        raw.replace_tail(position, merged)
+
+        ones = np.ones(len(values))
+        for resolution, rollup in self.rollups.items():
+            batch = _aggregate(timestamps - timestamps % resolution, ones, values, values, values)
+            existing = rollup.view()
+            position = int(np.searchsorted(existing[:, BUCKET], batch[0, BUCKET], side="left"))
+            merged = np.concatenate([existing[position:], batch])
+            merged = merged[np.argsort(merged[:, BUCKET], kind="stable")]
+            rollup.replace_tail(position, _aggregate(*merged.T))
+        self._evict(float(raw.data[raw.end - 1, 0]))
+
+    def _evict(self, newest: float) -> None:
+        self.raw.evict_before(newest - self.retention[0])
+        for resolution, rollup in self.rollups.items():
+            cutoff = newest - self.retention[resolution]
+            rollup.evict_before(cutoff - cutoff % resolution)
+
+    def query(self, start: Optional[float] = None, end: Optional[float] = None,
+              step: Optional[int] = None) -> Tuple[int, np.ndarray]:
+        """
+        Rollup rows (bucket, count, sum, min, max) covering [start, end].
+
+        Returns the resolution the rows are at, which is step when given and
+        otherwise that of the finest level still holding data from start
+        (0 for raw samples, one row per sample).
+        """
+        self.flush()
+        levels = [(0, self.raw)] + list(self.rollups.items())
+        if step is not None:
+            levels = [(resolution, buffer) for resolution, buffer in levels if step % (resolution or step) == 0]
+        since = start
+        if since is None:
+            firsts = [buffer.data[buffer.start, 0] for _, buffer in levels if len(buffer)]
+            since = min(firsts) if firsts else -np.inf
+        covering = [level for level in levels if since >= level[1].evicted_until]
+        if not covering:
+            # Nothing reaches back to start: the coarsest level has the most history
+            resolution, buffer = levels[-1]
+        elif step is not None:
+            # Among levels dividing step, the coarsest leaves the least downsampling to do
+            resolution, buffer = covering[-1]
+        else:
+            resolution, buffer = covering[0]
+
+        rows = buffer.view()
+        if start is None:
+            low = 0
+        elif resolution:
+            # Buckets starting before start still overlap it if they end after it
+            low = int(np.searchsorted(rows[:, 0], start - resolution, side="right"))
+        else:
+            low = int(np.searchsorted(rows[:, 0], start, side="left"))
+        high = len(rows) if end is None else int(np.searchsorted(rows[:, 0], end, side="right"))
+        rows = rows[low:high]
+        if resolution == 0:
+            rows = np.column_stack([rows[:, 0], np.ones(len(rows)), rows[:, 1], rows[:, 1], rows[:, 1]])
+        if step is not None and step != resolution:
+            rows = _rollup(rows, step)
+        return (step if step is not None else resolution), rows
+
+
+class TimeSeriesStore:
+    """Series keyed by (metric, entity id), created on their first sample"""
+
+    def __init__(self, retention: Optional[Dict[int, int]] = None):
+        self.retention = dict(DEFAULT_RETENTION, **(retention or {}))
+        self._series: Dict[Tuple[str, str], Series] = {}
+        # Held by every call, for a store served to other processes from several threads
+        self._lock = threading.RLock()
+
+    def _get_or_create(self, metric: str, key: str) -> Series:
+        series = self._series.get((metric, key))
+        if series is None:
+            series = self._series[(metric, key)] = Series(self.retention)
+        return series
+
+    def append(self, metric: str, key: str, timestamp: float, value: float) -> None:
+        with self._lock:
+            self._get_or_create(metric, key).append(timestamp, value)
+
+    def extend(self, metric: str, key: str, timestamps: Sequence[float], values: Sequence[float]) -> None:
+        timestamps, values = np.asarray(timestamps, dtype=np.float64), np.asarray(values, dtype=np.float64)
+        with self._lock:
+            self._get_or_create(metric, key).extend(timestamps, values)
+
+    def get(self, metric: str, key: str) -> Optional[Series]:
+        return self._series.get((metric, key))
+
+    def query(self, metric: str, key: str, start: Optional[float] = None, end: Optional[float] = None,
+              step: Optional[int] = None) -> Tuple[int, np.ndarray]:
+        """Series.query, with no rows for a series that has no samples yet"""
+        with self._lock:
+            series = self._series.get((metric, key))
+            if series is None:
+                return step or 0, np.empty((0, 5))
+            return series.query(start, end, step)
+
+    def __len__(self) -> int:
+        return len(self._series)
+
+    def __iter__(self) -> Iterator[Tuple[str, str]]:
+        return iter(self._series)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            for series in self._series.values():
+                series.flush()
+            return {
+                "series": len(self._series),
+                "raw_samples": sum(len(series) for series in self._series.values()),
+                "bytes": sum(series.nbytes for series in self._series.values()),
+            }
+
+
+# Store methods a RemoteTimeSeriesStore may call
+REMOTE_METHODS = frozenset({"append", "extend", "query", "stats"})
+
+
+class TimeSeriesServer:
+    """
+    Serves a TimeSeriesStore to other processes on a unix socket.
+
+    Each connection gets a thread that runs ``(method, args)`` requests
+    against the store and answers ``(ok, result)``. An exception is sent back
+    and raised again in the caller. Clients must present the authkey.
+    """
+
+    def __init__(self, store: TimeSeriesStore, address: str, authkey: bytes):
+        self.store = store
+        self.address = address
+        self._listener = Listener(address, "AF_UNIX", authkey=authkey)
+        self._closed = False
+        self._thread = threading.Thread(target=self._accept, name="modexia-timeseries", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def close(self) -> None:
+        self._closed = True
+        self._listener.close()
+
+    def _accept(self) -> None:
+        while not self._closed:
+            try:
+                connection = self._listener.accept()
+            except Exception:
+                # Closed, or a client that failed authentication or hung up
+                continue
+            threading.Thread(target=self._serve, args=(connection,), name="modexia-timeseries-client", daemon=True).start()
+
+    def _serve(self, connection: Connection) -> None:
+        with connection:
+            while True:
+                try:
+                    method, args = connection.recv()
+                except (EOFError, OSError):
+                    return
+                try:
+                    if method not in REMOTE_METHODS:
+                        raise ValueError(f"Unknown time-series method {method!r}")
+                    reply = (True, getattr(self.store, method)(*args))
+                except Exception as error:
+                    reply = (False, error)
+                connection.send(reply)
+
+
+class RemoteTimeSeriesStore:
+    """TimeSeriesStore whose calls are answered by a TimeSeriesServer in another process"""
+
+    def __init__(self, address: str, authkey: bytes):
+        self.address = address
+        self._authkey = authkey
+        self._connection: Optional[Connection] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def _call(self, method: str, *args: Any) -> Any:
+        with self._lock:
+            # One connection per process; a forked child opens its own
+            if self._connection is None or self._pid != os.getpid():
+                self._connection = Client(self.address, "AF_UNIX", authkey=self._authkey)
+                self._pid = os.getpid()
+            try:
+                self._connection.send((method, args))
+                ok, result = self._connection.recv()
+            except (EOFError, OSError):
+                self._connection = None
+                raise
+        if not ok:
+            raise result
+        return result
+
+    def append(self, metric: str, key: str, timestamp: float, value: float) -> None:
+        self._call("append", metric, key, timestamp, value)
+
+    def extend(self, metric: str, key: str, timestamps: Sequence[float], values: Sequence[float]) -> None:
+        self._call("extend", metric, key, list(timestamps), list(values))
+
+    def query(self, metric: str, key: str, start: Optional[float] = None, end: Optional[float] = None,
+              step: Optional[int] = None) -> Tuple[int, np.ndarray]:
+        return self._call("query", metric, key, start, end, step)
+
+    def stats(self) -> Dict[str, int]:
+        return self._call("stats")
+
+
+def summarize(rows: np.ndarray) -> Dict[str, Optional[float]]:
+    """Count, mean, min and max over rollup rows"""
+    count = int(rows[:, COUNT].sum()) if len(rows) else 0
+    if not count:
+        return {"count": 0, "avg": None, "min": None, "max": None}
+    return {
+        "count": count,
+        "avg": float(rows[:, SUM].sum() / count),
+        "min": float(rows[:, MIN].min()),
+        "max": float(rows[:, MAX].max()),
+    }
+
+
+def points(rows: np.ndarray) -> List[Tuple[float, int, float, float, float]]:
+    """(timestamp, count, avg, min, max) per rollup row"""
+    return [
+        (bucket, int(count), total / count, low, high)
+        for bucket, count, total, low, high in rows.tolist()
+    ]